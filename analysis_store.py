@@ -0,0 +1,377 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Iterable, Tuple
+
+# Determine the base directory of this Python script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def fingerprint(obj: Any) -> str:
+    """Stable content hash of any JSON-serializable object (dict key order does not matter)."""
+    canonical = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def content_item_key(item: Dict[str, Any]) -> str:
+    """
+    Identity of one PlatformContentData item. Engagement counts change every time a post is re-crawled,
+    so the post is identified by its URL, or by title + publish date when no URL is present.
+    """
+    if item.get("content_url"):
+        return fingerprint(["url", item["content_url"]])
+    return fingerprint(["title", item.get("content_title"), item.get("publish_date")])
+
+
+def change_ratio(old_keys: Iterable[str], new_keys: Iterable[str]) -> float:
+    """Share of posts added or removed between two content lists (0.0 = same posts, 1.0 = nothing in common)."""
+    old_set, new_set = set(old_keys), set(new_keys)
+    union = old_set | new_set
+    if not union:
+        return 0.0
+    return len(old_set ^ new_set) / len(union)
+
+
+def _normalized_text(value: Any) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+# Product fields that feed product_metadata_Prompt's tags; price, rating, stock etc. change without affecting them
+PRODUCT_CONTENT_FIELDS = ("product_title", "features", "description")
+
+
+def product_content_fingerprint(product_info: Dict[str, Any]) -> str:
+    return fingerprint({field: _normalized_text(product_info.get(field)) for field in PRODUCT_CONTENT_FIELDS})
+
+
+def product_key(product_info: Dict[str, Any]) -> str:
+    """Store key of a product: its ASIN, or a hash of the normalized content fields (plus brand) when there is none."""
+    asin = _normalized_text(product_info.get("asin")).upper()
+    if asin:
+        return f"asin:{asin}"
+    return "hash:" + fingerprint([product_content_fingerprint(product_info), _normalized_text(product_info.get("brand_name"))])
+
+
+def artifact_id(kind: str, *parts: str) -> str:
+    """Id of a stored artifact in the dependency graph, e.g. artifact_id("profile", "inf_1") -> 'profile:["inf_1"]'."""
+    return kind + ":" + json.dumps(list(parts), ensure_ascii=False, separators=(",", ":"))
+
+
+class AnalysisStore:
+    """
+    Local SQLite store of analysis results that are expensive to regenerate:
+      - platform_analyses: PlatformAnalysisResult per (influencerId, platform), tagged with the
+        fingerprint and post keys of the content list that produced it.
+      - influencer_profiles: InfluencerProfile per influencerId, tagged with the fingerprint of the
+        platform analyses it was synthesized from, and versioned (version is bumped whenever the profile changes).
+      - profile_pools: named lists of influencerIds, so clients can refer to a saved candidate pool by name.
+      - match_results: MatchResult per (product, influencerId), tagged with the fingerprint of the profile it scored;
+        a changed profile invalidates only its own pairs, changed product tags give a new product fingerprint.
+      - product_tags: ProductTags per product (see product_key), tagged with the content fingerprint of the
+        title / features / description they were generated from.
+      - artifacts: other derived artifacts (generated emails), tagged with the fingerprint of their inputs.
+      - artifact_deps: which artifact was derived from which (see artifact_id), e.g.
+        product -> match -> email, platform -> profile -> match -> email. invalidate() follows these edges so an
+        upstream change marks exactly its downstream artifacts stale; the next run recomputes only those.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS platform_analyses ("
+                " influencer_id TEXT NOT NULL, platform TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+                " item_keys TEXT NOT NULL, result TEXT NOT NULL, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (influencer_id, platform))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_platform_analyses_updated_at ON platform_analyses(updated_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS influencer_profiles ("
+                " influencer_id TEXT PRIMARY KEY, influencer_name TEXT, source_fingerprint TEXT NOT NULL,"
+                " profile TEXT NOT NULL, updated_at REAL NOT NULL, version INTEGER NOT NULL DEFAULT 1)"
+            )
+            # Stores created before profiles were versioned
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(influencer_profiles)")}
+            if "version" not in columns:
+                self._conn.execute("ALTER TABLE influencer_profiles ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_tags ("
+                " product_key TEXT PRIMARY KEY, content_fingerprint TEXT NOT NULL, tags TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS match_results ("
+                " product_fingerprint TEXT NOT NULL, influencer_id TEXT NOT NULL, profile_fingerprint TEXT NOT NULL,"
+                " result TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (product_fingerprint, influencer_id))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " artifact_id TEXT PRIMARY KEY, input_fingerprint TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifact_deps ("
+                " artifact_id TEXT NOT NULL, depends_on TEXT NOT NULL, PRIMARY KEY (artifact_id, depends_on))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_artifact_deps_depends_on ON artifact_deps(depends_on)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profile_pools ("
+                " name TEXT PRIMARY KEY, influencer_ids TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "AnalysisStore":
+        return cls(os.getenv("ANALYSIS_STORE_PATH", os.path.join(BASE_DIR, "cache", "analysis_store.sqlite3")))
+
+    # --- Platform analyses ---
+    def get_platform_analysis(self, influencer_id: str, platform: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, item_keys, result, updated_at FROM platform_analyses WHERE influencer_id = ? AND platform = ?",
+                (influencer_id, platform),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "item_keys": json.loads(row[1]), "result": json.loads(row[2]), "updated_at": row[3]}
+
+    def put_platform_analysis(self, influencer_id: str, platform: str, content_list: List[Dict[str, Any]], result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO platform_analyses (influencer_id, platform, fingerprint, item_keys, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (influencer_id, platform, fingerprint(content_list),
+                 json.dumps([content_item_key(item) for item in content_list]),
+                 json.dumps(result, ensure_ascii=False, default=str), time.time()),
+            )
+            self._conn.commit()
+
+    def iter_platform_analyses(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """(influencerId, platform, PlatformAnalysisResult dict) for every stored analysis."""
+        with self._lock:
+            rows = self._conn.execute("SELECT influencer_id, platform, result FROM platform_analyses").fetchall()
+        return [(influencer_id, platform, json.loads(result)) for influencer_id, platform, result in rows]
+
+    def platform_analyses_since(self, updated_since: float) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """(influencerId, platform, PlatformAnalysisResult dict, updated_at) for analyses stored at or after updated_since."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT influencer_id, platform, result, updated_at FROM platform_analyses WHERE updated_at >= ? ORDER BY updated_at",
+                (updated_since,),
+            ).fetchall()
+        return [(influencer_id, platform, json.loads(result), updated_at) for influencer_id, platform, result, updated_at in rows]
+
+    # --- Influencer profiles ---
+    @staticmethod
+    def _profile_row(row) -> Dict[str, Any]:
+        return {"influencerName": row[0], "source_fingerprint": row[1], "profile": json.loads(row[2]),
+                "updated_at": row[3], "version": row[4]}
+
+    def get_profile(self, influencer_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT influencer_name, source_fingerprint, profile, updated_at, version FROM influencer_profiles WHERE influencer_id = ?",
+                (influencer_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._profile_row(row)
+
+    def get_profiles(self, influencer_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Batch lookup; ids without a stored profile are simply absent from the result."""
+        found: Dict[str, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(influencer_ids))
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(unique_ids), 500):
+                batch = unique_ids[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT influencer_id, influencer_name, source_fingerprint, profile, updated_at, version FROM influencer_profiles"
+                    f" WHERE influencer_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._profile_row(row[1:])
+        return found
+
+    def iter_profiles(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(influencerId, profile) for every stored profile."""
+        with self._lock:
+            rows = self._conn.execute("SELECT influencer_id, profile FROM influencer_profiles").fetchall()
+        return [(influencer_id, json.loads(profile)) for influencer_id, profile in rows]
+
+    def put_profile(self, influencer_id: str, influencer_name: str, source_fingerprint: str, profile: Any) -> bool:
+        """Stores the profile; returns True when its content differs from the stored one."""
+        payload = json.dumps(profile, ensure_ascii=False, default=str)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile, version FROM influencer_profiles WHERE influencer_id = ?", (influencer_id,)
+            ).fetchone()
+            changed = row is None or row[0] != payload
+            version = 1 if row is None else row[1] + changed
+            self._conn.execute(
+                "INSERT OR REPLACE INTO influencer_profiles (influencer_id, influencer_name, source_fingerprint, profile, updated_at, version)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (influencer_id, influencer_name, source_fingerprint, payload, time.time(), version),
+            )
+            self._conn.commit()
+        return changed
+
+    # --- Product tags ---
+    def get_product_tags(self, product_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Stored tags for this product, or None if there are none or the product's content has changed since."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_fingerprint, tags, updated_at FROM product_tags WHERE product_key = ?", (product_key(product_info),)
+            ).fetchone()
+        if row is None or row[0] != product_content_fingerprint(product_info):
+            return None
+        return {"tags": json.loads(row[1]), "updated_at": row[2]}
+
+    def put_product_tags(self, product_info: Dict[str, Any], tags: Any) -> bool:
+        """Stores the tags; returns True when they differ from the stored ones."""
+        payload = json.dumps(tags, ensure_ascii=False, default=str)
+        with self._lock:
+            row = self._conn.execute("SELECT tags FROM product_tags WHERE product_key = ?", (product_key(product_info),)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO product_tags (product_key, content_fingerprint, tags, updated_at) VALUES (?, ?, ?, ?)",
+                (product_key(product_info), product_content_fingerprint(product_info), payload, time.time()),
+            )
+            self._conn.commit()
+        return row is None or row[0] != payload
+
+    # --- Match results ---
+    def get_match_results(self, product_fingerprint: str, profile_fingerprints: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Stored results for the given {influencerId: profile fingerprint}; pairs whose profile changed are left out."""
+        found: Dict[str, Dict[str, Any]] = {}
+        influencer_ids = list(profile_fingerprints)
+        with self._lock:
+            for start in range(0, len(influencer_ids), 500):
+                batch = influencer_ids[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT influencer_id, profile_fingerprint, result FROM match_results"
+                    f" WHERE product_fingerprint = ? AND influencer_id IN ({','.join('?' * len(batch))})",
+                    [product_fingerprint, *batch],
+                ).fetchall()
+                for influencer_id, profile_fp, result in rows:
+                    if profile_fingerprints[influencer_id] == profile_fp:
+                        found[influencer_id] = json.loads(result)
+        return found
+
+    def put_match_results(self, product_fingerprint: str, results: List[Tuple[str, str, Any]]) -> None:
+        """results: (influencerId, profile fingerprint, MatchResult dict) tuples."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO match_results (product_fingerprint, influencer_id, profile_fingerprint, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(product_fingerprint, influencer_id, profile_fp, json.dumps(result, ensure_ascii=False, default=str), now)
+                 for influencer_id, profile_fp, result in results],
+            )
+            self._conn.commit()
+
+    # --- Artifacts & dependencies ---
+    def get_artifact(self, artifact: str, input_fingerprint: str) -> Optional[Any]:
+        """Stored value, or None when missing or derived from different inputs."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT input_fingerprint, value FROM artifacts WHERE artifact_id = ?", (artifact,)
+            ).fetchone()
+        if row is None or row[0] != input_fingerprint:
+            return None
+        return json.loads(row[1])
+
+    def put_artifact(self, artifact: str, input_fingerprint: str, value: Any, depends_on: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (artifact_id, input_fingerprint, value, updated_at) VALUES (?, ?, ?, ?)",
+                (artifact, input_fingerprint, json.dumps(value, ensure_ascii=False, default=str), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO artifact_deps (artifact_id, depends_on) VALUES (?, ?)",
+                [(artifact, parent) for parent in depends_on],
+            )
+            self._conn.commit()
+
+    def record_dependencies(self, edges: Iterable[Tuple[str, str]]) -> None:
+        """edges: (artifact, artifact it was derived from) pairs."""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO artifact_deps (artifact_id, depends_on) VALUES (?, ?)", list(edges))
+            self._conn.commit()
+
+    def _dependents(self, roots: List[str]) -> List[str]:
+        # Breadth-first over artifact_deps; caller holds the lock
+        seen, frontier, ordered = set(roots), list(roots), []
+        while frontier:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT artifact_id FROM artifact_deps WHERE depends_on IN ({','.join('?' * len(frontier))})", frontier
+            ).fetchall()
+            frontier = [row[0] for row in rows if row[0] not in seen]
+            seen.update(frontier)
+            ordered.extend(frontier)
+        return ordered
+
+    def _invalidate_one(self, artifact: str) -> None:
+        kind, _, raw_parts = artifact.partition(":")
+        parts = json.loads(raw_parts)
+        if kind == "product":
+            self._conn.execute("DELETE FROM product_tags WHERE product_key = ?", parts)
+        elif kind == "platform":
+            # Keep the last result but force the next run to re-analyze the platform
+            self._conn.execute(
+                "UPDATE platform_analyses SET fingerprint = '', item_keys = '[]' WHERE influencer_id = ? AND platform = ?", parts
+            )
+        elif kind == "profile":
+            # Keep the profile for id-based requests, but force regeneration on the next analysis
+            self._conn.execute("UPDATE influencer_profiles SET source_fingerprint = '' WHERE influencer_id = ?", parts)
+        elif kind == "match":
+            self._conn.execute("DELETE FROM match_results WHERE product_fingerprint = ? AND influencer_id = ?", parts)
+        else:
+            self._conn.execute("DELETE FROM artifacts WHERE artifact_id = ?", (artifact,))
+
+    def invalidate(self, artifacts: Iterable[str], include_self: bool = True) -> List[str]:
+        """Marks the given artifacts (optionally) and everything derived from them stale. Returns the affected ids."""
+        roots = list(dict.fromkeys(artifacts))
+        if not roots:
+            return []
+        with self._lock:
+            affected = (roots if include_self else []) + self._dependents(roots)
+            for artifact in affected:
+                self._invalidate_one(artifact)
+            self._conn.commit()
+        return affected
+
+    def platforms_of(self, influencer_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT platform FROM platform_analyses WHERE influencer_id = ?", (influencer_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    # --- Profile pools ---
+    def save_pool(self, name: str, influencer_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profile_pools (name, influencer_ids, updated_at) VALUES (?, ?, ?)",
+                (name, json.dumps(list(dict.fromkeys(influencer_ids))), time.time()),
+            )
+            self._conn.commit()
+
+    def get_pool(self, name: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT influencer_ids FROM profile_pools WHERE name = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def list_pools(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, influencer_ids, updated_at FROM profile_pools ORDER BY name").fetchall()
+        return {name: {"size": len(json.loads(ids)), "updated_at": updated_at} for name, ids, updated_at in rows}
+
+    def delete_pool(self, name: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM profile_pools WHERE name = ?", (name,)).rowcount
+            self._conn.commit()
+        return deleted > 0
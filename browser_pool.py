@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import psutil # Optional: enables the RSS recycling threshold
+except ImportError:
+    psutil = None
+
+
+class BrowserSession:
+    """One launched browser (a Selenium WebDriver) and its usage counters."""
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+        self.broken = False # Set by the lessee when the browser misbehaved; it is replaced on release
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the driver process and its children (the browser), if psutil is available."""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def is_healthy(self) -> bool:
+        try:
+            self.driver.current_url # Cheap round trip to the driver
+            return True
+        except Exception:
+            return False
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of pre-launched browsers shared by crawl jobs.
+      - lease() hands out an idle, health-checked browser (launching one while below `size`) and takes it back
+        afterwards; callers block while all browsers are leased.
+      - A browser is recycled (quit and relaunched in the background) after `max_pages` pages or when its
+        process tree exceeds `max_rss_mb` (needs psutil), and replaced when it fails its health check or the
+        lessee marks it broken.
+    `factory` launches one browser and returns its WebDriver.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 2, max_pages: int = 50, max_rss_mb: float = 1500,
+                 lease_timeout: float = 300, logger: Optional[logging.Logger] = None):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.lease_timeout = lease_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        self._idle: List[BrowserSession] = []
+        self._slots = 0 # Sessions alive, leased or being launched; never more than size
+        self._closed = False
+        self._stats = {"launched": 0, "launch_failures": 0, "recycled": 0, "replaced": 0, "leases": 0}
+
+    @classmethod
+    def from_env(cls, factory: Callable[[], Any], logger: Optional[logging.Logger] = None, size: Optional[int] = None) -> "BrowserPool":
+        return cls(
+            factory,
+            size=size if size is not None else int(os.getenv("CRAWL_BROWSER_POOL_SIZE", "2")),
+            max_pages=int(os.getenv("CRAWL_BROWSER_MAX_PAGES", "50")),
+            max_rss_mb=float(os.getenv("CRAWL_BROWSER_MAX_RSS_MB", "1500")),
+            lease_timeout=float(os.getenv("CRAWL_BROWSER_LEASE_TIMEOUT", "300")),
+            logger=logger,
+        )
+
+    def _launch(self) -> BrowserSession:
+        started = time.time()
+        driver = self.factory()
+        with self._cond:
+            self._stats["launched"] += 1
+        self.logger.info(f"Browser pool: launched a browser in {time.time() - started:.1f}s.")
+        return BrowserSession(driver)
+
+    def _replenish(self) -> None:
+        # Fills one reserved slot with a fresh browser; the slot is released again if the launch fails
+        try:
+            session = self._launch()
+        except Exception as e:
+            self.logger.error(f"Browser pool: failed to launch a replacement browser: {e}")
+            with self._cond:
+                self._stats["launch_failures"] += 1
+                self._slots -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            if self._closed:
+                self._slots -= 1
+                session.quit()
+                return
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _replace_in_background(self) -> None:
+        threading.Thread(target=self._replenish, name="browser-pool-launch", daemon=True).start()
+
+    def warm(self) -> None:
+        """Launches browsers in the background until the pool is full, so the first jobs skip the cold start."""
+        with self._cond:
+            missing = self.size - self._slots
+            self._slots += missing
+        for _ in range(missing):
+            self._replace_in_background()
+
+    def _acquire(self) -> BrowserSession:
+        deadline = time.time() + self.lease_timeout
+        while True:
+            launch = False
+            with self._cond:
+                while not self._idle and self._slots >= self.size:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed.")
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No browser became available within {self.lease_timeout:.0f}s.")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Browser pool is closed.")
+                if self._idle:
+                    session = self._idle.pop() # Most recently used first
+                else:
+                    self._slots += 1
+                    launch = True
+            if launch:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self._cond:
+                        self._stats["launch_failures"] += 1
+                        self._slots -= 1
+                        self._cond.notify()
+                    raise
+            if session.is_healthy():
+                return session
+            # Crashed while idle: drop it and launch a replacement in this slot
+            self.logger.warning("Browser pool: idle browser failed its health check; replacing it.")
+            session.quit()
+            with self._cond:
+                self._stats["replaced"] += 1
+            try:
+                return self._launch()
+            except Exception:
+                with self._cond:
+                    self._stats["launch_failures"] += 1
+                    self._slots -= 1
+                    self._cond.notify()
+                raise
+
+    def _release(self, session: BrowserSession) -> None:
+        session.pages += 1
+        reason = None
+        if session.broken:
+            reason = "marked broken"
+        elif self.max_pages and session.pages >= self.max_pages:
+            reason = f"served {session.pages} pages"
+        else:
+            rss = session.rss_mb() if self.max_rss_mb else None
+            if rss is not None and rss > self.max_rss_mb:
+                reason = f"RSS {rss:.0f} MB > {self.max_rss_mb:.0f} MB"
+
+        if reason is None:
+            with self._cond:
+                if not self._closed:
+                    self._idle.append(session)
+                    self._cond.notify()
+                    return
+                self._slots -= 1
+            session.quit()
+            return
+
+        self.logger.info(f"Browser pool: recycling browser ({reason}).")
+        session.quit()
+        with self._cond:
+            self._stats["replaced" if session.broken else "recycled"] += 1
+            if self._closed:
+                self._slots -= 1
+                return
+        self._replace_in_background() # Keeps the slot reserved for the replacement
+
+    @contextmanager
+    def lease(self) -> Iterator[BrowserSession]:
+        """`with pool.lease() as session: session.driver.get(url)`; an exception marks the browser broken."""
+        session = self._acquire()
+        with self._cond:
+            self._stats["leases"] += 1
+        try:
+            yield session
+        except Exception:
+            session.broken = True
+            raise
+        finally:
+            self._release(session)
+
+    def close(self) -> None:
+        """Quits idle browsers; leased ones are quit when returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._slots -= len(idle)
+            self._cond.notify_all()
+        for session in idle:
+            session.quit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "alive": self._slots,
+                "idle": len(self._idle),
+                "leased": self._slots - len(self._idle),
+                "max_pages": self.max_pages,
+                "max_rss_mb": self.max_rss_mb if psutil is not None else None,
+                **self._stats,
+            }
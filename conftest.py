@@ -0,0 +1,122 @@
+# conftest.py
+# Shared test setup. graph_nodes builds its LLM clients and stores at import time, so the environment is set here,
+# before any test module imports it: dummy Azure settings (no request ever reaches Azure, see fake_llm) and
+# throwaway store paths, so tests never touch the real cache directory.
+import os
+import json
+import tempfile
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+_TEST_STORE_DIR = tempfile.mkdtemp(prefix="crossborder-tests-")
+os.environ.update({
+    "AZURE_API_KEY": "test-key",
+    "AZURE_API_VERSION": "2024-06-01",
+    "AZURE_API_BASE": "https://example.openai.azure.com",
+    "AZURE_COMPLETION_DEPLOYMENT": "gpt-test",
+    "AZURE_SCORING_DEPLOYMENT": "",
+    "LLM_CACHE_ENABLED": "0",
+    "LLM_CACHE_PATH": os.path.join(_TEST_STORE_DIR, "llm_cache.sqlite3"),
+    "ANALYSIS_STORE_PATH": os.path.join(_TEST_STORE_DIR, "analysis_store.sqlite3"),
+    "VECTOR_INDEX_DIR": os.path.join(_TEST_STORE_DIR, "vector_index"),
+    "TAG_VOCAB_PATH": os.path.join(_TEST_STORE_DIR, "tag_vocab.sqlite3"),
+    "WORKFLOW_CHECKPOINT_PATH": os.path.join(_TEST_STORE_DIR, "workflow_checkpoints.sqlite3"),
+    "CRAWL_BROWSER_POOL_SIZE": "0", # The API lifespan must not launch Chrome
+})
+
+PRODUCT_INFO = {"asin": "B0TEST0001", "product_title": "Ultralight camping stove", "features": "fits in a pocket", "description": "for hikers"}
+
+# Canned parsed outputs per chain name (see graph_nodes); inputs are the prompt variables of that chain
+PRODUCT_TAGS = {"FeatureTags": ["camping gear", "ultralight"], "AudienceTags": ["hikers"], "UsageScenarioTags": ["hiking"]}
+
+
+def _platform_analysis(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "audienceGender": "female", "audienceAge": "18-24", "regionCountry": "US", "language": "English",
+        "contentFormat": ["short video"], "recentContentSummary": f"{inputs['influencerName']} on {inputs['platform']}",
+        "videoStyle": "vlog", "contentTone": "casual", "categoryDepth": "outdoor", "promotionAbility": "high",
+        "brandRepetitionRate": "low", "contentScene": ["mountains"], "platform": inputs["platform"],
+    }
+
+
+def _profile(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "coreContentDirection": ["hiking", "camping gear"], "overallPersonaAndStyle": "outdoorsy",
+        "mainAudience": "hikers", "commercialDegree": "medium", "crossPlatformConsist": "high",
+        "potentialBrandType": ["outdoor equipment"], "influencerEval": f"profile of {inputs['influencerName']}",
+        "goodsCarryRating": "B",
+    }
+
+
+class FakeLLM:
+    """
+    Stands in for the LLM behind every graph_nodes chain: answers with canned parsed outputs and records the
+    inputs of each call per chain. Set `scores` ({influencerId: "88%"}) to steer matching, or `failures`
+    ({chain name: inputs -> exception or None}) to make calls of a chain raise.
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.scores: Dict[str, str] = {}
+        self.failures: Dict[str, Callable[[Dict[str, Any]], Optional[BaseException]]] = {}
+
+    def answer(self, chain_name: str, inputs: Dict[str, Any]) -> Any:
+        self.calls[chain_name].append(inputs)
+        error = self.failures[chain_name](inputs) if chain_name in self.failures else None
+        if error is not None:
+            raise error
+        if chain_name == "product_metadata":
+            return dict(PRODUCT_TAGS)
+        if chain_name == "social_media_analyst":
+            return _platform_analysis(inputs)
+        if chain_name == "influencer_analysis":
+            return _profile(inputs)
+        if chain_name in ("influencer_score", "influencer_match"):
+            return [
+                {"influencerId": inf["influencerId"], "influencerName": inf["influencerName"],
+                 "match_score": self.scores.get(inf["influencerId"], "90%"), "match_rationale": "fits" if chain_name == "influencer_match" else ""}
+                for inf in json.loads(inputs["influencers_to_match"])
+            ]
+        if chain_name == "influencer_rationale":
+            return [{"influencerId": inf["influencerId"], "match_rationale": "fits"} for inf in json.loads(inputs["influencers_to_explain"])]
+        if chain_name == "collab_email":
+            influencer = json.loads(inputs["influencer_profile"])
+            return {"email_subject": f"Hi {influencer['influencerName']}", "email_body": "Let's work together."}
+        raise AssertionError(f"Unexpected chain {chain_name}")
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """Replaces every graph_nodes chain's LLM with a FakeLLM and gives the run empty, per-test stores."""
+    from langchain_core.runnables import RunnableLambda
+
+    import graph_nodes
+    from analysis_store import AnalysisStore
+    from facet_index import FacetIndex
+    from tag_vocab import TagVocabulary
+    from vector_index import ProfileVectorIndex
+
+    fake = FakeLLM()
+    for chain in (graph_nodes.product_metadata_chain, graph_nodes.platform_analysis_chain, graph_nodes.influencer_profile_chain,
+                  graph_nodes.influencer_match_chain, graph_nodes.influencer_score_chain, graph_nodes.influencer_rationale_chain,
+                  graph_nodes.collab_email_chain, graph_nodes.email_intent_chain):
+        async def _answer(inputs, chain_name=chain.name):
+            return fake.answer(chain_name, inputs)
+        monkeypatch.setattr(chain, "runnable", RunnableLambda(_answer))
+
+    monkeypatch.setattr(graph_nodes, "analysis_store", AnalysisStore(str(tmp_path / "analysis_store.sqlite3")))
+    monkeypatch.setattr(graph_nodes, "profile_index", ProfileVectorIndex(str(tmp_path / "vector_index"), dim=64))
+    monkeypatch.setattr(graph_nodes, "facet_index", FacetIndex())
+    monkeypatch.setattr(graph_nodes, "tag_vocab", TagVocabulary(str(tmp_path / "tag_vocab.sqlite3")))
+    return fake
+
+
+def influencer_data(*influencer_ids: str) -> List[Dict[str, Any]]:
+    """MarketingWorkFlowState.influencer_data with one TikTok post per influencer."""
+    return [
+        {"influencerId": inf_id, "influencerName": f"Name {inf_id}",
+         "platforms": {"tiktok": [{"content_title": f"{inf_id} hikes", "content_url": f"https://tiktok.example/{inf_id}/1"}]}}
+        for inf_id in influencer_ids
+    ]
@@ -0,0 +1,93 @@
+import os
+import queue
+import itertools
+import threading
+import traceback
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised by CrawlQueue.submit when max_queued jobs are already waiting."""
+
+
+class CrawlQueue:
+    """
+    Dedicated crawl executor: `workers` threads take jobs from a priority queue (lower priority value first,
+    FIFO within a priority). Crawls never run on the web server's shared threadpool, so a burst of submissions
+    only grows the queue (up to max_queued) instead of launching a browser per request.
+    handler(job_id, *args) runs one job and is responsible for recording its result.
+    """
+
+    def __init__(self, handler: Callable[..., Any], workers: int = 2, max_queued: int = 1000,
+                 logger: Optional[logging.Logger] = None):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.logger = logger or logging.getLogger(__name__)
+        self._queue: "queue.PriorityQueue[Tuple[int, int, str, tuple]]" = queue.PriorityQueue()
+        self._entries: Dict[str, Tuple[int, int, str, tuple]] = {} # job_id -> queued entry, until a worker takes it
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+
+    @classmethod
+    def from_env(cls, handler: Callable[..., Any], default_workers: int = 2, logger: Optional[logging.Logger] = None) -> "CrawlQueue":
+        return cls(
+            handler,
+            workers=int(os.getenv("CRAWL_WORKERS", str(default_workers))),
+            max_queued=int(os.getenv("CRAWL_MAX_QUEUED", "1000")),
+            logger=logger,
+        )
+
+    def _start(self) -> None:
+        # Workers are started on the first submission; caller holds the lock
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"crawl-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, *args: Any, priority: int = 0) -> int:
+        """Queues a job and returns its 1-based queue position. Raises QueueFullError when the queue is full."""
+        with self._lock:
+            if self.max_queued and len(self._entries) >= self.max_queued:
+                raise QueueFullError(f"Crawl queue is full ({len(self._entries)} jobs waiting).")
+            entry = (priority, next(self._seq), job_id, args)
+            self._entries[job_id] = entry
+            self._queue.put(entry)
+            self._start()
+        return self.position(job_id) or 1
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among waiting jobs, or None once a worker has taken the job."""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                return None
+            return 1 + sum(1 for other in self._entries.values() if other[:2] < entry[:2])
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "running": self._running, "queued": len(self._entries), "max_queued": self.max_queued}
+
+    def _work(self) -> None:
+        while True:
+            entry = self._queue.get()
+            _, _, job_id, args = entry
+            with self._lock:
+                self._entries.pop(job_id, None)
+                self._running += 1
+            try:
+                self.handler(job_id, *args)
+            except Exception as e: # The handler records its own failures; this only keeps the worker alive
+                self.logger.error(f"Crawl worker: unhandled error in job {job_id}: {e}\n{traceback.format_exc()}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import signal
+import sqlite3
+import threading
+import traceback
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from crawl_queue import QueueFullError
+
+# Process-isolated crawler service. The API only writes jobs to a shared SQLite job store; a separate daemon
+# (`python crawl_service.py`) supervises crawler worker processes that claim and run them. Chrome and ChromeDriver
+# therefore never run inside the API process, and a hung or bloated browser can be killed without touching it.
+
+# Determine the base directory of this Python script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class CrawlJobStore:
+    """
+    SQLite crawl job table shared by the API (submit / status) and the crawler processes (claim / finish).
+    Jobs are claimed in (priority, submission) order inside an IMMEDIATE transaction, so each job runs once.
+    """
+
+    def __init__(self, path: str, max_queued: int = 1000):
+        self.path = path
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Autocommit mode: claim() manages its own transaction
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawl_jobs ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL UNIQUE, product_url TEXT NOT NULL,"
+                " platform TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, message TEXT,"
+                " result TEXT, submitted_at REAL NOT NULL, updated_at REAL NOT NULL, started_at REAL, worker_pid INTEGER)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_jobs_queue ON crawl_jobs(status, priority, seq)")
+
+    @classmethod
+    def from_env(cls) -> "CrawlJobStore":
+        return cls(
+            path=os.getenv("CRAWL_SERVICE_DB", os.path.join(BASE_DIR, "cache", "crawl_jobs.sqlite3")),
+            max_queued=int(os.getenv("CRAWL_MAX_QUEUED", "1000")),
+        )
+
+    # --- API side ---
+    def submit(self, job_id: str, product_url: str, platform: str, priority: int = 0) -> int:
+        """Queues a job and returns its 1-based queue position. Raises QueueFullError when the queue is full."""
+        now = time.time()
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM crawl_jobs WHERE status = 'queued'").fetchone()[0]
+            if self.max_queued and queued >= self.max_queued:
+                raise QueueFullError(f"Crawl queue is full ({queued} jobs waiting).")
+            self._conn.execute(
+                "INSERT INTO crawl_jobs (job_id, product_url, platform, priority, status, message, submitted_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'queued', 'Task queued for crawling.', ?, ?)",
+                (job_id, product_url, platform, priority, now, now),
+            )
+        return self.position(job_id) or 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, product_url, platform, submitted_at, updated_at, result, message FROM crawl_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": row[0], "product_url": row[1], "platform": row[2], "submitted_at": row[3],
+            "updated_at": row[4], "result": json.loads(row[5]) if row[5] else None, "message": row[6],
+        }
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs, or None once the job was claimed."""
+        with self._lock:
+            row = self._conn.execute("SELECT priority, seq FROM crawl_jobs WHERE job_id = ? AND status = 'queued'", (job_id,)).fetchone()
+            if row is None:
+                return None
+            ahead = self._conn.execute(
+                "SELECT COUNT(*) FROM crawl_jobs WHERE status = 'queued' AND (priority < ? OR (priority = ? AND seq < ?))",
+                (row[0], row[0], row[1]),
+            ).fetchone()[0]
+        return ahead + 1
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM crawl_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM crawl_jobs GROUP BY status").fetchall())
+        return {"path": self.path, "max_queued": self.max_queued, **counts}
+
+    # --- Crawler side ---
+    def claim(self, worker_pid: int) -> Optional[Dict[str, Any]]:
+        """Marks the next queued job as running on worker_pid and returns it, or None when the queue is empty."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE") # Serializes claims across processes
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id, product_url, platform FROM crawl_jobs WHERE status = 'queued' ORDER BY priority, seq LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE crawl_jobs SET status = 'running', worker_pid = ?, started_at = ?, updated_at = ? WHERE job_id = ?",
+                        (worker_pid, now, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"job_id": row[0], "product_url": row[1], "platform": row[2]}
+
+    def finish(self, job_id: str, status: str, result: Any = None, message: Optional[str] = None) -> None:
+        """Records the outcome of a running job; no-op if it already finished (e.g. was timed out meanwhile)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE crawl_jobs SET status = ?, result = ?, message = ?, updated_at = ? WHERE job_id = ? AND status = 'running'",
+                (status, json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 message, time.time(), job_id),
+            )
+
+    def running_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, product_url, platform, worker_pid, started_at FROM crawl_jobs WHERE status = 'running'"
+            ).fetchall()
+        return [{"job_id": r[0], "product_url": r[1], "platform": r[2], "worker_pid": r[3], "started_at": r[4]} for r in rows]
+
+    def fail_running(self, message: str, worker_pid: Optional[int] = None) -> int:
+        """Fails jobs still marked running (on one worker, or all of them). Returns how many were failed."""
+        query = "UPDATE crawl_jobs SET status = 'failed', message = ?, updated_at = ? WHERE status = 'running'"
+        params: List[Any] = [message, time.time()]
+        if worker_pid is not None:
+            query += " AND worker_pid = ?"
+            params.append(worker_pid)
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+
+def _crawl_worker(store_path: str, max_jobs: int, poll_seconds: float) -> None:
+    """Worker process: claims and crawls up to max_jobs jobs with one warm browser, then exits to be replaced."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp() # Own process group, so the supervisor can kill this worker together with its Chrome processes
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C goes to the supervisor, which stops the workers
+
+    from browser_pool import BrowserPool
+    from product_crawl import AmazonCrawler, _launch_browser, crawler_logger
+
+    store = CrawlJobStore(store_path)
+    browser_pool = BrowserPool.from_env(_launch_browser, logger=crawler_logger, size=1)
+    parent_pid = os.getppid()
+    pid = os.getpid()
+    completed = 0
+    try:
+        while completed < max_jobs:
+            if os.getppid() != parent_pid: # Supervisor is gone
+                break
+            job = store.claim(pid)
+            if job is None:
+                time.sleep(poll_seconds)
+                continue
+            crawler_logger.info(f"Crawl worker {pid}: job {job['job_id']} started ({job['product_url']}).")
+            try:
+                product_data = AmazonCrawler(logger_instance=crawler_logger, browser_pool=browser_pool).crawl_one_product(
+                    job["product_url"], job["platform"]
+                )
+                if product_data and not product_data.get("error"):
+                    store.finish(job["job_id"], "completed", product_data)
+                else:
+                    error_message = product_data.get("error", "Unknown error: No data returned from crawler.") if product_data else "Unknown error: No data returned from crawler."
+                    store.finish(job["job_id"], "failed", product_data or {"error": error_message}, error_message)
+            except Exception as e:
+                crawler_logger.error(f"Crawl worker {pid}: job {job['job_id']} failed: {e}\n{traceback.format_exc()}")
+                store.finish(job["job_id"], "failed", {"error": f"Crawler task failed: {str(e)}"}, f"Internal server error: {str(e)}")
+            completed += 1
+    finally:
+        browser_pool.close()
+    crawler_logger.info(f"Crawl worker {pid}: recycling after {completed} jobs.")
+
+
+class CrawlSupervisor:
+    """
+    Keeps `workers` crawler processes alive. Each worker exits after max_jobs_per_worker jobs and is replaced.
+    A job running longer than job_timeout seconds gets its worker's whole process group killed (ChromeDriver and
+    Chrome included) and is marked failed. A worker that dies mid-job fails that job instead of leaving it running.
+    """
+
+    def __init__(self, store_path: str, workers: int = 2, job_timeout: float = 180, max_jobs_per_worker: int = 50,
+                 poll_seconds: float = 0.5):
+        self.store_path = store_path
+        self.workers = max(1, workers)
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker)
+        self.poll_seconds = poll_seconds
+        self.store = CrawlJobStore(store_path)
+        self._context = multiprocessing.get_context("spawn") # No inherited locks or connections from the supervisor
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * self.workers
+        self._stopping = False
+
+    @classmethod
+    def from_env(cls) -> "CrawlSupervisor":
+        return cls(
+            store_path=os.getenv("CRAWL_SERVICE_DB", os.path.join(BASE_DIR, "cache", "crawl_jobs.sqlite3")),
+            workers=int(os.getenv("CRAWL_SERVICE_WORKERS", "2")),
+            job_timeout=float(os.getenv("CRAWL_JOB_TIMEOUT_SECONDS", "180")),
+            max_jobs_per_worker=int(os.getenv("CRAWL_WORKER_MAX_JOBS", "50")),
+            poll_seconds=float(os.getenv("CRAWL_SERVICE_POLL_SECONDS", "0.5")),
+        )
+
+    def _start_worker(self, slot: int) -> None:
+        process = self._context.Process(
+            target=_crawl_worker, args=(self.store_path, self.max_jobs_per_worker, self.poll_seconds),
+            name=f"crawl-worker-{slot}", daemon=False,
+        )
+        process.start()
+        self._processes[slot] = process
+        print(f"Crawl service: started worker {process.pid} in slot {slot}.")
+
+    def _kill(self, process: multiprocessing.process.BaseProcess) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL) # Worker, ChromeDriver and Chrome share the process group
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError): # Group not created yet: kill the worker itself
+            process.kill()
+        process.join(5)
+
+    def _check_timeouts(self) -> None:
+        now = time.time()
+        by_pid = {p.pid: p for p in self._processes if p is not None}
+        for job in self.store.running_jobs():
+            if job["started_at"] is None or now - job["started_at"] <= self.job_timeout:
+                continue
+            message = f"Crawl timed out after {self.job_timeout:.0f}s; worker {job['worker_pid']} was killed."
+            print(f"Crawl service: job {job['job_id']} {message}")
+            self.store.finish(job["job_id"], "failed", {"error": message, "product_url": job["product_url"], "platform": job["platform"]}, message)
+            process = by_pid.get(job["worker_pid"])
+            if process is not None and process.is_alive():
+                self._kill(process)
+
+    def _check_workers(self) -> None:
+        for slot, process in enumerate(self._processes):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                process.join()
+                failed = self.store.fail_running(f"Crawler worker {process.pid} exited (code {process.exitcode}) during the job.", process.pid)
+                if failed:
+                    print(f"Crawl service: worker {process.pid} died with {failed} running job(s).")
+            if not self._stopping:
+                self._start_worker(slot)
+
+    def run(self) -> None:
+        """Supervises the workers until SIGINT / SIGTERM."""
+        orphaned = self.store.fail_running("Crawler service restarted while the job was running.")
+        if orphaned:
+            print(f"Crawl service: failed {orphaned} job(s) left running by a previous instance.")
+
+        def _stop(signum, frame):
+            self._stopping = True
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+
+        print(f"Crawl service: {self.workers} workers, job timeout {self.job_timeout:.0f}s, "
+              f"recycle after {self.max_jobs_per_worker} jobs, store {self.store_path}.")
+        while not self._stopping:
+            self._check_workers()
+            self._check_timeouts()
+            time.sleep(self.poll_seconds)
+
+        print("Crawl service: stopping workers...")
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                self._kill(process)
+        self.store.fail_running("Crawler service stopped while the job was running.")
+
+
+if __name__ == "__main__":
+    CrawlSupervisor.from_env().run()
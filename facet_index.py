@@ -0,0 +1,140 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from relevance import tokenize
+
+# Structured PlatformAnalysisResult attributes that can be filtered on
+FACET_FIELDS = ("language", "regionCountry", "audienceGender", "audienceAge", "categoryDepth", "contentFormat", "platform")
+# sync() re-reads analyses stored this many seconds before the last one it saw, so a write that committed late
+# (another process stamped it earlier than a row already synced) is not missed; re-indexing is idempotent.
+SYNC_OVERLAP_SECONDS = 5.0
+
+
+def _value_tokens(value: str) -> List[str]:
+    # "18-24岁女性" -> ["18", "24", "岁女", "女性"]; the same tokenizer is applied to stored values and queries
+    return list(dict.fromkeys(tokenize(str(value))))
+
+
+class FacetIndex:
+    """
+    In-memory inverted index over the facets of every stored PlatformAnalysisResult.
+    A document is one (influencerId, platform) analysis; terms are (facet, token) pairs interned to ints,
+    and each term's postings list is a Python int used as a bitset over document ids.
+
+    Query semantics: facets are ANDed, values within a facet are ORed, tokens within a value are ANDed.
+    Each token of a bare term (no facet given) may match any facet, so "female 18-24" spans gender and age.
+    Matching documents are collapsed to influencerIds.
+
+    The index lives in process memory; the analysis store is the source of truth. sync() indexes whatever was
+    stored since the last sync (by any process), so call it before searching when several workers share a store.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._term_ids: Dict[Tuple[str, str], int] = {}
+        self._postings: List[int] = []
+        self._doc_ids: Dict[Tuple[str, str], int] = {}
+        self._docs: List[Tuple[str, str]] = [] # doc id -> (influencerId, platform)
+        self._doc_terms: List[List[int]] = [] # doc id -> term ids, to clear bits on update
+        self._synced_until: Optional[float] = None # updated_at of the newest stored analysis indexed by sync()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _intern(self, term: Tuple[str, str]) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._postings)
+            self._postings.append(0)
+        return term_id
+
+    def add(self, influencer_id: str, platform: str, analysis: Dict[str, Any]) -> None:
+        """Indexes (or re-indexes) one platform analysis."""
+        key = (influencer_id, platform)
+        with self._lock:
+            doc_id = self._doc_ids.get(key)
+            if doc_id is None:
+                doc_id = self._doc_ids[key] = len(self._docs)
+                self._docs.append(key)
+                self._doc_terms.append([])
+            bit = 1 << doc_id
+            for term_id in self._doc_terms[doc_id]:
+                self._postings[term_id] &= ~bit
+
+            term_ids = []
+            facets = dict(analysis)
+            facets.setdefault("platform", platform)
+            for field in FACET_FIELDS:
+                values = facets.get(field)
+                for value in (values if isinstance(values, list) else [values]):
+                    if not value:
+                        continue
+                    for tok in _value_tokens(value):
+                        term_id = self._intern((field, tok))
+                        self._postings[term_id] |= bit
+                        term_ids.append(term_id)
+            self._doc_terms[doc_id] = term_ids
+
+    def add_many(self, items: Iterable[Tuple[str, str, Dict[str, Any]]]) -> None:
+        for influencer_id, platform, analysis in items:
+            self.add(influencer_id, platform, analysis)
+
+    def sync(self, store: Any) -> int:
+        """
+        Indexes the analyses `store` (an AnalysisStore) received since the previous sync, including those written
+        by other processes; the first call indexes everything. Returns how many analyses were (re-)indexed.
+        """
+        since = self._synced_until - SYNC_OVERLAP_SECONDS if self._synced_until is not None else float("-inf")
+        rows = store.platform_analyses_since(since)
+        for influencer_id, platform, analysis, _ in rows:
+            self.add(influencer_id, platform, analysis)
+        if rows:
+            with self._lock:
+                self._synced_until = max(rows[-1][3], self._synced_until or 0.0)
+        return len(rows)
+
+    def _match_value(self, fields: Iterable[str], value: str) -> int:
+        # Every token must be present in at least one of the given fields
+        tokens = _value_tokens(value)
+        if not tokens:
+            return 0
+        matched = -1 # all ones
+        for tok in tokens:
+            token_bits = 0
+            for field in fields:
+                term_id = self._term_ids.get((field, tok))
+                if term_id is not None:
+                    token_bits |= self._postings[term_id]
+            matched &= token_bits
+            if not matched:
+                break
+        return matched
+
+    def search(self, filters: Optional[Dict[str, List[str]]] = None, terms: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Returns {influencerId: [matching platforms]}. Unknown facet names raise ValueError."""
+        filters = {field: values for field, values in (filters or {}).items() if values}
+        unknown = set(filters) - set(FACET_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown facet(s): {', '.join(sorted(unknown))}. Available: {', '.join(FACET_FIELDS)}")
+        terms = [term for term in (terms or []) if term and term.strip()]
+
+        with self._lock:
+            result = (1 << len(self._docs)) - 1
+            for field, values in filters.items():
+                field_bits = 0
+                for value in values:
+                    field_bits |= self._match_value([field], value)
+                result &= field_bits
+            for term in terms:
+                result &= self._match_value(FACET_FIELDS, term)
+
+            matches: Dict[str, List[str]] = {}
+            while result:
+                lowest = result & -result # Visit set bits only
+                influencer_id, platform = self._docs[lowest.bit_length() - 1]
+                matches.setdefault(influencer_id, []).append(platform)
+                result ^= lowest
+        return matches
+
+    def influencer_ids(self, filters: Optional[Dict[str, List[str]]] = None, terms: Optional[List[str]] = None) -> Set[str]:
+        return set(self.search(filters, terms))
@@ -1,22 +1,37 @@
 import json 
 import os
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any, Tuple, AsyncIterator
 import traceback
+from datetime import datetime, timedelta, timezone
 
-from langchain_core.prompts import ChatPromptTemplate
+import openai
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END, START
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver # langgraph-checkpoint-sqlite: durable workflow checkpoints
 from langchain_openai import AzureChatOpenAI
 
 
+from llm_cache import LLMResponseCache, CachedChain
+from analysis_store import (AnalysisStore, fingerprint, content_item_key, change_ratio, product_key, product_content_fingerprint,
+                            artifact_id)
+from relevance import (prefilter_scores, shortlist, tag_list, tag_overlap_scores,
+    PRODUCT_TAG_LIST_FIELDS, PROFILE_TAG_LIST_FIELDS)
+from tag_vocab import TagVocabulary
+from vector_index import ProfileVectorIndex
+from facet_index import FacetIndex
 from graph_state import ( BaseModel, ProductAnalysisState,
     MarketingWorkFlowState, IntentAnalysisState, EmailGenerationState,
     PlatformAnalysisResult, InfluencerProfile, ProductTags, MatchResult, GeneratedEmail
 )
 from prompts import (
     social_media_analyst_Prompt, product_metadata_Prompt, influencer_analysis_Prompt,
-    influencer_match_Prompt, collab_email_Prompt, email_intent_Prompt
+    influencer_match_Prompt, influencer_score_Prompt, influencer_rationale_Prompt,
+    collab_email_Prompt, email_intent_Prompt
 )
 
 load_dotenv()
@@ -35,17 +50,199 @@ llm = AzureChatOpenAI(
     azure_endpoint=azure_endpoint,
     deployment_name=deployment_name
 )
+# Stage one of two-stage matching (score only) can run on a smaller/faster deployment
+scoring_deployment_name = os.getenv("AZURE_SCORING_DEPLOYMENT") or deployment_name
+scoring_llm = llm if scoring_deployment_name == deployment_name else AzureChatOpenAI(
+    api_key=api_key,
+    api_version=api_version,
+    azure_endpoint=azure_endpoint,
+    deployment_name=scoring_deployment_name
+)
 
-
-def analyze_product_node(state: ProductAnalysisState) -> dict:
-    print("LG Node: Analyzing product info...")
+# --- LLM Chains ---
+# Chains are stateless, so they are built once and shared by every node (through _ainvoke_limited).
+# Every chain sits behind the persistent LLM response cache (see llm_cache.py); a chain can be
+# excluded with LLM_CACHE_DISABLED_CHAINS, e.g. "collab_email,email_intent".
+llm_cache = LLMResponseCache.from_env()
+
+product_metadata_chain = CachedChain("product_metadata", product_metadata_Prompt, llm, JsonOutputParser(pydantic_object=ProductTags), llm_cache, deployment_name)
+# For platform analysis, the Pydantic object helps ensure the LLM returns the correct structure.
+platform_analysis_chain = CachedChain("social_media_analyst", social_media_analyst_Prompt, llm, JsonOutputParser(pydantic_object=PlatformAnalysisResult), llm_cache, deployment_name)
+influencer_profile_chain = CachedChain("influencer_analysis", influencer_analysis_Prompt, llm, JsonOutputParser(pydantic_object=InfluencerProfile), llm_cache, deployment_name)
+# The match prompt returns a list of dicts, so JsonOutputParser is fine here.
+# If you want each item in the list to be a MatchResult Pydantic object directly,
+# you'd need a custom parser or parse after the LLM call.
+influencer_match_chain = CachedChain("influencer_match", influencer_match_Prompt, llm, JsonOutputParser(), llm_cache, deployment_name) # Expects list of MatchResult-like dicts
+# Two-stage matching: score-only pass over every candidate, then rationales for the shortlist only
+influencer_score_chain = CachedChain("influencer_score", influencer_score_Prompt, scoring_llm, JsonOutputParser(), llm_cache, scoring_deployment_name)
+influencer_rationale_chain = CachedChain("influencer_rationale", influencer_rationale_Prompt, llm, JsonOutputParser(), llm_cache, deployment_name)
+collab_email_chain = CachedChain("collab_email", collab_email_Prompt, llm, JsonOutputParser(), llm_cache, deployment_name) # Expects dict output from LLM
+# If you had a Pydantic model for the output of email_intent_Prompt (e.g., EmailIntentLLMOutput):
+# email_intent_chain = CachedChain("email_intent", email_intent_Prompt, llm, JsonOutputParser(pydantic_object=EmailIntentLLMOutput), ...)
+# Then analysis_result could be typed as Optional[EmailIntentLLMOutput] in IntentAnalysisState
+email_intent_chain = CachedChain("email_intent", email_intent_Prompt, llm, JsonOutputParser(), llm_cache, deployment_name) # Returns a dict
+
+
+# --- LLM Concurrency ---
+# Upper bound on in-flight LLM calls per event loop (i.e. per uvicorn worker).
+# Every async node goes through _ainvoke_limited, so fan-out nodes share one budget and stay within the Azure quota.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    # asyncio.Semaphore is bound to the loop it is first awaited on, so keep one per running loop.
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _llm_semaphores[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return semaphore
+
+
+# Per-influencer budget for one profile synthesis call (time spent waiting for a free slot is not counted).
+PROFILE_TIMEOUT_SECONDS = float(os.getenv("PROFILE_TIMEOUT_SECONDS", "120"))
+# Matching is split into chunks of profiles whose estimated prompt + completion size fits this token budget.
+MATCH_CHUNK_TOKEN_BUDGET = int(os.getenv("MATCH_CHUNK_TOKEN_BUDGET", "12000"))
+MATCH_OUTPUT_TOKENS_PER_PROFILE = int(os.getenv("MATCH_OUTPUT_TOKENS_PER_PROFILE", "250"))
+# Lexical pre-filter: only the K best-scoring profiles at or above the floor are sent to the LLM matcher (0 = no limit).
+MATCH_PREFILTER_TOP_K = int(os.getenv("MATCH_PREFILTER_TOP_K", "50"))
+MATCH_PREFILTER_MIN_SCORE = float(os.getenv("MATCH_PREFILTER_MIN_SCORE", "0.0"))
+# "two_stage": score-only pass over all candidates, rationales only for those >= match_threshold or in the top K.
+# "single": one influencer_match_Prompt pass that writes a score and a rationale for every candidate.
+MATCH_STRATEGY = os.getenv("MATCH_STRATEGY", "two_stage")
+MATCH_SCORE_OUTPUT_TOKENS_PER_PROFILE = int(os.getenv("MATCH_SCORE_OUTPUT_TOKENS_PER_PROFILE", "40"))
+MATCH_RATIONALE_TOP_K = int(os.getenv("MATCH_RATIONALE_TOP_K", "5"))
+
+
+async def _ainvoke_limited(chain: CachedChain, input_dict: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+    # Cache hits return immediately and never take an LLM slot
+    return await chain.ainvoke(input_dict, limiter=_llm_semaphore(), timeout=timeout)
+
+
+# --- Tag Vocabulary ---
+# Free-text tags from the LLM are mapped to canonical integer IDs (aliases, fuzzy matching, new-term registration),
+# so products and profiles can be compared as ID sets. The pre-filter blends tag-set overlap with TF-IDF similarity.
+tag_vocab = TagVocabulary.from_env()
+PREFILTER_TAG_WEIGHT = float(os.getenv("PREFILTER_TAG_WEIGHT", "0.5"))
+
+
+def _product_tag_ids(product_tags: Any, register: bool = True) -> List[int]:
+    return tag_vocab.ids(tag_list(product_tags, PRODUCT_TAG_LIST_FIELDS), register)
+
+
+def _profile_tag_ids(profile: Any, register: bool = True) -> List[int]:
+    return tag_vocab.ids(tag_list(profile, PROFILE_TAG_LIST_FIELDS), register)
+
+
+def _profile_tag_id_map(profiles: Dict[str, Any]) -> Dict[str, List[int]]:
+    return {inf_id: _profile_tag_ids(profile) for inf_id, profile in profiles.items()}
+
+
+# --- Incremental Re-analysis ---
+# Platform analyses and profiles are persisted per influencer (see analysis_store.py). A platform is only
+# re-analyzed when its content list changed by at least this share of posts (added + removed / all posts).
+analysis_store = AnalysisStore.from_env()
+PLATFORM_REANALYSIS_CHANGE_RATIO = float(os.getenv("PLATFORM_REANALYSIS_CHANGE_RATIO", "0.2"))
+# Store, vector index and tag vocabulary calls are blocking SQLite / file I/O, so async nodes run them (and the
+# helpers that make them) with asyncio.to_thread instead of on the event loop.
+# Product tags are stored per ASIN (or normalized content hash) and reused until title/features/description change.
+PRODUCT_TAG_CACHE_ENABLED = os.getenv("PRODUCT_TAG_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+# Match results are stored per (product tags, influencer profile) pair; only unseen or changed pairs reach the LLM.
+MATCH_CACHE_ENABLED = os.getenv("MATCH_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+# Generated emails are stored per (product, influencer) and reused while their prompt inputs are unchanged.
+EMAIL_CACHE_ENABLED = os.getenv("EMAIL_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+# Stored artifacts also record what they were derived from (platform -> profile -> match -> email,
+# product -> match -> email). Regenerating an upstream artifact marks exactly its dependents stale.
+
+# --- Profile Vector Index ---
+# Every stored profile is also embedded into a memory-mapped vector index (see vector_index.py), used to retrieve
+# the nearest profiles to a product before LLM matching. An empty index is backfilled once from the profile store.
+profile_index = ProfileVectorIndex.from_env() # Loads the memory-mapped matrix; no rebuild
+VECTOR_RETRIEVAL_TOP_K = int(os.getenv("VECTOR_RETRIEVAL_TOP_K", "200"))
+if not len(profile_index):
+    profile_index.upsert_many(analysis_store.iter_profiles())
+
+
+# --- Facet Index ---
+# Inverted index over the structured facets of stored platform analyses (language, region, audience, format, ...),
+# rebuilt in memory from the analysis store at startup and updated as platforms are (re-)analyzed. Searches first
+# sync() it with the store, so analyses written by other uvicorn workers are picked up.
+facet_index = FacetIndex()
+facet_index.sync(analysis_store)
+
+
+def _persist_platform_analysis(influencer_id: str, platform_name: str, content_list_dicts: List[Dict[str, Any]], result: Any) -> None:
+    analysis_store.put_platform_analysis(influencer_id, platform_name, content_list_dicts, result)
+    facet_index.add(influencer_id, platform_name, dict(result))
+    # Only called after a (re-)analysis, so the profile built on the old analysis and everything below it is stale
+    stale = analysis_store.invalidate([artifact_id("platform", influencer_id, platform_name)], include_self=False)
+    if stale:
+        print(f"LG Node: Platform {platform_name} of {influencer_id} changed; invalidated {len(stale)} dependent artifact(s).")
+
+
+def _persist_profile(influencer_id: str, influencer_name: str, source_fingerprint: str, profile: Any) -> None:
+    profile_artifact = artifact_id("profile", influencer_id)
+    changed = analysis_store.put_profile(influencer_id, influencer_name, source_fingerprint, profile)
+    analysis_store.record_dependencies(
+        (profile_artifact, artifact_id("platform", influencer_id, platform)) for platform in analysis_store.platforms_of(influencer_id)
+    )
+    profile_index.upsert(influencer_id, profile)
+    if changed:
+        stale = analysis_store.invalidate([profile_artifact], include_self=False)
+        if stale:
+            print(f"LG Node: Profile of {influencer_id} changed; invalidated {len(stale)} dependent artifact(s).")
+
+
+def _node(afunc):
+    """
+    Registers an async node so a compiled graph supports both ainvoke and invoke. There is one implementation per
+    node: invoke runs the same coroutine to completion on a fresh event loop (so it must not be called from a
+    running loop, e.g. inside a FastAPI handler; use ainvoke there).
+    """
+    def func(state):
+        return asyncio.run(afunc(state))
+    return RunnableLambda(func, afunc=afunc, name=afunc.__name__)
+
+
+# --- Retryable Failures ---
+class RetryableNodeError(RuntimeError):
+    """
+    Raised by a node of a checkpointed run (stop_on_retryable_errors) when items failed with transient errors.
+    The run stops at that node, so resuming it retries the node; items that succeeded were already stored
+    (analysis store, LLM cache) and are not recomputed.
+    """
+
+
+def _is_retryable(e: BaseException) -> bool:
+    # Rate limits, timeouts, connection errors and server errors; bad output or bad input is not retried
+    if isinstance(e, (TimeoutError, asyncio.TimeoutError, openai.RateLimitError, openai.APITimeoutError,
+                      openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    status_code = getattr(e, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+def _raise_if_retryable(state: Any, node_name: str, failures: List[BaseException]) -> None:
+    retryable = [e for e in failures if _is_retryable(e)]
+    if retryable and getattr(state, "stop_on_retryable_errors", False):
+        raise RetryableNodeError(
+            f"{node_name}: {len(retryable)} item(s) failed with retryable errors (first: {retryable[0]!r}); resume the run to retry them."
+        ) from retryable[0]
+
+
+def _product_analysis_input(state: ProductAnalysisState) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Builds the product_metadata_Prompt input from state.
+    Returns (input_dict, update); input_dict is None when the node must return `update` early
+    (on error, or when stored tags for this product are still current).
+    """
     product_info_original = state.product_info # This could be a Pydantic model or a dict
-    current_errors = state.error_message or [] # Ensure current_errors is a list
+    current_errors: List[str] = [] # error_messages is additive, so only errors raised here are returned
 
     if not product_info_original:
         error_msg = "Product analysis error: product_info is missing in state."
         print(f"LG Node: {error_msg}")
-        return {"product_tags": None, "error_messages": current_errors + [error_msg]}
+        return None, {"product_tags": None, "error_messages": current_errors + [error_msg]}
 
     # --- START: Convert product_info_original to a fully serializable dictionary ---
     serializable_product_info_dict: dict
@@ -68,12 +265,11 @@ def analyze_product_node(state: ProductAnalysisState) -> dict:
                 f"{type(product_info_original)}. Expected Pydantic model or dict."
             )
             print(f"LG Node: {error_msg}")
-            return {"product_tags": None, "error_messages": current_errors + [error_msg]}
+            return None, {"product_tags": None, "error_messages": current_errors + [error_msg]}
     except Exception as e:
-        import traceback
         error_msg = f"Product analysis error: Failed to convert product_info_original to serializable dict: {e}\n{traceback.format_exc()}"
         print(f"LG Node: {error_msg}")
-        return {"product_tags": None, "error_messages": current_errors + [error_msg]}
+        return None, {"product_tags": None, "error_messages": current_errors + [error_msg]}
     # --- END: Conversion ---
 
     # Now, create the JSON string payload for the LLM prompt from the fully serializable dictionary
@@ -81,47 +277,87 @@ def analyze_product_node(state: ProductAnalysisState) -> dict:
         product_data_json_for_llm = json.dumps(serializable_product_info_dict, ensure_ascii=False)
         print(f"LG Node: Successfully created JSON string for LLM: {product_data_json_for_llm[:200]}...") # Log snippet
     except TypeError as e: # This should ideally not happen if the above conversion is correct
-        import traceback
         error_msg = f"Product analysis error: Failed to json.dumps serializable_product_info_dict: {e}\n{traceback.format_exc()}"
         print(f"LG Node: {error_msg}")
-        return {"product_tags": None, "error_messages": current_errors + [error_msg]}
-
-
-    # --- LLM Chain Invocation ---
-    prompt = ChatPromptTemplate.from_template(product_metadata_Prompt)
-    # Ensure 'llm' and 'ProductTags' are correctly defined and available
-    chain = prompt | llm | JsonOutputParser(pydantic_object=ProductTags)
+        return None, {"product_tags": None, "error_messages": current_errors + [error_msg]}
+
+    # Same ASIN (or same normalized title/features/description) with unchanged content: reuse the stored tags
+    if PRODUCT_TAG_CACHE_ENABLED:
+        stored = analysis_store.get_product_tags(serializable_product_info_dict)
+        if stored is not None:
+            print(f"LG Node: Reusing stored product tags for {product_key(serializable_product_info_dict)}.")
+            product_tags = ProductTags(**stored["tags"])
+            return None, {"product_tags": product_tags, "product_tag_ids": _product_tag_ids(product_tags),
+                          "product_tags_source": "cache", "error_messages": current_errors}
+
+    # The prompt expects product_data_json
+    return {"product_data_json": product_data_json_for_llm}, {"error_messages": current_errors}
+
+
+def _product_analysis_success(input_dict: Dict[str, Any], parsed_tags: Any, current_errors: List[str]) -> Dict[str, Any]:
+    print("LG Node: Product analysis successful from LLM.")
+    if PRODUCT_TAG_CACHE_ENABLED:
+        product_info = json.loads(input_dict["product_data_json"])
+        if analysis_store.put_product_tags(product_info, parsed_tags):
+            stale = analysis_store.invalidate([artifact_id("product", product_key(product_info))], include_self=False)
+            if stale:
+                print(f"LG Node: Tags of {product_key(product_info)} changed; invalidated {len(stale)} dependent artifact(s).")
+    return {"product_tags": parsed_tags, "product_tag_ids": _product_tag_ids(parsed_tags),
+            "product_tags_source": "llm", "error_messages": current_errors}
+
+
+def _product_analysis_error(e: Exception, current_errors: List[str]) -> Dict[str, Any]:
+    print(f"LG Node: Error during product analysis LLM chain invocation: {e}\n{traceback.format_exc()}")
+    # Add the new error to the existing list of errors
+    new_error_message = f"Product analysis LLM/parsing exception: {str(e)}."
+    # If it's a parsing error, include part of the LLM output for debugging
+    if hasattr(e, 'llm_output') and e.llm_output: # Langchain's OutputParserException often has this
+        new_error_message += f" LLM Output preview: {str(e.llm_output)[:200]}"
+    elif hasattr(e, 'response') and hasattr(e.response, 'text'): # For requests.exceptions from LLM API
+         new_error_message += f" LLM API Response: {e.response.text[:200]}"
+
+    return {"product_tags": None, "error_messages": current_errors + [new_error_message]}
+
+
+async def analyze_product_node(state: ProductAnalysisState) -> dict:
+    print("LG Node: Analyzing product info...")
+    input_dict, update = await asyncio.to_thread(_product_analysis_input, state)
+    if input_dict is None:
+        return update
 
     try:
-        # The prompt expects product_data_json
-        parsed_tags: ProductTags = chain.invoke({"product_data_json": product_data_json_for_llm})
-        print("LG Node: Product analysis successful from LLM.")
-        # Make sure to return the original error_messages list if no new errors occurred here
-        return {"product_tags": parsed_tags, "error_messages": current_errors}
+        parsed_tags: ProductTags = await _ainvoke_limited(product_metadata_chain, input_dict)
+        return await asyncio.to_thread(_product_analysis_success, input_dict, parsed_tags, update["error_messages"])
     except Exception as e:
-        import traceback
-        print(f"LG Node: Error during product analysis LLM chain invocation: {e}\n{traceback.format_exc()}")
-        # Add the new error to the existing list of errors
-        new_error_message = f"Product analysis LLM/parsing exception: {str(e)}."
-        # If it's a parsing error, include part of the LLM output for debugging
-        if hasattr(e, 'llm_output') and e.llm_output: # Langchain's OutputParserException often has this
-            new_error_message += f" LLM Output preview: {str(e.llm_output)[:200]}"
-        elif hasattr(e, 'response') and hasattr(e.response, 'text'): # For requests.exceptions from LLM API
-             new_error_message += f" LLM API Response: {e.response.text[:200]}"
-
-        return {"product_tags": None, "error_messages": current_errors + [new_error_message]}
- 
-def analyze_influencers_platforms_node(state: MarketingWorkFlowState) -> dict:
-    print("LG Node: Analyzing social media platforms...")
-    influencer_data_list = state.influencer_data # List[Dict]
-    all_platform_analysis_results: Dict[str, Dict[str, PlatformAnalysisResult]] = {}
-    errors = list(state.error_messages) # Make a copy
-
-    platform_prompt = ChatPromptTemplate.from_template(social_media_analyst_Prompt)
-    # For platform analysis, the Pydantic object helps ensure the LLM returns the correct structure.
-    platform_chain = platform_prompt | llm | JsonOutputParser(pydantic_object=PlatformAnalysisResult)
-
-    print(f"LG Node: Analyzing platforms for {len(influencer_data_list)} influencers...")
+        _raise_if_retryable(state, "analyze_product_node", [e])
+        return _product_analysis_error(e, update["error_messages"])
+
+
+def _stored_platform_analysis(influencer_id: str, influencer_name: str, platform_name: str, content_list_dicts: List[Dict[str, Any]]) -> Optional[Any]:
+    """
+    Returns the stored PlatformAnalysisResult when the content list is unchanged, or changed by less than
+    PLATFORM_REANALYSIS_CHANGE_RATIO; otherwise None, meaning the platform must be re-analyzed.
+    """
+    stored = analysis_store.get_platform_analysis(influencer_id, platform_name)
+    if stored is None:
+        return None
+    if stored["fingerprint"] == fingerprint(content_list_dicts):
+        print(f"LG Node:   Reusing stored {platform_name} analysis for {influencer_name}: content unchanged.")
+        return stored["result"]
+    ratio = change_ratio(stored["item_keys"], [content_item_key(item) for item in content_list_dicts])
+    if ratio < PLATFORM_REANALYSIS_CHANGE_RATIO:
+        # The stored fingerprint is left as-is, so small changes accumulate until they become material.
+        print(f"LG Node:   Reusing stored {platform_name} analysis for {influencer_name}: {ratio:.0%} of posts changed.")
+        return stored["result"]
+    return None
+
+
+def _platform_analysis_jobs(influencer_data_list: List[Dict[str, Any]], reused_results: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str, str, Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Flattens influencer_data into (influencerId, influencerName, platform, prompt input, content list) jobs,
+    skipping empty platforms. Platforms served from the analysis store go straight into reused_results.
+    """
+    jobs = []
     for influencer_dict in influencer_data_list:
         influencer_id = influencer_dict.get("influencerId", "UnknownId")
         influencer_name = influencer_dict.get("influencerName", "UnknownName")
@@ -129,52 +365,68 @@ def analyze_influencers_platforms_node(state: MarketingWorkFlowState) -> dict:
         platforms_input_data = influencer_dict.get("platforms", {})
         print(f"LG Node: Analyzing platforms for influencer {influencer_name} ({influencer_id})...")
 
-        current_influencer_platform_results: Dict[str, PlatformAnalysisResult] = {}
         for platform_name, content_list_dicts in platforms_input_data.items():
             if not content_list_dicts:
                 print(f"LG Node:   Skipping {platform_name} for {influencer_name}: no content.")
                 continue
-            try:
-                # Ensure content_list_dicts matches what the prompt expects (JSON string of content)
-                # The prompt social_media_analyst_Prompt expects `content_list_json`
-                content_list_json_str = json.dumps(content_list_dicts, ensure_ascii=False, indent=2)
-                input_dict = {
-                    "influencerName": influencer_name,
-                    "platform": platform_name,
-                    "content_list_json": content_list_json_str
-                }
-                # The chain now uses pydantic_object for parsing
-                parsed_platform_result: PlatformAnalysisResult = platform_chain.invoke(input_dict)
-                print(f"LG Node:     Analysis successful for {platform_name}.")
-                current_influencer_platform_results[platform_name] = parsed_platform_result
-            except Exception as e:
-                print(f"LG Node:     Error analyzing {platform_name} for {influencer_name}: {e}")
-                errors.append(f"Platform analysis error for {influencer_name} - {platform_name}: {e}")
-        
-        all_platform_analysis_results[influencer_id] = current_influencer_platform_results
-    
-    print("LG Node: Social media platform analysis complete.")
-    return {"platform_analysis": all_platform_analysis_results, "error_messages": errors}
-   
-def generate_influencer_profiles_node(state: MarketingWorkFlowState) -> dict:
-    print("LG Node: --- Generating Influencer Profiles ---")
-    platform_analysis_map = state.platform_analysis
-    influencer_data_list = state.influencer_data
-    all_generated_profiles: Dict[str, InfluencerProfile] = {}
-    errors = list(state.error_messages)
+            stored_result = _stored_platform_analysis(influencer_id, influencer_name, platform_name, content_list_dicts)
+            if stored_result is not None:
+                reused_results.setdefault(influencer_id, {})[platform_name] = stored_result
+                continue
+            # The prompt social_media_analyst_Prompt expects `content_list_json`
+            input_dict = {
+                "influencerName": influencer_name,
+                "platform": platform_name,
+                "content_list_json": json.dumps(content_list_dicts, ensure_ascii=False, indent=2)
+            }
+            jobs.append((influencer_id, influencer_name, platform_name, input_dict, content_list_dicts))
+    return jobs
 
-    if not platform_analysis_map:
-        errors.append("Cannot generate profiles: No platform analysis data available.")
-        return {"influencer_profiles": {}, "error_messages": errors}
 
-    profile_prompt = ChatPromptTemplate.from_template(influencer_analysis_Prompt)
-    profile_chain = profile_prompt | llm | JsonOutputParser(pydantic_object=InfluencerProfile)
+async def analyze_influencers_platforms_node(state: MarketingWorkFlowState) -> dict:
+    print("LG Node: Analyzing social media platforms...")
+    influencer_data_list = state.influencer_data # List[Dict]
+    all_platform_analysis_results: Dict[str, Dict[str, PlatformAnalysisResult]] = {
+        inf.get("influencerId", "UnknownId"): {} for inf in influencer_data_list
+    }
+    errors: List[str] = []
+
+    # Fan out every (influencer, platform) pair at once; _ainvoke_limited caps how many are in flight,
+    # so wall-clock time tracks the slowest call instead of the sum of all calls.
+    jobs = await asyncio.to_thread(_platform_analysis_jobs, influencer_data_list, all_platform_analysis_results)
+    print(f"LG Node: Analyzing {len(jobs)} changed platforms for {len(influencer_data_list)} influencers concurrently (cap {LLM_MAX_CONCURRENCY})...")
+    outcomes = await asyncio.gather(
+        *(_ainvoke_limited(platform_analysis_chain, job[3]) for job in jobs),
+        return_exceptions=True
+    )
+
+    # Reassemble into {influencerId: {platform: PlatformAnalysisResult}}, keeping per-item errors
+    failures: List[BaseException] = []
+    for (influencer_id, influencer_name, platform_name, _, content_list_dicts), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"LG Node:     Error analyzing {platform_name} for {influencer_name}: {outcome}")
+            errors.append(f"Platform analysis error for {influencer_name} - {platform_name}: {outcome}")
+            failures.append(outcome)
+            continue
+        print(f"LG Node:     Analysis successful for {platform_name} ({influencer_name}).")
+        all_platform_analysis_results[influencer_id][platform_name] = outcome
+        await asyncio.to_thread(_persist_platform_analysis, influencer_id, platform_name, content_list_dicts, outcome)
+    _raise_if_retryable(state, "analyze_influencers_platforms_node", failures) # Successes are stored, so a resume reuses them
+
+    print("LG Node: Social media platform analysis complete.")
+    return {"platform_analysis": all_platform_analysis_results, "error_messages": errors}
 
-    influencer_id_to_name_map = {inf.get("influencerId", "UnknownId"): inf.get("influencerName", "UnknownName") for inf in influencer_data_list}
 
-    for influencer_id, platform_details_for_influencer in platform_analysis_map.items():
+def _profile_jobs(state: MarketingWorkFlowState, errors: List[str], reused_profiles: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any], str]]:
+    """
+    Builds (influencerId, influencerName, prompt input, source fingerprint) jobs for every influencer with platform
+    analysis data. An influencer whose platform analyses are unchanged since its stored profile was synthesized
+    reuses that profile (added to reused_profiles), so only influencers with changed platforms are re-profiled.
+    """
+    influencer_id_to_name_map = {inf.get("influencerId", "UnknownId"): inf.get("influencerName", "UnknownName") for inf in state.influencer_data}
+    jobs = []
+    for influencer_id, platform_details_for_influencer in state.platform_analysis.items():
         influencer_name = influencer_id_to_name_map.get(influencer_id, f"Unknown ID: {influencer_id}")
-        print(f"LG Node:   Generating profile for: {influencer_name} ({influencer_id})")
 
         if not platform_details_for_influencer:
             print(f"LG Node:     Skipping profile for {influencer_name}: No platform analysis data.")
@@ -185,104 +437,343 @@ def generate_influencer_profiles_node(state: MarketingWorkFlowState) -> dict:
         platform_details_list_for_prompt = [
             details.model_dump() for details in platform_details_for_influencer.values()
         ]
-        
+        source_fingerprint = fingerprint(platform_details_list_for_prompt)
+        stored = analysis_store.get_profile(influencer_id)
+        if stored and stored["source_fingerprint"] == source_fingerprint:
+            print(f"LG Node:   Reusing stored profile for {influencer_name}: platform analyses unchanged.")
+            reused_profiles[influencer_id] = stored["profile"]
+            continue
+
+        input_dict = {
+            "influencerId": influencer_id,
+            "influencerName": influencer_name,
+            "platform_details_list_json": json.dumps(platform_details_list_for_prompt, ensure_ascii=False, indent=2)
+        }
+        jobs.append((influencer_id, influencer_name, input_dict, source_fingerprint))
+    return jobs
+
+
+async def generate_influencer_profiles_node(state: MarketingWorkFlowState) -> dict:
+    print("LG Node: --- Generating Influencer Profiles ---")
+    platform_analysis_map = state.platform_analysis
+    all_generated_profiles: Dict[str, InfluencerProfile] = {}
+    errors: List[str] = []
+
+    if not platform_analysis_map:
+        errors.append("Cannot generate profiles: No platform analysis data available.")
+        return {"influencer_profiles": {}, "error_messages": errors}
+
+    async def _generate(influencer_id: str, influencer_name: str, input_dict: Dict[str, Any], source_fingerprint: str):
+        # Isolate each influencer: a failure or timeout is returned, never raised into the other tasks.
         try:
-            platform_details_json_str = json.dumps(platform_details_list_for_prompt, ensure_ascii=False, indent=2)
-            input_dict = {
-                "influencerId": influencer_id,
-                "influencerName": influencer_name,
-                "platform_details_list_json": platform_details_json_str
-            }
-            parsed_profile: InfluencerProfile = profile_chain.invoke(input_dict)
-            print(f"LG Node:     Profile generated successfully for {influencer_name}.")
-            all_generated_profiles[influencer_id] = parsed_profile
+            return influencer_id, influencer_name, source_fingerprint, await _ainvoke_limited(influencer_profile_chain, input_dict, timeout=PROFILE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return influencer_id, influencer_name, source_fingerprint, TimeoutError(f"timed out after {PROFILE_TIMEOUT_SECONDS:.0f}s")
         except Exception as e:
-            print(f"LG Node:     Error generating profile for {influencer_name}: {e}")
-            errors.append(f"Profile generation error for {influencer_name}: {e}")
-    
-    return {"influencer_profiles": all_generated_profiles, "error_messages": errors,"platform_details_for_influencer":platform_analysis_map}
+            return influencer_id, influencer_name, source_fingerprint, e
+
+    jobs = await asyncio.to_thread(_profile_jobs, state, errors, all_generated_profiles)
+    print(f"LG Node:   Generating {len(jobs)} profiles concurrently (cap {LLM_MAX_CONCURRENCY}, timeout {PROFILE_TIMEOUT_SECONDS:.0f}s each)...")
+    # Fill influencer_profiles in completion order rather than waiting on the slowest influencer.
+    failures: List[BaseException] = []
+    for next_done in asyncio.as_completed([_generate(*job) for job in jobs]):
+        influencer_id, influencer_name, source_fingerprint, outcome = await next_done
+        if isinstance(outcome, Exception):
+            print(f"LG Node:     Error generating profile for {influencer_name}: {outcome}")
+            errors.append(f"Profile generation error for {influencer_name}: {outcome}")
+            failures.append(outcome)
+            continue
+        print(f"LG Node:     Profile generated successfully for {influencer_name}.")
+        all_generated_profiles[influencer_id] = outcome
+        await asyncio.to_thread(_persist_profile, influencer_id, influencer_name, source_fingerprint, outcome)
+    _raise_if_retryable(state, "generate_influencer_profiles_node", failures)
+
+    influencer_tag_ids = await asyncio.to_thread(_profile_tag_id_map, all_generated_profiles)
+    return {"influencer_profiles": all_generated_profiles, "influencer_tag_ids": influencer_tag_ids, "error_messages": errors}
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough, dependency-free estimate: ~4 ASCII chars per token, ~1 token per CJK/non-ASCII char.
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+
+def _prefilter_profiles(state: MarketingWorkFlowState) -> Tuple[Dict[str, InfluencerProfile], Dict[str, float]]:
+    """
+    Scores every profile against the product tags locally (no LLM): TF-IDF text similarity blended with canonical
+    tag-set overlap (PREFILTER_TAG_WEIGHT). Keeps the shortlist that goes to the matcher.
+    Returns (shortlisted profiles, pre-scores of all profiles).
+    """
+    top_k = state.prefilter_top_k if state.prefilter_top_k is not None else MATCH_PREFILTER_TOP_K
+    min_score = state.prefilter_min_score if state.prefilter_min_score is not None else MATCH_PREFILTER_MIN_SCORE
+    lexical_scores = prefilter_scores(state.product_tags, state.influencer_profiles)
+    # Canonical tag overlap; profiles without stored IDs (e.g. sent inline) are resolved here. Resolution does not
+    # register new tags, so recommending never grows the vocabulary; unknown tags are left out of the overlap.
+    stored_tag_ids = state.influencer_tag_ids or {}
+    product_ids = state.product_tag_ids if state.product_tag_ids is not None else _product_tag_ids(state.product_tags, register=False)
+    profile_ids = {
+        inf_id: stored_tag_ids[inf_id] if inf_id in stored_tag_ids else _profile_tag_ids(profile, register=False)
+        for inf_id, profile in state.influencer_profiles.items()
+    }
+    overlap_scores = tag_overlap_scores(product_ids, profile_ids)
+    scores = {
+        inf_id: round((1 - PREFILTER_TAG_WEIGHT) * lexical_scores[inf_id] + PREFILTER_TAG_WEIGHT * overlap_scores[inf_id], 4)
+        for inf_id in lexical_scores
+    }
+    kept_ids = shortlist(scores, top_k, min_score)
+    print(f"LG Node:   Pre-filter kept {len(kept_ids)}/{len(scores)} profiles (top_k={top_k or 'all'}, min_score={min_score}).")
+    return {inf_id: state.influencer_profiles[inf_id] for inf_id in kept_ids}, scores
 
 
+def _match_strategy(state: MarketingWorkFlowState) -> str:
+    return state.match_strategy or MATCH_STRATEGY
 
-def match_influencers_node(state: MarketingWorkFlowState) -> dict:
-    print("LG Node: --- Matching Influencers to Product ---")
-    product_tags_obj = state.product_tags
-    influencer_profiles_map = state.influencer_profiles
-    product_info_dict = state.product_info
-    errors = list(state.error_messages)
-    matched_results_list: List[MatchResult] = []
 
-    if not product_tags_obj:
-        errors.append("Cannot match: Product tags missing.")
-        return {"match_results": [], "error_messages": errors}
-    if not influencer_profiles_map:
-        errors.append("Cannot match: Influencer profiles missing.")
-        return {"match_results": [], "error_messages": errors}
+def _score_value(score_str: str) -> float:
+    return float(score_str.replace("%", "")) # Convert "88%" to 88.0
+
+
+def _pack_chunks(item_jsons: List[str], available: int, output_tokens_per_item: int) -> List[List[str]]:
+    # Greedy packing: each item costs its serialized size plus the expected size of its output
+    chunks: List[List[str]] = []
+    chunk_tokens = 0
+    for item_json in item_jsons:
+        cost = _estimate_tokens(item_json) + output_tokens_per_item
+        if chunks and chunk_tokens + cost <= available:
+            chunks[-1].append(item_json)
+            chunk_tokens += cost
+        else:
+            chunks.append([item_json]) # An item larger than the budget still gets a chunk of its own
+            chunk_tokens = cost
+    return chunks
+
+
+def _product_info_json(state: MarketingWorkFlowState) -> str:
+    product_input_for_prompt = state.product_info.copy()
+    product_input_for_prompt.update(state.product_tags.model_dump()) # Add generated tags
+    # Compact JSON: indentation only costs tokens
+    return json.dumps(product_input_for_prompt, ensure_ascii=False, separators=(",", ":"))
+
+
+def _influencer_names(state: MarketingWorkFlowState) -> Dict[str, str]:
+    return {inf.get("influencerId"): inf.get("influencerName", "UnknownName") for inf in (state.influencer_data or [])}
+
 
-    matcher_prompt = ChatPromptTemplate.from_template(influencer_match_Prompt)
-    # The prompt returns a list of dicts, so JsonOutputParser is fine here.
-    # If you want each item in the list to be a MatchResult Pydantic object directly,
-    # you'd need a custom parser or parse after the LLM call.
-    matcher_chain = matcher_prompt | llm | JsonOutputParser() # Expects list of MatchResult-like dicts
+def _match_fingerprints(state: MarketingWorkFlowState, influencer_ids: List[str]) -> Tuple[str, Dict[str, str]]:
+    # (product fingerprint, {influencerId: profile fingerprint}) keying the per-pair match cache
+    product_fp = fingerprint([state.product_tags.model_dump(), product_content_fingerprint(state.product_info)])
+    return product_fp, {inf_id: fingerprint(state.influencer_profiles[inf_id].model_dump()) for inf_id in influencer_ids}
 
-    product_input_for_prompt = product_info_dict.copy()
-    product_input_for_prompt.update(product_tags_obj.model_dump()) # Add generated tags
+
+def _cached_match_results(state: MarketingWorkFlowState, influencer_ids: List[str]) -> Dict[str, MatchResult]:
+    if not MATCH_CACHE_ENABLED or not influencer_ids:
+        return {}
+    product_fp, profile_fps = _match_fingerprints(state, influencer_ids)
+    cached: Dict[str, MatchResult] = {}
+    for inf_id, result in analysis_store.get_match_results(product_fp, profile_fps).items():
+        # A score-only result cannot stand in for the single-stage matcher, which always writes a rationale
+        if _match_strategy(state) == "single" and not result.get("match_rationale"):
+            continue
+        cached[inf_id] = MatchResult(**result)
+    return cached
+
+
+def _store_match_results(state: MarketingWorkFlowState, results: List[MatchResult]) -> None:
+    results = [result for result in results if result.influencerId in (state.influencer_profiles or {})]
+    if not MATCH_CACHE_ENABLED or not results:
+        return
+    product_fp, profile_fps = _match_fingerprints(state, [result.influencerId for result in results])
+    analysis_store.put_match_results(product_fp, [
+        (result.influencerId, profile_fps[result.influencerId], result.model_dump()) for result in results
+    ])
+    product_artifact = artifact_id("product", product_key(state.product_info))
+    analysis_store.record_dependencies(
+        (artifact_id("match", product_fp, result.influencerId), parent)
+        for result in results
+        for parent in (product_artifact, artifact_id("profile", result.influencerId))
+    )
+
+
+def _match_inputs(state: MarketingWorkFlowState, errors: List[str]) -> Tuple[Optional[List[Dict[str, Any]]], Dict[str, float], List[MatchResult]]:
+    """
+    Builds matcher inputs (influencer_match_Prompt, or influencer_score_Prompt for two-stage matching): the same
+    product context, with the pre-filtered influencer profiles that have no cached result split into chunks
+    that each fit MATCH_CHUNK_TOKEN_BUDGET.
+    Returns (inputs, pre-scores, cached results); inputs is None when there is nothing to match.
+    """
+    if not state.product_tags:
+        errors.append("Cannot match: Product tags missing.")
+        return None, {}, []
+    if not state.influencer_profiles:
+        errors.append("Cannot match: Influencer profiles missing.")
+        return None, {}, []
+    influencer_profiles_map, scores = _prefilter_profiles(state)
+    # Pairs already scored for these exact product tags and profile are merged back in instead of re-scored
+    cached = _cached_match_results(state, list(influencer_profiles_map))
+    if cached:
+        print(f"LG Node:   Reusing {len(cached)}/{len(influencer_profiles_map)} cached match results.")
+    influencer_profiles_map = {inf_id: profile for inf_id, profile in influencer_profiles_map.items() if inf_id not in cached}
+    product_info_json = _product_info_json(state)
 
     # influencer_profiles_map is Dict[str, InfluencerProfile]
     # The prompt expects a list of influencer profile dicts
+    influencer_id_to_name_map = _influencer_names(state)
     influencers_to_match_list_for_prompt = []
     for inf_id, profile_obj in influencer_profiles_map.items():
         profile_dict = profile_obj.model_dump()
-        name_from_data = "UnknownName"
-        for inf_data in state.influencer_data:
-            if inf_data.get("influencerId") == inf_id:
-                name_from_data = inf_data.get("influencerName", "UnknownName")
-                break
         profile_dict['influencerId'] = inf_id # Explicitly add for the prompt
-        profile_dict['influencerName'] = name_from_data
-        influencers_to_match_list_for_prompt.append(profile_dict)
-
+        profile_dict['influencerName'] = influencer_id_to_name_map.get(inf_id, "UnknownName")
+        influencers_to_match_list_for_prompt.append(json.dumps(profile_dict, ensure_ascii=False, separators=(",", ":")))
 
     if not influencers_to_match_list_for_prompt:
+        if cached:
+            return [], scores, list(cached.values())
         print("LG Node:   No influencer profiles to match.")
-        return {"match_results": [], "error_messages": errors}
+        return None, scores, []
 
-    try:
-        input_dict = {
-            "product_info": json.dumps(product_input_for_prompt, ensure_ascii=False, indent=2),
-            "influencers_to_match": json.dumps(influencers_to_match_list_for_prompt, ensure_ascii=False, indent=2)
-        }
-        # LLM is expected to return a list of dicts
-        parsed_match_list_dicts = matcher_chain.invoke(input_dict)
-
-        if parsed_match_list_dicts and isinstance(parsed_match_list_dicts, list):
-            print(f"LG Node:   Matching completed. Found {len(parsed_match_list_dicts)} results.")
-            for item_dict in parsed_match_list_dicts:
-                try:
-                    # Validate and convert to MatchResult Pydantic model
-                    print(f"LG Node:     Match result: {item_dict}")
-                    match_obj = MatchResult(influencerId=item_dict['influencerId'], match_score=item_dict['match_score'],
-                                            influencerName=item_dict['influencerName'],match_rationale=item_dict['match_rationale'])
-                    matched_results_list.append(match_obj)
-                except Exception as val_err:
-                    print(f"LG Node:   Warning: Invalid match result format from LLM: {item_dict}, Error: {val_err}")
-                    errors.append(f"Matcher returned an item with invalid format: {item_dict}")
-        else:
-            print("LG Node:   Matching failed or returned invalid format (expected a list).")
-            errors.append("Matcher did not return a valid list.")
-            
-    except Exception as e:
-        print(f"LG Node:   Error during matching: {e}")
-        errors.append(f"Matcher error: {e}")
+    if _match_strategy(state) == "two_stage":
+        template, output_tokens = influencer_score_Prompt, MATCH_SCORE_OUTPUT_TOKENS_PER_PROFILE
+    else:
+        template, output_tokens = influencer_match_Prompt, MATCH_OUTPUT_TOKENS_PER_PROFILE
+    available = MATCH_CHUNK_TOKEN_BUDGET - _estimate_tokens(template) - _estimate_tokens(product_info_json)
+    chunks = _pack_chunks(influencers_to_match_list_for_prompt, available, output_tokens)
+
+    print(f"LG Node:   Matching {len(influencers_to_match_list_for_prompt)} profiles in {len(chunks)} chunk(s) (budget {MATCH_CHUNK_TOKEN_BUDGET} tokens).")
+    return [
+        {"product_info": product_info_json, "influencers_to_match": "[" + ",".join(chunk) + "]"}
+        for chunk in chunks
+    ], scores, list(cached.values())
+
+
+def _rationale_inputs(state: MarketingWorkFlowState, scored: Dict[str, MatchResult]) -> List[Dict[str, Any]]:
+    """
+    Stage two of two-stage matching: influencer_rationale_Prompt inputs for the candidates worth explaining,
+    i.e. every score >= match_threshold plus the rationale_top_k (default MATCH_RATIONALE_TOP_K) best scores
+    overall, except those that already have one (cached results).
+    """
+    def _sort_key(inf_id: str) -> float:
+        try:
+            return _score_value(scored[inf_id].match_score)
+        except (ValueError, TypeError):
+            return -1.0
+
+    top_k = state.rationale_top_k if state.rationale_top_k is not None else MATCH_RATIONALE_TOP_K
+    ranked = sorted(scored, key=_sort_key, reverse=True)
+    selected_ids = [inf_id for inf_id in ranked if _sort_key(inf_id) >= state.match_threshold]
+    selected_ids += [inf_id for inf_id in ranked[:top_k] if inf_id not in selected_ids]
+    selected_ids = [inf_id for inf_id in selected_ids if not scored[inf_id].match_rationale]
+    if not selected_ids:
+        return []
+
+    influencers_to_explain = []
+    for inf_id in selected_ids:
+        if inf_id not in state.influencer_profiles:
+            continue # The scorer returned an id that was never submitted
+        profile_dict = state.influencer_profiles[inf_id].model_dump()
+        profile_dict['influencerId'] = inf_id
+        profile_dict['influencerName'] = scored[inf_id].influencerName
+        profile_dict['match_score'] = scored[inf_id].match_score
+        influencers_to_explain.append(json.dumps(profile_dict, ensure_ascii=False, separators=(",", ":")))
+
+    product_info_json = _product_info_json(state)
+    available = MATCH_CHUNK_TOKEN_BUDGET - _estimate_tokens(influencer_rationale_Prompt) - _estimate_tokens(product_info_json)
+    chunks = _pack_chunks(influencers_to_explain, available, MATCH_OUTPUT_TOKENS_PER_PROFILE)
+    print(f"LG Node:   Writing rationales for {len(selected_ids)}/{len(scored)} scored influencers in {len(chunks)} chunk(s).")
+    return [
+        {"product_info": product_info_json, "influencers_to_explain": "[" + ",".join(chunk) + "]"}
+        for chunk in chunks
+    ]
+
+
+def _parse_match_results(parsed_match_list_dicts: Any, errors: List[str]) -> List[MatchResult]:
+    matched_results_list: List[MatchResult] = []
+    if parsed_match_list_dicts and isinstance(parsed_match_list_dicts, list):
+        print(f"LG Node:   Matching completed. Found {len(parsed_match_list_dicts)} results.")
+        for item_dict in parsed_match_list_dicts:
+            try:
+                # Validate and convert to MatchResult Pydantic model
+                print(f"LG Node:     Match result: {item_dict}")
+                match_obj = MatchResult(influencerId=item_dict['influencerId'], match_score=item_dict['match_score'],
+                                        influencerName=item_dict['influencerName'],
+                                        match_rationale=item_dict.get('match_rationale', "")) # Score-only pass has no rationale yet
+                matched_results_list.append(match_obj)
+            except Exception as val_err:
+                print(f"LG Node:   Warning: Invalid match result format from LLM: {item_dict}, Error: {val_err}")
+                errors.append(f"Matcher returned an item with invalid format: {item_dict}")
+    else:
+        print("LG Node:   Matching failed or returned invalid format (expected a list).")
+        errors.append("Matcher did not return a valid list.")
+    return matched_results_list
+
+
+def _merge_rationales(scored: Dict[str, MatchResult], parsed_rationales: Any, errors: List[str]) -> None:
+    if not isinstance(parsed_rationales, list):
+        errors.append("Rationale writer did not return a valid list.")
+        return
+    for item_dict in parsed_rationales:
+        inf_id = item_dict.get("influencerId") if isinstance(item_dict, dict) else None
+        if inf_id not in scored or not item_dict.get("match_rationale"):
+            errors.append(f"Rationale writer returned an item with invalid format: {item_dict}")
+            continue
+        scored[inf_id].match_rationale = item_dict["match_rationale"]
+
+
+def _match_chunk_error(label: str, chunk_index: int, chunk_count: int, e: BaseException, errors: List[str]) -> None:
+    print(f"LG Node:   Error during {label.lower()} (chunk {chunk_index + 1}/{chunk_count}): {e}")
+    errors.append(f"{label} error (chunk {chunk_index + 1}/{chunk_count}): {e}")
+
+
+async def match_influencers_node(state: MarketingWorkFlowState) -> dict:
+    print("LG Node: --- Matching Influencers to Product ---")
+    errors: List[str] = []
+    matched_results_list: List[MatchResult] = []
+
+    input_dicts, scores, cached_results = await asyncio.to_thread(_match_inputs, state, errors)
+    if input_dicts is None:
+        return {"match_results": [], "prefilter_scores": scores, "error_messages": errors}
+    matched_results_list.extend(cached_results)
+
+    two_stage = _match_strategy(state) == "two_stage"
+    match_chain = influencer_score_chain if two_stage else influencer_match_chain
+    failures: List[BaseException] = []
+    # Map: score every chunk concurrently against the same product context. Reduce: concatenate in chunk order.
+    outcomes = await asyncio.gather(
+        *(_ainvoke_limited(match_chain, input_dict) for input_dict in input_dicts),
+        return_exceptions=True
+    )
+    for chunk_index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            _match_chunk_error("Matcher", chunk_index, len(input_dicts), outcome, errors)
+            failures.append(outcome)
+            continue
+        matched_results_list.extend(_parse_match_results(outcome, errors))
+
+    if two_stage:
+        # Stage two only runs once all scores are known, since the candidates to explain depend on the full ranking.
+        scored = {result.influencerId: result for result in matched_results_list}
+        rationale_inputs = _rationale_inputs(state, scored)
+        outcomes = await asyncio.gather(
+            *(_ainvoke_limited(influencer_rationale_chain, input_dict) for input_dict in rationale_inputs),
+            return_exceptions=True
+        )
+        for chunk_index, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                _match_chunk_error("Rationale", chunk_index, len(rationale_inputs), outcome, errors)
+                failures.append(outcome)
+                continue
+            _merge_rationales(scored, outcome, errors)
 
-    return {"match_results": matched_results_list, "error_messages": errors}
+    # Stored first: a resume reuses these scores and only re-scores (or writes rationales for) what failed
+    await asyncio.to_thread(_store_match_results, state, matched_results_list)
+    _raise_if_retryable(state, "match_influencers_node", failures)
+    return {"match_results": matched_results_list, "prefilter_scores": scores, "error_messages": errors}
 
 def filter_matches_node(state: MarketingWorkFlowState) -> dict:
     print("LG Node: --- Filtering Matches ---")
     match_results_list = state.match_results # List[MatchResult]
     threshold = state.match_threshold # e.g., 75.0 for 75%
     selected: List[MatchResult] = []
-    errors = list(state.error_messages)
+    errors: List[str] = []
 
     if not match_results_list:
         print("LG Node:   No match results to filter.")
@@ -291,7 +782,7 @@ def filter_matches_node(state: MarketingWorkFlowState) -> dict:
     for result_obj in match_results_list:
         try:
             score_str = result_obj.match_score # e.g., "88%"
-            score_value = float(score_str.replace("%", "")) # Convert "88%" to 88.0
+            score_value = _score_value(score_str)
             if score_value >= threshold:
                 selected.append(result_obj)
         except (ValueError, TypeError) as e:
@@ -302,57 +793,48 @@ def filter_matches_node(state: MarketingWorkFlowState) -> dict:
     print(f"LG Node:   Selected {len(selected)} influencers meeting threshold >= {threshold}%.")
     return {"selected_influencers": selected, "error_messages": errors}
 
-def generate_emails_node(state: EmailGenerationState) -> Dict[str, Any]: # Node returns a dict to update Pydantic state
-    print("LG Node: --- Generating Outreach Emails (Pydantic State) ---")
-    
+def _email_jobs(state: EmailGenerationState, current_node_errors: List[str]) -> Optional[List[Tuple[str, str, Dict[str, Any]]]]:
+    """
+    Builds (influencerId, influencerName, collab_email_Prompt input) jobs for the selected influencers.
+    Returns None when email generation cannot start at all; the reason is appended to current_node_errors.
+    """
     # Access attributes from Pydantic state object
     selected_influencers_list = state.selected_influencers
     product_info_dict = state.product_info # Already a dict as per EmailGenerationState
     product_tags_obj = state.product_tags
     influencer_profiles_map = state.influencer_profiles
-    
-    # errors = list(state.error_messages) # No need to copy if we append to the original (Pydantic handles updates)
-    # Instead, collect new errors and return them
-    current_node_errors: List[str] = []
-    generated_emails_list: List[GeneratedEmail] = []
 
     if not selected_influencers_list:
         print("LG Node:   No selected influencers to generate emails for.")
-        # Return the current state of errors and empty emails
-        return {"generated_emails": [], "error_messages": state.error_messages + current_node_errors}
+        return None
 
     if not product_info_dict:
         current_node_errors.append("Email generation: Product info is missing.")
         print("LG Node:   Error: Product info is missing.")
-        return {"generated_emails": [], "error_messages": state.error_messages + current_node_errors}
+        return None
 
     if not influencer_profiles_map:
         current_node_errors.append("Email generation: Influencer profiles map is missing.")
         print("LG Node:   Error: Influencer profiles map is missing.")
-        return {"generated_emails": [], "error_messages": state.error_messages + current_node_errors}
-
-
-    email_prompt_template = ChatPromptTemplate.from_template(collab_email_Prompt)
-    email_chain = email_prompt_template | llm | JsonOutputParser() # Expects dict output from LLM
+        return None
 
     # Prepare product input for prompt (should be JSON string)
     product_input_for_llm_dict = product_info_dict.copy() # Start with base product info
     if product_tags_obj: # product_tags_obj is already a Pydantic model or None
         product_input_for_llm_dict.update(product_tags_obj.model_dump(mode="json"))
-    
+
     try:
         product_info_json_str = json.dumps(product_input_for_llm_dict, ensure_ascii=False, indent=2)
     except Exception as e:
         err_msg = f"Failed to serialize product_info for email prompt: {e}"
         print(f"LG Node:   {err_msg}\n{traceback.format_exc()}")
         current_node_errors.append(err_msg)
-        return {"generated_emails": [], "error_messages": state.error_messages + current_node_errors}
-
+        return None
 
+    jobs = []
     for influencer_match_obj in selected_influencers_list:
         influencer_id = influencer_match_obj.influencerId
         influencer_name = influencer_match_obj.influencerName
-        print(f"LG Node:   Generating email for: {influencer_name} ({influencer_id})")
 
         profile_obj = influencer_profiles_map.get(influencer_id)
         if not profile_obj: # profile_obj is an InfluencerProfile Pydantic model or None
@@ -360,15 +842,15 @@ def generate_emails_node(state: EmailGenerationState) -> Dict[str, Any]: # Node
             print(f"LG Node:     Warning: {msg}")
             current_node_errors.append(msg)
             continue
-        
+
         # Prepare influencer profile input for prompt (should be JSON string)
         # The collab_email_Prompt expects 'influencer_profile' to be a JSON string
         # containing influencerId and influencerName among other profile details.
         profile_dict_for_llm = profile_obj.model_dump(mode="json")
         # Ensure influencerId and influencerName are present, collab_email_Prompt might use them.
-        profile_dict_for_llm['influencerId'] = influencer_id 
+        profile_dict_for_llm['influencerId'] = influencer_id
         profile_dict_for_llm['influencerName'] = influencer_name
-        
+
         try:
             influencer_profile_json_str = json.dumps(profile_dict_for_llm, ensure_ascii=False, indent=2)
         except Exception as e:
@@ -377,41 +859,112 @@ def generate_emails_node(state: EmailGenerationState) -> Dict[str, Any]: # Node
             current_node_errors.append(err_msg)
             continue
 
+        llm_input_dict = {
+            "product_info": product_info_json_str,
+            "influencer_profile": influencer_profile_json_str
+        }
+        jobs.append((influencer_id, influencer_name, llm_input_dict))
+    return jobs
+
+
+def _email_artifact(state: EmailGenerationState, influencer_id: str) -> str:
+    return artifact_id("email", product_key(state.product_info), influencer_id)
+
+
+def _stored_email(state: EmailGenerationState, influencer_id: str, llm_input_dict: Dict[str, Any]) -> Optional[GeneratedEmail]:
+    if not EMAIL_CACHE_ENABLED:
+        return None
+    stored = analysis_store.get_artifact(_email_artifact(state, influencer_id), fingerprint(llm_input_dict))
+    return GeneratedEmail(**stored) if stored else None
+
+
+def _store_email(state: EmailGenerationState, llm_input_dict: Dict[str, Any], email_obj: GeneratedEmail) -> None:
+    if not EMAIL_CACHE_ENABLED:
+        return
+    analysis_store.put_artifact(
+        _email_artifact(state, email_obj.influencerId), fingerprint(llm_input_dict), email_obj.model_dump(),
+        depends_on=[artifact_id("product", product_key(state.product_info)), artifact_id("profile", email_obj.influencerId)],
+    )
+
+
+def _parse_generated_email(parsed_email_content_dict: Any, influencer_id: str, influencer_name: str, current_node_errors: List[str]) -> Optional[GeneratedEmail]:
+    if parsed_email_content_dict and isinstance(parsed_email_content_dict, dict) and \
+       "email_subject" in parsed_email_content_dict and "email_body" in parsed_email_content_dict:
+        print(f"LG Node:     Email generated successfully for {influencer_name}.")
+        return GeneratedEmail(
+            influencerId=influencer_id,
+            influencerName=influencer_name,
+            email_subject=parsed_email_content_dict["email_subject"],
+            email_body=parsed_email_content_dict["email_body"]
+        )
+    err_msg = f"Email generation for {influencer_name} returned invalid/incomplete dict."
+    if parsed_email_content_dict:
+        err_msg += f" Got: {str(parsed_email_content_dict)[:200]}"
+    print(f"LG Node:     {err_msg}")
+    current_node_errors.append(err_msg)
+    return None
+
+
+def _email_generation_error(e: Exception, influencer_name: str) -> str:
+    # Catches LLM errors, OutputParserException, etc.
+    err_msg = f"Error generating email for {influencer_name}: {str(e)}"
+    if hasattr(e, 'llm_output') and e.llm_output:
+         err_msg += f". LLM Output: '{e.llm_output[:200]}...'"
+    print(f"LG Node:     {err_msg}\n{traceback.format_exc()}")
+    return err_msg
+
+
+async def astream_generated_emails(state: EmailGenerationState, failures: Optional[List[BaseException]] = None) -> AsyncIterator[Tuple[Optional[GeneratedEmail], List[str]]]:
+    """
+    Generates outreach emails concurrently (bounded by LLM_MAX_CONCURRENCY) and yields
+    (GeneratedEmail or None, new error messages) as soon as each influencer's email is ready.
+    The exceptions behind failed emails are appended to `failures` when given.
+    Used by generate_emails_node and by the streaming email creation endpoint.
+    """
+    setup_errors: List[str] = []
+    jobs = _email_jobs(state, setup_errors)
+    if setup_errors:
+        yield None, setup_errors
+    if not jobs:
+        return
+
+    async def _generate(influencer_id: str, influencer_name: str, llm_input_dict: Dict[str, Any]):
+        item_errors: List[str] = []
+        stored_email = await asyncio.to_thread(_stored_email, state, influencer_id, llm_input_dict)
+        if stored_email:
+            return stored_email, item_errors
         try:
-            llm_input_dict = {
-                "product_info": product_info_json_str,
-                "influencer_profile": influencer_profile_json_str
-            }
-            
-            parsed_email_content_dict = email_chain.invoke(llm_input_dict) # Returns a dict
-
-            if parsed_email_content_dict and isinstance(parsed_email_content_dict, dict) and \
-               "email_subject" in parsed_email_content_dict and "email_body" in parsed_email_content_dict:
-                print(f"LG Node:     Email generated successfully for {influencer_name}.")
-                email_obj = GeneratedEmail(
-                    influencerId=influencer_id,
-                    influencerName=influencer_name,
-                    email_subject=parsed_email_content_dict["email_subject"],
-                    email_body=parsed_email_content_dict["email_body"]
-                )
-                generated_emails_list.append(email_obj)
-            else:
-                err_msg = f"Email generation for {influencer_name} returned invalid/incomplete dict."
-                if parsed_email_content_dict:
-                    err_msg += f" Got: {str(parsed_email_content_dict)[:200]}"
-                print(f"LG Node:     {err_msg}")
-                current_node_errors.append(err_msg)
-        except Exception as e: # Catches LLM errors, OutputParserException, etc.
-            err_msg = f"Error generating email for {influencer_name}: {str(e)}"
-            if hasattr(e, 'llm_output') and e.llm_output:
-                 err_msg += f". LLM Output: '{e.llm_output[:200]}...'"
-            print(f"LG Node:     {err_msg}\n{traceback.format_exc()}")
-            current_node_errors.append(err_msg)
-    
-    # Return all generated emails and any new errors, appended to existing errors
+            parsed_email_content_dict = await _ainvoke_limited(collab_email_chain, llm_input_dict)
+            email_obj = _parse_generated_email(parsed_email_content_dict, influencer_id, influencer_name, item_errors)
+            if email_obj:
+                await asyncio.to_thread(_store_email, state, llm_input_dict, email_obj)
+            return email_obj, item_errors
+        except Exception as e:
+            if failures is not None:
+                failures.append(e)
+            return None, [_email_generation_error(e, influencer_name)]
+
+    print(f"LG Node:   Generating {len(jobs)} emails concurrently (cap {LLM_MAX_CONCURRENCY})...")
+    for next_done in asyncio.as_completed([_generate(*job) for job in jobs]):
+        yield await next_done
+
+
+async def generate_emails_node(state: EmailGenerationState) -> Dict[str, Any]:
+    print("LG Node: --- Generating Outreach Emails (Pydantic State) ---")
+
+    current_node_errors: List[str] = []
+    generated_emails_list: List[GeneratedEmail] = []
+    failures: List[BaseException] = []
+
+    async for email_obj, item_errors in astream_generated_emails(state, failures):
+        if email_obj:
+            generated_emails_list.append(email_obj)
+        current_node_errors.extend(item_errors)
+    _raise_if_retryable(state, "generate_emails_node", failures) # Generated emails are stored, so a resume reuses them
+
     return {
-        "generated_emails": generated_emails_list, 
-        "error_messages": state.error_messages + current_node_errors
+        "generated_emails": generated_emails_list,
+        "error_messages": current_node_errors
     }
 
 
@@ -429,7 +982,7 @@ def should_generate_emails(state: MarketingWorkFlowState) -> str:
 
 # --- product analysis workflow ---
 product_analysis_builder=StateGraph(ProductAnalysisState)
-product_analysis_builder.add_node("analyze_product_node", analyze_product_node)
+product_analysis_builder.add_node("analyze_product_node", _node(analyze_product_node))
 product_analysis_builder.add_edge(START, "analyze_product_node")
 product_analysis_builder.add_edge("analyze_product_node", END)
 
@@ -439,8 +992,8 @@ print("product analysis compiled successfully!")
 
 
 influcencer_analysis_builder= StateGraph(MarketingWorkFlowState)
-influcencer_analysis_builder.add_node("analyze_influencers_platforms_node", analyze_influencers_platforms_node)
-influcencer_analysis_builder.add_node("generate_influencer_profiles_node", generate_influencer_profiles_node)
+influcencer_analysis_builder.add_node("analyze_influencers_platforms_node", _node(analyze_influencers_platforms_node))
+influcencer_analysis_builder.add_node("generate_influencer_profiles_node", _node(generate_influencer_profiles_node))
 influcencer_analysis_builder.add_edge(START, "analyze_influencers_platforms_node")
 influcencer_analysis_builder.add_edge("analyze_influencers_platforms_node", "generate_influencer_profiles_node")
 influcencer_analysis_builder.add_edge("generate_influencer_profiles_node", END)
@@ -450,31 +1003,221 @@ print("Influencer analysis app compiled successfully!")
 
 # --- match influencer workflow ---
 recommend_influencer_builder = StateGraph(MarketingWorkFlowState)
-recommend_influencer_builder.add_node("match_influencers_node", match_influencers_node)
+recommend_influencer_builder.add_node("match_influencers_node", _node(match_influencers_node))
 recommend_influencer_builder.add_node("filter_matches_node", filter_matches_node)
 recommend_influencer_builder.add_edge(START, "match_influencers_node")
+recommend_influencer_builder.add_edge("match_influencers_node", "filter_matches_node")
 recommend_influencer_builder.add_edge("filter_matches_node", END)
 recommend_influencer_app = recommend_influencer_builder.compile()
 print("Match influencer app compiled successfully!")
 
 
 # --- Compile Marketing Workflow ---
-workflow_builder = StateGraph(MarketingWorkFlowState)
-
-workflow_builder.add_node("analyze_product_node", analyze_product_node)
-workflow_builder.add_node("analyze_influencers_platforms_node", analyze_influencers_platforms_node)
-workflow_builder.add_node("generate_influencer_profiles_node", generate_influencer_profiles_node)
-workflow_builder.add_node("match_influencers_node", match_influencers_node)
-workflow_builder.add_node("filter_matches_node", filter_matches_node)
-workflow_builder.add_node("generate_emails_node", generate_emails_node)
-
-workflow_builder.add_edge(START, "analyze_product_node")
-workflow_builder.add_edge("analyze_product_node", "analyze_influencers_platforms_node")
-workflow_builder.add_edge("analyze_influencers_platforms_node", "generate_influencer_profiles_node")
-workflow_builder.add_edge("generate_influencer_profiles_node", "match_influencers_node")
-workflow_builder.add_edge("match_influencers_node", "filter_matches_node")
-
-workflow_builder.add_conditional_edges(
+# Node -> nodes it waits for. Product analysis and the influencer branch (platform analysis -> profiles) do not
+# depend on each other, so they run as parallel branches and join before matching. Their errors merge via the
+# error_messages reducer.
+MARKETING_WORKFLOW_NODES = {
+    "analyze_product_node": _node(analyze_product_node),
+    "analyze_influencers_platforms_node": _node(analyze_influencers_platforms_node),
+    "generate_influencer_profiles_node": _node(generate_influencer_profiles_node),
+    "match_influencers_node": _node(match_influencers_node),
+    "filter_matches_node": filter_matches_node,
+    "generate_emails_node": _node(generate_emails_node),
+}
+MARKETING_WORKFLOW_DEPENDENCIES: Dict[str, List[str]] = {
+    "analyze_product_node": [],
+    "analyze_influencers_platforms_node": [],
+    "generate_influencer_profiles_node": ["analyze_influencers_platforms_node"],
+    "match_influencers_node": ["analyze_product_node", "generate_influencer_profiles_node"],
+    "filter_matches_node": ["match_influencers_node"],
+    "generate_emails_node": ["filter_matches_node"],
+}
+
+
+def _workflow_ancestors(target: str) -> List[str]:
+    # target and every node it (transitively) waits for, in MARKETING_WORKFLOW_NODES order
+    needed, frontier = {target}, [target]
+    while frontier:
+        for parent in MARKETING_WORKFLOW_DEPENDENCIES[frontier.pop()]:
+            if parent not in needed:
+                needed.add(parent)
+                frontier.append(parent)
+    return [name for name in MARKETING_WORKFLOW_NODES if name in needed]
+
+
+def _build_marketing_workflow(stop_after: Optional[str] = None) -> StateGraph:
+    """Marketing workflow graph; with stop_after, only that node and its ancestors, ending after it."""
+    node_names = _workflow_ancestors(stop_after) if stop_after else list(MARKETING_WORKFLOW_NODES)
+    builder = StateGraph(MarketingWorkFlowState)
+    for name in node_names:
+        builder.add_node(name, MARKETING_WORKFLOW_NODES[name])
+    for name in node_names:
+        parents = MARKETING_WORKFLOW_DEPENDENCIES[name]
+        if not parents:
+            builder.add_edge(START, name)
+        elif name == "generate_emails_node":
+            # Emails are only generated when the filter selected someone
+            builder.add_conditional_edges(
+                "filter_matches_node",
+                should_generate_emails,
+                {
+                    "generate_emails_node": "generate_emails_node",
+                    END: END
+                }
+            )
+        else:
+            builder.add_edge(parents if len(parents) > 1 else parents[0], name)
+    if stop_after and stop_after != "generate_emails_node":
+        builder.add_edge(stop_after, END)
+    else:
+        builder.add_edge("generate_emails_node", END)
+    return builder
+
+
+workflow_builder = _build_marketing_workflow()
+workflow_app = workflow_builder.compile()
+_partial_workflow_apps: Dict[str, Any] = {}
+
+# --- Durable Workflow Checkpoints ---
+# Full batch runs are checkpointed per node in SQLite (keyed by the run id passed as configurable.thread_id), so a
+# failed run resumes from its last completed node, even after a restart. The saver's connection belongs to an
+# event loop, so it is opened by open_workflow_checkpointer (the API lifespan), not at import time.
+# Checkpoints only matter until a run completes: they are deleted when it does, and runs that failed and were not
+# resumed within WORKFLOW_CHECKPOINT_TTL_SECONDS are deleted when the checkpointer is opened (0 = keep them).
+WORKFLOW_CHECKPOINT_PATH = os.getenv("WORKFLOW_CHECKPOINT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "workflow_checkpoints.sqlite3"))
+WORKFLOW_CHECKPOINT_TTL_SECONDS = float(os.getenv("WORKFLOW_CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+_checkpointed_workflow_apps: Dict[str, Any] = {}
+
+
+async def _prune_stale_runs(checkpointer: AsyncSqliteSaver, ttl_seconds: float) -> List[str]:
+    # A run is stale when its newest checkpoint is older than the TTL; checkpoint "ts" is an ISO-8601 UTC timestamp
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+    newest: Dict[str, datetime] = {}
+    async for checkpoint_tuple in checkpointer.alist(None):
+        run_id = checkpoint_tuple.config["configurable"]["thread_id"]
+        ts = datetime.fromisoformat(checkpoint_tuple.checkpoint["ts"])
+        newest[run_id] = max(ts, newest.get(run_id, ts))
+    stale = [run_id for run_id, ts in newest.items() if ts < cutoff]
+    for run_id in stale:
+        await checkpointer.adelete_thread(run_id)
+    return stale
+
+
+@asynccontextmanager
+async def open_workflow_checkpointer(path: Optional[str] = None) -> AsyncIterator[Any]:
+    """
+    Opens the SQLite checkpointer and compiles the checkpointed marketing workflow used by arun_workflow,
+    aget_workflow_run and aresume_workflow until the block exits. Must run inside the event loop that serves them.
+    """
+    path = path or WORKFLOW_CHECKPOINT_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        if WORKFLOW_CHECKPOINT_TTL_SECONDS:
+            stale = await _prune_stale_runs(checkpointer, WORKFLOW_CHECKPOINT_TTL_SECONDS)
+            if stale:
+                print(f"LG Node: Deleted checkpoints of {len(stale)} run(s) not resumed within {WORKFLOW_CHECKPOINT_TTL_SECONDS:.0f}s.")
+        _checkpointed_workflow_apps["workflow"] = workflow_builder.compile(checkpointer=checkpointer)
+        try:
+            yield _checkpointed_workflow_apps["workflow"]
+        finally:
+            _checkpointed_workflow_apps.pop("workflow", None)
+
+
+def _checkpointed_workflow_app():
+    app = _checkpointed_workflow_apps.get("workflow")
+    if app is None:
+        raise RuntimeError("Workflow checkpointer is not open; run inside `async with open_workflow_checkpointer()` (the API lifespan does this).")
+    return app
+
+
+def marketing_workflow_until(stop_after: Optional[str] = None):
+    """
+    Compiled marketing workflow that runs only what `stop_after` needs and stops after it,
+    e.g. "generate_influencer_profiles_node" skips product analysis, matching and emails. None = the full workflow.
+    """
+    if not stop_after or stop_after == "generate_emails_node":
+        return workflow_app
+    if stop_after not in MARKETING_WORKFLOW_NODES:
+        raise ValueError(f"Unknown workflow node '{stop_after}'. Available: {', '.join(MARKETING_WORKFLOW_NODES)}")
+    if stop_after not in _partial_workflow_apps:
+        _partial_workflow_apps[stop_after] = _build_marketing_workflow(stop_after).compile()
+    return _partial_workflow_apps[stop_after]
+
+
+def _run_config(run_id: str, checkpoint_id: Optional[str] = None) -> Dict[str, Any]:
+    configurable = {"thread_id": run_id}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+async def _completed(app: Any, run_id: str, final_state: Dict[str, Any]) -> Dict[str, Any]:
+    # A completed run can no longer be resumed, so its checkpoints are dropped rather than kept forever
+    await app.checkpointer.adelete_thread(run_id)
+    return final_state
+
+
+async def arun_workflow(initial_state: Dict[str, Any], run_id: str) -> Dict[str, Any]:
+    """
+    Runs the full marketing workflow under run_id, checkpointed. Items failing with retryable errors stop the run
+    (RetryableNodeError) at their node instead of being recorded, so aresume_workflow can retry them.
+    The run's checkpoints are deleted once it completes.
+    """
+    app = _checkpointed_workflow_app()
+    return await _completed(app, run_id, await app.ainvoke({**initial_state, "stop_on_retryable_errors": True}, _run_config(run_id)))
+
+
+async def aget_workflow_run(run_id: str) -> Optional[Dict[str, Any]]:
+    """Latest checkpoint of a run: its state values and the nodes still to run (empty when finished); None if unknown."""
+    snapshot = await _checkpointed_workflow_app().aget_state(_run_config(run_id))
+    if not snapshot.values:
+        return None
+    return {"values": snapshot.values, "next": list(snapshot.next)}
+
+
+async def aresume_workflow(run_id: str, from_node: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Continues a checkpointed run. Without from_node, runs whatever was pending when it stopped (a run that
+    raised mid-way resumes at the failed node). With from_node, re-runs from the latest checkpoint where that node
+    was next, e.g. to retry emails that failed with a 429. Work done before the failure is not repeated:
+    completed nodes come from the checkpoint, and completed items inside a fan-out node (platform analyses,
+    profiles, match results, emails) from the analysis store.
+    Raises KeyError for an unknown (or already completed, hence deleted) run and ValueError when from_node never ran in it.
+    """
+    app = _checkpointed_workflow_app()
+    run = await aget_workflow_run(run_id)
+    if run is None:
+        raise KeyError(run_id)
+    if from_node:
+        async for snapshot in app.aget_state_history(_run_config(run_id)): # Newest first
+            if from_node in snapshot.next:
+                print(f"LG Node: Resuming run {run_id} from {from_node}.")
+                return await _completed(app, run_id, await app.ainvoke(None, snapshot.config))
+        raise ValueError(f"Node '{from_node}' was never scheduled in run {run_id}.")
+    if not run["next"]:
+        print(f"LG Node: Run {run_id} already finished; nothing to resume.")
+        return run["values"]
+    print(f"LG Node: Resuming run {run_id} at {', '.join(run['next'])}.")
+    return await _completed(app, run_id, await app.ainvoke(None, _run_config(run_id)))
+
+
+print("Marketing workflow compiled successfully!")
+
+
+# --- Pipelined Marketing Workflow ---
+# Each influencer moves through platform analysis -> profile on its own, while product analysis runs once,
+# concurrently. The pre-filter shortlist is taken once over every profile (its IDF and top_k only mean something
+# across the whole candidate set); then each shortlisted influencer moves through scoring -> email on its own,
+# instead of waiting at a whole-batch barrier between matching, filtering and emails.
+
+# Scoring tail for a single influencer: match -> filter -> (email if selected)
+influencer_scoring_builder = StateGraph(MarketingWorkFlowState)
+influencer_scoring_builder.add_node("match_influencers_node", _node(match_influencers_node))
+influencer_scoring_builder.add_node("filter_matches_node", filter_matches_node)
+influencer_scoring_builder.add_node("generate_emails_node", _node(generate_emails_node))
+influencer_scoring_builder.add_edge(START, "match_influencers_node")
+influencer_scoring_builder.add_edge("match_influencers_node", "filter_matches_node")
+influencer_scoring_builder.add_conditional_edges(
     "filter_matches_node",
     should_generate_emails,
     {
@@ -482,60 +1225,172 @@ workflow_builder.add_conditional_edges(
         END: END
     }
 )
+influencer_scoring_builder.add_edge("generate_emails_node", END)
+influencer_scoring_app = influencer_scoring_builder.compile()
+
+
+async def run_influencer_pipelines_node(state: MarketingWorkFlowState) -> dict:
+    print("LG Node: --- Running Per-Influencer Pipelines ---")
+    errors: List[str] = []
+    product_task = asyncio.create_task(analyze_product_node(state))
+    influencer_names = _influencer_names(state)
+
+    async def _profile_pipeline(influencer_dict: Dict[str, Any]) -> Dict[str, Any]:
+        return await influencer_app.ainvoke({
+            "product_info": state.product_info,
+            "influencer_data": [influencer_dict],
+            "match_threshold": state.match_threshold,
+            "match_strategy": state.match_strategy,
+            "error_messages": [],
+        })
+
+    async def _scoring_pipeline(influencer_id: str, values: Dict[str, Any], product_update: Dict[str, Any]) -> Dict[str, Any]:
+        print(f"LG Node:   Profile ready for {influencer_names.get(influencer_id, 'UnknownName')}; scoring.")
+        # Already shortlisted, so the pool of one is not pre-filtered again. Each pipeline scores a single
+        # influencer, so "the K best scores" would always include it: only influencers at or above
+        # match_threshold get a rationale.
+        scored = await influencer_scoring_app.ainvoke({**values, "product_tags": product_update["product_tags"], "product_tag_ids": product_update.get("product_tag_ids"),
+                                                       "prefilter_top_k": 0, "prefilter_min_score": 0.0, "rationale_top_k": 0, "error_messages": []})
+        scored["error_messages"] = values.get("error_messages", []) + scored.get("error_messages", [])
+        return scored
+
+    def _collect(influencer_ids: List[str], outcomes: List[Any], results: Dict[str, Dict[str, Any]]) -> None:
+        for influencer_id, outcome in zip(influencer_ids, outcomes):
+            influencer_name = influencer_names.get(influencer_id, "UnknownName")
+            if isinstance(outcome, BaseException):
+                print(f"LG Node:   Pipeline failed for {influencer_name}: {outcome}")
+                errors.append(f"Pipeline error for {influencer_name}: {outcome}")
+                continue # A failed scoring tail keeps the influencer's profile results
+            results[influencer_id] = outcome
+
+    influencer_data_list = state.influencer_data or []
+    pipeline_results: Dict[str, Dict[str, Any]] = {}
+    _collect([inf.get("influencerId", "UnknownId") for inf in influencer_data_list],
+             await asyncio.gather(*(_profile_pipeline(inf) for inf in influencer_data_list), return_exceptions=True),
+             pipeline_results)
+
+    # The product analysis is awaited once, so its failure is reported once rather than by every pipeline
+    try:
+        product_update = await product_task
+    except Exception as e:
+        print(f"LG Node:   Product analysis failed: {e}\n{traceback.format_exc()}")
+        product_update = {"product_tags": None, "error_messages": [f"Product analysis error: {e}"]}
+    errors = product_update.get("error_messages", []) + errors
+    update = {"product_tags": product_update.get("product_tags"), "product_tag_ids": product_update.get("product_tag_ids"),
+              "product_tags_source": product_update.get("product_tags_source"), "influencer_pipeline_results": pipeline_results,
+              "error_messages": errors}
+
+    profiled = {inf_id: values for inf_id, values in pipeline_results.items() if values.get("influencer_profiles")}
+    if not product_update.get("product_tags"):
+        if profiled:
+            print(f"LG Node:   Skipping scoring for {len(profiled)} influencers: product tags unavailable.")
+        return update
+    shortlist_state = state.model_copy(update={
+        "product_tags": product_update["product_tags"], "product_tag_ids": product_update.get("product_tag_ids"),
+        "influencer_profiles": {inf_id: profile for values in profiled.values() for inf_id, profile in values["influencer_profiles"].items()},
+        "influencer_tag_ids": {inf_id: ids for values in profiled.values() for inf_id, ids in (values.get("influencer_tag_ids") or {}).items()},
+    })
+    kept_profiles, scores = await asyncio.to_thread(_prefilter_profiles, shortlist_state)
+    kept_ids = [inf_id for inf_id in kept_profiles if inf_id in profiled]
+    _collect(kept_ids,
+             await asyncio.gather(*(_scoring_pipeline(inf_id, profiled[inf_id], product_update) for inf_id in kept_ids), return_exceptions=True),
+             pipeline_results)
+    update["prefilter_scores"] = scores
+    return update
+
+
+def aggregate_pipeline_results_node(state: MarketingWorkFlowState) -> dict:
+    print("LG Node: --- Aggregating Pipeline Results ---")
+    platform_analysis: Dict[str, Any] = {}
+    influencer_profiles: Dict[str, Any] = {}
+    match_results: List[Any] = []
+    selected_influencers: List[Any] = []
+    generated_emails: List[Any] = []
+    errors: List[str] = []
+
+    # prefilter_scores were set by run_influencer_pipelines_node over the whole candidate set
+    for influencer_id, result in (state.influencer_pipeline_results or {}).items():
+        platform_analysis.update(result.get("platform_analysis") or {})
+        influencer_profiles.update(result.get("influencer_profiles") or {})
+        match_results.extend(result.get("match_results") or [])
+        selected_influencers.extend(result.get("selected_influencers") or [])
+        generated_emails.extend(result.get("generated_emails") or [])
+        errors.extend(result.get("error_messages") or [])
+
+    print(f"LG Node:   Aggregated {len(match_results)} match results, {len(selected_influencers)} selected, {len(generated_emails)} emails.")
+    return {
+        "platform_analysis": platform_analysis,
+        "influencer_profiles": influencer_profiles,
+        "match_results": match_results,
+        "selected_influencers": selected_influencers,
+        "generated_emails": generated_emails,
+        "error_messages": errors,
+    }
 
-workflow_builder.add_edge("generate_emails_node", END)
 
-workflow_app = workflow_builder.compile()
-print("Marketing workflow compiled successfully!")
+pipelined_workflow_builder = StateGraph(MarketingWorkFlowState)
+pipelined_workflow_builder.add_node("run_influencer_pipelines_node", _node(run_influencer_pipelines_node))
+pipelined_workflow_builder.add_node("aggregate_pipeline_results_node", aggregate_pipeline_results_node)
+pipelined_workflow_builder.add_edge(START, "run_influencer_pipelines_node")
+pipelined_workflow_builder.add_edge("run_influencer_pipelines_node", "aggregate_pipeline_results_node")
+pipelined_workflow_builder.add_edge("aggregate_pipeline_results_node", END)
+
+pipelined_workflow_app = pipelined_workflow_builder.compile()
+print("Pipelined marketing workflow compiled successfully!")
 
 
 
 # %%
-def intent_analysis_node(state: IntentAnalysisState) -> Dict[str, Any]: # Return type is a dict of fields to update
-    print("LG Node: --- Analyzing Reply Intent (Pydantic State) ---")
-    
+def _intent_input(state: IntentAnalysisState) -> Optional[Dict[str, Any]]:
     # Access fields as attributes from the Pydantic state model
     subject = state.email_subject
     body = state.email_body
 
     if not body: # Empty string "" is falsy
         print("LG Node: Email body is empty.")
-        # Return a dictionary of the fields to update in the Pydantic state
-        return {"analysis_result": None, "error_message": "Email body is empty."}
+        return None
+
+    return {
+        "email_subject": subject if subject else "N/A",
+        "email_body": body
+    }
+
+
+def _parse_intent_result(parsed_result_dict: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if parsed_result_dict and isinstance(parsed_result_dict, dict) and "cooperation_intent" in parsed_result_dict:
+        print("LG Node:   Intent analysis successful.")
+        return {"analysis_result": parsed_result_dict, "error_message": None}
+    error_msg = "Intent analysis returned invalid or incomplete format."
+    if parsed_result_dict:
+        error_msg += f" Got: {str(parsed_result_dict)[:200]}"
+    print(f"LG Node:   {error_msg}")
+    return {"analysis_result": None, "error_message": error_msg}
 
-    intent_prompt = ChatPromptTemplate.from_template(email_intent_Prompt)
-    # If you had a Pydantic model for the output of email_intent_Prompt (e.g., EmailIntentLLMOutput):
-    # intent_chain = intent_prompt | llm | JsonOutputParser(pydantic_object=EmailIntentLLMOutput)
-    # Then analysis_result could be typed as Optional[EmailIntentLLMOutput] in IntentAnalysisState
-    intent_chain = intent_prompt | llm | JsonOutputParser() # Returns a dict
+
+def _intent_error(e: Exception) -> Dict[str, Any]:
+    # Catches OutputParserException and others
+    error_msg = f"Intent analysis LLM chain exception: {str(e)}"
+    if hasattr(e, 'llm_output') and e.llm_output: # For OutputParserException
+        error_msg += f". LLM Output: '{e.llm_output[:300]}...'"
+    print(f"LG Node:   {error_msg}\n{traceback.format_exc()}")
+    return {"analysis_result": None, "error_message": error_msg}
+
+
+async def intent_analysis_node(state: IntentAnalysisState) -> Dict[str, Any]:
+    print("LG Node: --- Analyzing Reply Intent (Pydantic State) ---")
+
+    input_dict = _intent_input(state)
+    if input_dict is None:
+        return {"analysis_result": None, "error_message": "Email body is empty."}
 
     try:
-        input_dict = {
-            "email_subject": subject if subject else "N/A",
-            "email_body": body
-        }
-        # The result from the LLM chain (after JsonOutputParser) is a dictionary
-        parsed_result_dict: Optional[Dict[str, Any]] = intent_chain.invoke(input_dict)
+        return _parse_intent_result(await _ainvoke_limited(email_intent_chain, input_dict))
+    except Exception as e:
+        return _intent_error(e)
 
-        if parsed_result_dict and isinstance(parsed_result_dict, dict) and "cooperation_intent" in parsed_result_dict:
-            print("LG Node:   Intent analysis successful.")
-            return {"analysis_result": parsed_result_dict, "error_message": None}
-        else:
-            error_msg = "Intent analysis returned invalid or incomplete format."
-            if parsed_result_dict:
-                error_msg += f" Got: {str(parsed_result_dict)[:200]}"
-            print(f"LG Node:   {error_msg}")
-            return {"analysis_result": None, "error_message": error_msg}
-            
-    except Exception as e: # Catches OutputParserException and others
-        error_msg = f"Intent analysis LLM chain exception: {str(e)}"
-        if hasattr(e, 'llm_output') and e.llm_output: # For OutputParserException
-            error_msg += f". LLM Output: '{e.llm_output[:300]}...'"
-        print(f"LG Node:   {error_msg}\n{traceback.format_exc()}")
-        return {"analysis_result": None, "error_message": error_msg}
 # --- Compile Intent Analysis Workflow ---
 intent_workflow_builder = StateGraph(IntentAnalysisState)
-intent_workflow_builder.add_node("analyze_reply_intent_node", intent_analysis_node)
+intent_workflow_builder.add_node("analyze_reply_intent_node", _node(intent_analysis_node))
 intent_workflow_builder.add_edge(START, "analyze_reply_intent_node")
 intent_workflow_builder.add_edge("analyze_reply_intent_node", END)
 
@@ -546,7 +1401,7 @@ print("Intent analysis workflow compiled successfully!")
 # %%
 # --- create email workflow ---
 generate_emails_builder = StateGraph(EmailGenerationState)
-generate_emails_builder.add_node("generate_emails_node", generate_emails_node)
+generate_emails_builder.add_node("generate_emails_node", _node(generate_emails_node))
 generate_emails_builder.add_edge(START, "generate_emails_node")
 generate_emails_builder.add_edge("generate_emails_node", END)
 
@@ -1,5 +1,6 @@
 # %%
-from typing import List, Optional, Dict, Any
+import operator
+from typing import List, Optional, Dict, Any, Annotated, Literal
 from pydantic import BaseModel,Field 
 
 
@@ -54,8 +55,18 @@ class ProductTags(BaseModel):
 class InfluencerRecommendationRequest(BaseModel):
     product_info: Dict[str, Any] # Product information as a dictionary
     product_tags: ProductTags # Product tags are essential for matching
-    influencer_profiles_input: Dict[str, InfluencerProfile] 
+    # Either send full profiles, or refer to profiles already stored server-side by id and/or saved pool name
+    influencer_profiles_input: Optional[Dict[str, InfluencerProfile]] = None
+    influencer_ids: Optional[List[str]] = Field(None, description="Load these profiles from the server-side profile store")
+    pool_name: Optional[str] = Field(None, description="Load the profiles of a saved pool (see /api/influencers/pools)")
+    retrieval_top_k: Optional[int] = Field(None, ge=0, description="Stored profiles only: match just the K nearest profiles from the vector index (0 = off; default VECTOR_RETRIEVAL_TOP_K). Without ids/pool the whole store is searched")
+    # Facet filters over stored platform analyses (see /api/influencers/search), applied before any LLM call
+    facet_filters: Optional[Dict[str, List[str]]] = Field(None, description='e.g. {"language": ["English"], "platform": ["tiktok"]}')
+    facet_terms: Optional[List[str]] = Field(None, description='Terms matched against any facet, e.g. ["US", "female 18-24"]')
     match_threshold: Optional[float] = Field(75.0, ge=0, le=100) # Default 75%, range 0-100
+    prefilter_top_k: Optional[int] = Field(None, ge=0, description="Send at most K best lexical matches to the LLM (0 = no limit; default MATCH_PREFILTER_TOP_K)")
+    prefilter_min_score: Optional[float] = Field(None, ge=0, le=1, description="Minimum lexical pre-score (0-1) to reach the LLM (default MATCH_PREFILTER_MIN_SCORE)")
+    match_strategy: Optional[Literal["single", "two_stage"]] = Field(None, description="two_stage: score-only pass, rationales for the shortlist only (default MATCH_STRATEGY)")
 
 class MatchResult(BaseModel):
     # Matches the output structure of influencer_match_Prompt
@@ -79,13 +90,27 @@ class MarketingWorkFlowState(BaseModel):
 
     # Intermediate & Output Data (Managed by the graph)
     product_tags: Optional[ProductTags] = None
+    product_tag_ids: Optional[List[int]] = None # Canonical tag IDs of product_tags (see tag_vocab.py)
+    product_tags_source: Optional[Literal["cache", "llm"]] = None # Whether product_tags came from the product tag store or a fresh LLM call
     platform_analysis: Optional[Dict[str, Dict[str, PlatformAnalysisResult]]] = None # {"influencer_id": {"platform_name": PlatformAnalysisResult}}
     influencer_profiles: Optional[Dict[str, InfluencerProfile]] = None # {"influencer_id": InfluencerProfile}
+    influencer_tag_ids: Optional[Dict[str, List[int]]] = None # {"influencer_id": canonical tag IDs of the profile}
     match_results: Optional[List[MatchResult]] = None
     selected_influencers: Optional[List[MatchResult]] = None # Influencers passing the match threshold
     generated_emails: Optional[List[GeneratedEmail]] = None # Generated emails for the selected influencers
-    error_messages: List[str] = Field(default_factory=list) # To collect error messages
+    influencer_pipeline_results: Optional[Dict[str, Dict[str, Any]]] = None # Pipelined mode only: {"influencer_id": final per-influencer state}
+    # Nodes return only the errors they raised; operator.add merges them, including from parallel branches.
+    error_messages: Annotated[List[str], operator.add] = Field(default_factory=list) # To collect error messages
     match_threshold: float = Field(default=75.0, description="Match score threshold (e.g., 75.0 for 75%)") # API request uses 75.0, state uses 0.8. Be consistent. Let's use 0-100 scale.
+    # Lexical pre-filter before LLM matching (see relevance.py); None falls back to the env defaults
+    prefilter_top_k: Optional[int] = None
+    prefilter_min_score: Optional[float] = None
+    prefilter_scores: Optional[Dict[str, float]] = None # {"influencer_id": 0-1 pre-score}, for every profile considered
+    match_strategy: Optional[Literal["single", "two_stage"]] = None # None falls back to MATCH_STRATEGY
+    rationale_top_k: Optional[int] = None # Two-stage rationales for the K best scores besides those >= match_threshold; None falls back to MATCH_RATIONALE_TOP_K
+    # Checkpointed runs only: a node whose items failed with rate limits / timeouts / 5xx raises instead of recording
+    # the errors, so the run stops there and a resume retries the failed items (see graph_nodes.RetryableNodeError)
+    stop_on_retryable_errors: bool = False
 
     # class Config:
     #     arbitrary_types_allowed = True # If you use non-Pydantic types directly in state
@@ -96,7 +121,9 @@ class MarketingWorkFlowState(BaseModel):
 class ProductAnalysisState(BaseModel):
     product_info: Dict[str, Any] = Field(..., description="Detailed product information as a dictionary.")
     product_tags: Optional[ProductTags] = None
-    error_message: Optional[str] = None
+    product_tag_ids: Optional[List[int]] = None
+    product_tags_source: Optional[Literal["cache", "llm"]] = None
+    error_messages: Annotated[List[str], operator.add] = Field(default_factory=list) # Same reducer as MarketingWorkFlowState
 
 # --- Intent Analysis State ---
 class IntentAnalysisState(BaseModel):
@@ -116,5 +143,5 @@ class EmailGenerationState(BaseModel): # Using Pydantic BaseModel for state
     # Output of the node
     generated_emails: Optional[List[GeneratedEmail]] = None
     
-    # Common field for errors
-    error_messages: List[str] = Field(default_factory=list)
\ No newline at end of file
+    # Common field for errors (additive, like MarketingWorkFlowState.error_messages)
+    error_messages: Annotated[List[str], operator.add] = Field(default_factory=list)
\ No newline at end of file
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Tuple, Iterable
+
+from langchain_core.prompts import ChatPromptTemplate
+
+# Determine the base directory of this Python script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LLMResponseCache:
+    """
+    Disk-backed (SQLite) cache for parsed LLM chain outputs.
+    Entries expire after `ttl_seconds`; once more than `max_entries` are stored, the least recently used are evicted.
+    Caching can be switched off per chain, and hits/misses are counted per chain (per process).
+    Several processes (e.g. uvicorn workers) can share one cache file: the entry count is always read from the
+    table, never tracked in memory, so eviction stays correct whichever process wrote last. Per-chain switches are
+    stored in the file too, so set_chain_enabled applies to every process; disabled_chains (LLM_CACHE_DISABLED_CHAINS)
+    only sets the default for chains that were never switched.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 50000,
+                 enabled: bool = True, disabled_chains: Optional[Iterable[str]] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.disabled_chains = set(disabled_chains or [])
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, chain TEXT NOT NULL, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache_chains ("
+                " chain TEXT PRIMARY KEY, enabled INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        disabled = os.getenv("LLM_CACHE_DISABLED_CHAINS", "")
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", os.path.join(BASE_DIR, "cache", "llm_cache.sqlite3")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000")),
+            enabled=os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+            disabled_chains=[name.strip() for name in disabled.split(",") if name.strip()],
+        )
+
+    def is_enabled(self, chain_name: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT enabled FROM llm_cache_chains WHERE chain = ?", (chain_name,)).fetchone()
+        if row is not None:
+            return bool(row[0])
+        return chain_name not in self.disabled_chains
+
+    def set_chain_enabled(self, chain_name: str, enabled: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache_chains (chain, enabled, updated_at) VALUES (?, ?, ?)",
+                (chain_name, int(enabled), time.time()),
+            )
+            self._conn.commit()
+
+    def _count(self, chain_name: str, field: str) -> None:
+        self._counters.setdefault(chain_name, {"hits": 0, "misses": 0, "writes": 0})[field] += 1
+
+    def get(self, chain_name: str, key: str) -> Tuple[bool, Any]:
+        """Returns (hit, value). Expired entries count as misses and are removed."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self._count(chain_name, "misses")
+                return False, None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(chain_name, "hits")
+        return True, json.loads(row[0])
+
+    def put(self, chain_name: str, key: str, value: Any) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, chain, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, chain_name, payload, now, now),
+            )
+            if self.max_entries:
+                # Size-bounded LRU: drop the least recently accessed entries beyond max_entries, counted in the
+                # same transaction so entries written by other processes are included
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE rowid IN (SELECT rowid FROM llm_cache ORDER BY last_access ASC"
+                    " LIMIT max(0, (SELECT COUNT(*) FROM llm_cache) - ?))",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+            self._count(chain_name, "writes")
+
+    def clear(self, chain_name: Optional[str] = None) -> int:
+        with self._lock:
+            if chain_name:
+                deleted = self._conn.execute("DELETE FROM llm_cache WHERE chain = ?", (chain_name,)).rowcount
+            else:
+                deleted = self._conn.execute("DELETE FROM llm_cache").rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_chain_entries = dict(self._conn.execute("SELECT chain, COUNT(*) FROM llm_cache GROUP BY chain").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            counters = {name: dict(values) for name, values in self._counters.items()}
+        chains = {}
+        for name in set(per_chain_entries) | set(counters):
+            chain_counters = counters.get(name, {"hits": 0, "misses": 0, "writes": 0})
+            lookups = chain_counters["hits"] + chain_counters["misses"]
+            chains[name] = {
+                **chain_counters,
+                "entries": per_chain_entries.get(name, 0),
+                "hit_rate": round(chain_counters["hits"] / lookups, 4) if lookups else None,
+                "enabled": self.is_enabled(name),
+            }
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "chains": chains,
+        }
+
+
+class CachedChain:
+    """
+    `prompt | llm | parser` with a read-through LLMResponseCache in front of it.
+    The cache key covers the deployment name, the prompt template identity and the rendered prompt,
+    so editing a prompt in prompts.py or switching deployments never serves stale answers.
+    """
+
+    def __init__(self, name: str, template: str, llm, parser, cache: LLMResponseCache, deployment: Optional[str]):
+        self.name = name
+        self.prompt = ChatPromptTemplate.from_template(template)
+        self.runnable = self.prompt | llm | parser
+        self.cache = cache
+        self.deployment = deployment or ""
+        self.template_id = hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+    def _key(self, inputs: Dict[str, Any]) -> str:
+        rendered = self.prompt.format(**inputs)
+        raw = json.dumps([self.deployment, self.name, self.template_id, rendered], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, inputs: Dict[str, Any]) -> Tuple[bool, Any]:
+        if not self.cache.is_enabled(self.name):
+            return False, None
+        return self.cache.get(self.name, self._key(inputs))
+
+    def store(self, inputs: Dict[str, Any], value: Any) -> None:
+        if self.cache.is_enabled(self.name) and value is not None:
+            self.cache.put(self.name, self._key(inputs), value)
+
+    # SQLite calls block, so async callers run them on a worker thread instead of the event loop
+    async def alookup(self, inputs: Dict[str, Any]) -> Tuple[bool, Any]:
+        if not self.cache.enabled:
+            return False, None
+        return await asyncio.to_thread(self.lookup, inputs)
+
+    async def astore(self, inputs: Dict[str, Any], value: Any) -> None:
+        if self.cache.enabled and value is not None:
+            await asyncio.to_thread(self.store, inputs, value)
+
+    async def ainvoke(self, inputs: Dict[str, Any], config=None, limiter: Optional[asyncio.Semaphore] = None,
+                      timeout: Optional[float] = None) -> Any:
+        """
+        Read-through call: a cache hit returns immediately; a miss takes a slot of `limiter` (if given) for the
+        LLM call only, bounded by `timeout` seconds, and stores the parsed result.
+        """
+        hit, value = await self.alookup(inputs)
+        if hit:
+            return value
+        async with limiter or nullcontext():
+            value = await asyncio.wait_for(self.runnable.ainvoke(inputs, config), timeout)
+        await self.astore(inputs, value)
+        return value
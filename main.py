@@ -1,22 +1,35 @@
+import os
+import json
+import asyncio
 import time
 import uuid
+import logging
 import traceback # For detailed error logging if needed
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, APIRouter
+from fastapi import FastAPI, HTTPException, Query, APIRouter, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, ValidationError
 
 # Project-specific imports
-from graph_nodes import workflow_app, intent_app, generate_emails_app, influencer_app,  recommend_influencer_app# Compiled LangGraph apps
+from graph_nodes import workflow_app, intent_app, generate_emails_app, influencer_app,  recommend_influencer_app, pipelined_workflow_app# Compiled LangGraph apps
+from graph_nodes import product_analysis_app, marketing_workflow_until, arun_workflow, aget_workflow_run, aresume_workflow, open_workflow_checkpointer
+from graph_nodes import astream_generated_emails, llm_cache, analysis_store, profile_index, facet_index, tag_vocab, VECTOR_RETRIEVAL_TOP_K
+from analysis_store import artifact_id, product_key
 from graph_state import MarketingWorkFlowState, IntentAnalysisState, PlatformContentData, GeneratedEmail, ProductTags, EmailGenerationState, MatchResult, InfluencerProfile,InfluencerRecommendationRequest
-from product_crawl import run_crawl_task, jobs as crawl_jobs # Crawler task and job store
+from product_crawl import crawl_queue, jobs as crawl_jobs, browser_pool # Crawl executor, job store and warm browser pool
+from crawl_queue import QueueFullError
+from crawl_service import CrawlJobStore
 
 
 
 
+logger = logging.getLogger(__name__)
+
 # --- API Request/Response Pydantic Models ---
 
 # General Response Model
@@ -30,10 +43,12 @@ class ResponseModel(BaseModel):
 class CrawlRequest(BaseModel):
     url: HttpUrl
     platform: str = Field(default="Amazon", description="Platform to crawl, e.g., Amazon, TikTokShop")
+    priority: int = Field(default=0, description="Lower values are crawled first; FIFO within the same priority")
 
 class CrawlJobSubmitResponse(BaseModel):
     jobId: str
     message: str = "Crawl task submitted successfully."
+    queue_position: Optional[int] = None # 1-based position among waiting jobs
     
 class ProductDataResponse(BaseModel): # For crawl result
     platform: Optional[str] = None
@@ -59,10 +74,12 @@ class ProductDataResponse(BaseModel): # For crawl result
 
 class CrawlJobStatusResponse(BaseModel):
     jobId: str
-    status: str # e.g., "submitted", "running", "completed", "failed"
+    status: str # e.g., "queued", "running", "completed", "failed"
     message: Optional[str] = None
     submitted_at: Optional[float] = None
     updated_at: Optional[float] = None
+    queue_position: Optional[int] = None # Only while queued
+    queue_depth: Optional[int] = None # Jobs waiting for a crawl worker
     result: Optional[ProductDataResponse] = None
 
 # --- Product Analysis API Models (Standalone) ---
@@ -95,6 +112,7 @@ class ProductAnalysisOutput(BaseModel):
     CoreContentDirection: Optional[List[str]] = None
     OverallPersonaAndStyle: Optional[List[str]] = None
     MainAudience: Optional[List[str]] = None  
+    product_tags_source: Optional[Literal["cache", "llm"]] = None # "cache": reused from the product tag store
 
 
 # --- Influencer Input Model for Marketing Workflow ---
@@ -120,6 +138,8 @@ class InfluencerAnalysisRequest(BaseModel):
 class InfluencerRecommendationResponseData(BaseModel):
     # match_results: Optional[List[MatchResult]] = None # Raw match results before filtering
     selected_influencers: Optional[List[MatchResult]] = None # Filtered results
+    prefilter_scores: Optional[Dict[str, float]] = None # Lexical pre-score (0-1) of every submitted profile
+    retrieval_scores: Optional[Dict[str, float]] = None # Vector-index similarity of the retrieved profiles (stored-profile requests only)
 
 class InfluencerProfileOutput(BaseModel): # More specific name for the output profile
     # Fields from your influencer_analysis_Prompt output JSON
@@ -144,17 +164,40 @@ class MarketingWorkflowRequest(BaseModel):
     product_info: ProductInputForAnalysis # Using the same detailed product input as for standalone analysis
     influencer_data: List[InfluencerInputForWorkflow]
     match_threshold: Optional[float] = Field(default=75.0, ge=0, le=100, description="Match score threshold (0-100)")
+    execution_mode: Literal["batch", "pipelined"] = Field(
+        default="batch",
+        description="batch: each stage finishes for all influencers before the next starts. "
+                    "pipelined: each influencer runs platform analysis -> profile -> scoring -> email independently."
+    )
+    prefilter_top_k: Optional[int] = Field(default=None, ge=0, description="Send at most K best lexical matches to the LLM matcher (0 = no limit)")
+    prefilter_min_score: Optional[float] = Field(default=None, ge=0, le=1, description="Minimum lexical pre-score (0-1) to reach the LLM matcher")
+    match_strategy: Optional[Literal["single", "two_stage"]] = Field(default=None, description="two_stage: score-only pass, rationales only for the shortlist")
+    stop_after: Optional[Literal[
+        "analyze_product_node", "analyze_influencers_platforms_node", "generate_influencer_profiles_node",
+        "match_influencers_node", "filter_matches_node", "generate_emails_node"
+    ]] = Field(default=None, description="batch mode only: run just this node and the nodes it depends on, then stop")
     
     
+class WorkflowResumeRequest(BaseModel):
+    from_node: Optional[Literal[
+        "analyze_product_node", "analyze_influencers_platforms_node", "generate_influencer_profiles_node",
+        "match_influencers_node", "filter_matches_node", "generate_emails_node"
+    ]] = Field(default=None, description="Re-run from this node instead of continuing where the run stopped")
+
+
 class MarketingWorkflowOutputData(BaseModel):
     # Expose relevant parts of the final MarketingWorkFlowState
     product_tags: Optional[ProductTags] = None # From graph_state.ProductTags
+    product_tags_source: Optional[Literal["cache", "llm"]] = None # "cache": reused from the product tag store
     # platform_analysis: Optional[Dict[str, Dict[str, Any]]] = None # Can be very verbose
     influencer_profiles: Optional[Dict[str, Any]] = None # Dict[influencerId, InfluencerProfile dict]
-    match_results: Optional[List[Dict[str,Any]]] = None # List of MatchResult dicts
-    selected_influencers: Optional[List[Dict[str,Any]]] = None # List of MatchResult dicts
+    match_results: Optional[List[MatchResult]] = None # From graph_state.MatchResult
+    selected_influencers: Optional[List[MatchResult]] = None # From graph_state.MatchResult
+    prefilter_scores: Optional[Dict[str, float]] = None # Lexical pre-score (0-1) per influencerId
     generated_emails: Optional[List[GeneratedEmail]] = None # From graph_state.GeneratedEmail
     workflow_errors: Optional[List[str]] = None
+    run_id: Optional[str] = None # Full batch runs are checkpointed; pass it to /api/marketing/runs/{run_id}/resume
+    pending_nodes: Optional[List[str]] = None # Nodes not yet run (only set for resumed or inspected runs)
 
 # --- Email Intent Analysis API Models ---
 class EmailHistoryItem(BaseModel):
@@ -187,10 +230,50 @@ class EmailCreationRequest(BaseModel):
     selected_influencers: List[MatchResult]
     product_info: Dict[str, Any] # Or a specific Pydantic model like ProductInfoModel
     product_tags: Optional[ProductTags] = None
-    influencer_profiles: Dict[str, InfluencerProfile] # Key is influencerId
+    influencer_profiles: Optional[Dict[str, InfluencerProfile]] = None # Key is influencerId; omit to load the selected influencers' stored profiles
+
+
+# --- Tag Vocabulary API Models ---
+class TagAliasRequest(BaseModel):
+    alias: str = Field(..., description="Spelling or synonym to map, e.g. 'eco-friendly'")
+    canonical: str = Field(..., description="Canonical tag it should resolve to, e.g. '环保'")
+
+
+# --- Artifact Invalidation API Models ---
+class ArtifactInvalidationRequest(BaseModel):
+    product_asin: Optional[str] = Field(None, description="Invalidate the stored tags of this product and everything derived from them")
+    influencer_id: Optional[str] = Field(None, description="Invalidate this influencer's platform analyses, profile and everything derived from them")
+    platform: Optional[str] = Field(None, description="With influencer_id: only invalidate this platform's analysis and its dependents")
+
+
+# --- Influencer Pool API Models ---
+class InfluencerPoolRequest(BaseModel):
+    influencer_ids: List[str] = Field(..., description="IDs of influencers whose profiles are in the server-side store")
+
+
+# --- Crawl Backend ---
+# "thread": crawls run on in-process worker threads (crawl_queue.py).
+# "service": jobs go to a SQLite job store shared with the crawler daemon (`python crawl_service.py`), which runs
+# them in separate, killable worker processes; Chrome never runs inside the API process.
+CRAWL_BACKEND = os.getenv("CRAWL_BACKEND", "thread")
+crawl_job_store = CrawlJobStore.from_env() if CRAWL_BACKEND == "service" else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if browser_pool and not crawl_job_store:
+        browser_pool.warm() # Launches the crawl browsers in the background; startup does not wait for them
+    try:
+        # Durable checkpoints for batch marketing runs; the SQLite connection lives on the server's event loop
+        async with open_workflow_checkpointer():
+            yield
+    finally:
+        if browser_pool:
+            browser_pool.close()
 
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Crossborder LLM API",
     description="API服务用于跨境大语言模型",
     version="0.1.1",
@@ -238,6 +321,10 @@ recommend_influencer_router= APIRouter(prefix="/api/influencers/recommend", tags
 marketing_workflow_router = APIRouter(prefix="/api/marketing", tags=["Marketing Workflow"])
 email_intent_router = APIRouter(prefix="/api/outreachs/intent", tags=["Email Intent"])
 email_create_router = APIRouter(prefix="/api/outreachs/create", tags=["Email Creation"])
+llm_cache_router = APIRouter(prefix="/api/llm/cache", tags=["LLM Cache"])
+influencer_pool_router = APIRouter(prefix="/api/influencers/pools", tags=["Influencer Pools"])
+tag_vocab_router = APIRouter(prefix="/api/tags", tags=["Tag Vocabulary"])
+artifact_router = APIRouter(prefix="/api/artifacts", tags=["Artifacts"])
 
 
 # --- Health Check Endpoints ---
@@ -254,31 +341,46 @@ async def version():
 
 # --- Product Crawl Endpoints ---
 @product_crawl_router.post("", response_model=ResponseModel) # POST to /api/products/crawl
-async def submit_crawl_product_task(
-    request: CrawlRequest, background_tasks: BackgroundTasks
-):
+async def submit_crawl_product_task(request: CrawlRequest):
     job_id = str(uuid.uuid4())
+    if crawl_job_store:
+        try:
+            position = crawl_job_store.submit(job_id, str(request.url), request.platform, priority=request.priority)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        return ResponseModel(
+            success=True,
+            message="Crawl task submitted to the crawler service.",
+            data=CrawlJobSubmitResponse(jobId=job_id, queue_position=position)
+        )
+
     crawl_jobs[job_id] = {
-        "status": "submitted",
+        "status": "queued",
         "product_url": str(request.url),
         "platform": request.platform,
         "submitted_at": time.time(),
         "updated_at": time.time(),
         "result": None,
-        "message": "Task submitted for crawling."
+        "message": "Task queued for crawling."
     }
-    background_tasks.add_task(run_crawl_task, job_id, str(request.url), request.platform)
+    # Runs on the dedicated crawl workers, not on the server's shared threadpool
+    try:
+        position = crawl_queue.submit(job_id, str(request.url), request.platform, priority=request.priority)
+    except QueueFullError as e:
+        crawl_jobs.pop(job_id, None)
+        raise HTTPException(status_code=429, detail=str(e))
     return ResponseModel(
         success=True,
         message="Crawl task submitted successfully.",
-        data=CrawlJobSubmitResponse(jobId=job_id)
+        data=CrawlJobSubmitResponse(jobId=job_id, queue_position=position)
     )
 
 @product_crawl_router.get("", response_model=ResponseModel) # GET to /api/products/crawl
 async def get_crawl_product_result(job_id: str = Query(..., description="The ID of the crawl job")):
-    job_info = crawl_jobs.get(job_id)
+    job_info = crawl_job_store.get(job_id) if crawl_job_store else crawl_jobs.get(job_id)
     if not job_info:
         raise HTTPException(status_code=404, detail="Job ID not found")
+    job_queue = crawl_job_store or crawl_queue
     
     # Ensure result is parsed into ProductDataResponse if completed successfully
     result_data = job_info.get("result")
@@ -303,33 +405,43 @@ async def get_crawl_product_result(job_id: str = Query(..., description="The ID
             message=job_info.get("message"),
             submitted_at=job_info.get("submitted_at"),
             updated_at=job_info.get("updated_at"),
+            queue_position=job_queue.position(job_id) if job_info["status"] == "queued" else None,
+            queue_depth=job_queue.depth(),
             result=parsed_result if parsed_result else result_data # Send parsed or raw
         )
     )
 
+@product_crawl_router.get("/browsers", response_model=ResponseModel) # GET to /api/products/crawl/browsers
+async def get_crawl_browser_pool_stats():
+    if crawl_job_store:
+        return ResponseModel(success=True, message="Crawls run in the crawler service; browsers live in its worker processes.",
+                             data={"queue": crawl_job_store.stats()})
+    if not browser_pool:
+        return ResponseModel(success=True, message="Browser pool disabled (CRAWL_BROWSER_POOL_SIZE=0).", data={"queue": crawl_queue.stats()})
+    return ResponseModel(success=True, message="Crawl browser pool statistics.", data={**browser_pool.stats(), "queue": crawl_queue.stats()})
+
 # --- Product Analysis Endpoint (Standalone - using LangGraph) ---
 @product_analysis_router.post("/analyze", response_model=ResponseModel)
 async def analyze_product_standalone(request_data: ProductInputForAnalysis):
     """
-    Analyzes product information using the `analyze_product_node` from the LangGraph workflow.
+    Analyzes product information with the product analysis graph (only `analyze_product_node`).
     This provides the raw tag output.
     """
     initial_state_dict = {
         "product_info": request_data.model_dump(),
-        "influencer_data": [], # Not needed for this specific task if graph handles it
         "error_messages": [],
     }
     try:
-        # We need to ensure workflow_app can run just the product analysis part
-        # or that invoking it with this state leads to product_tags being populated.
-        # This might involve configuring the graph invocation or using a specific entry point if available.
-        # For simplicity, if 'analyze_product_node' is the first, this should work.
-        final_state_dict = workflow_app.invoke(initial_state_dict)
+        # product_analysis_app contains only the product node, so no influencer, matching or email nodes run.
+        # ainvoke keeps the event loop free while the LLM calls are in flight.
+        final_state_dict = await product_analysis_app.ainvoke(initial_state_dict)
         
         if final_state_dict.get("error_messages") and any("Product analysis" in msg for msg in final_state_dict["error_messages"]):
             raise HTTPException(status_code=500, detail=f"Product analysis failed: {'; '.join(final_state_dict['error_messages'])}")
 
         product_tags_output = final_state_dict.get("product_tags")
+        if isinstance(product_tags_output, BaseModel):
+            product_tags_output = product_tags_output.model_dump()
         if not product_tags_output or not isinstance(product_tags_output, dict):
             # Try to access via Pydantic model if final_state_dict is a MarketingWorkFlowState model_dump
             if isinstance(final_state_dict, dict) and 'product_tags' in final_state_dict and isinstance(final_state_dict['product_tags'], dict):
@@ -341,7 +453,7 @@ async def analyze_product_standalone(request_data: ProductInputForAnalysis):
         return ResponseModel(
             success=True,
             message="Product analysis successful.",
-            data=ProductAnalysisOutput(**product_tags_output) # Directly use dict if keys match
+            data=ProductAnalysisOutput(**product_tags_output, product_tags_source=final_state_dict.get("product_tags_source")) # Directly use dict if keys match
         )
     except HTTPException as http_exc:
         raise http_exc
@@ -382,8 +494,7 @@ async def analyze_influencer_details(request_data: InfluencerAnalysisRequest):
     }
 
     try:
-        # final_state_dict: MarketingWorkFlowState = await influencer_app.ainvoke(initial_state_dict)
-        final_state_dict: MarketingWorkFlowState = influencer_app.invoke(initial_state_dict)
+        final_state_dict: MarketingWorkFlowState = await influencer_app.ainvoke(initial_state_dict)
         
         errors = final_state_dict.get("error_messages", [])
         # influencer_profiles is Dict[str, InfluencerProfile Pydantic model]
@@ -414,26 +525,97 @@ async def analyze_influencer_details(request_data: InfluencerAnalysisRequest):
 
 
 
+def _hydrate_profiles(influencer_ids: List[str]) -> Tuple[Dict[str, InfluencerProfile], Dict[str, str], List[str]]:
+    """
+    Loads profiles persisted by the influencer analysis from the server-side store.
+    Returns (profiles, influencerId -> influencerName, errors for ids that could not be loaded).
+    """
+    stored = analysis_store.get_profiles(influencer_ids)
+    profiles: Dict[str, InfluencerProfile] = {}
+    names: Dict[str, str] = {}
+    errors: List[str] = []
+    for inf_id in dict.fromkeys(influencer_ids):
+        entry = stored.get(inf_id)
+        if entry is None:
+            errors.append(f"No stored profile for influencer {inf_id}; run /api/influencers/analyze first.")
+            continue
+        try:
+            profiles[inf_id] = InfluencerProfile.model_validate(entry["profile"])
+        except ValidationError as e:
+            errors.append(f"Stored profile for influencer {inf_id} is invalid: {e}")
+            continue
+        names[inf_id] = entry["influencerName"] or "UnknownName"
+    return profiles, names, errors
+
+
 @recommend_influencer_router.post("", response_model=ResponseModel)
 async def recommend_influencers_for_product(request_data: InfluencerRecommendationRequest):
     """
     Recommends influencers for a product based on matching and filtering.
     """
+    influencer_profiles = request_data.influencer_profiles_input
+    influencer_data: List[Dict[str, Any]] = []
+    hydration_errors: List[str] = []
+    retrieval_scores: Optional[Dict[str, float]] = None
+    facet_ids: Optional[set] = None
+    if request_data.facet_filters or request_data.facet_terms:
+        await asyncio.to_thread(facet_index.sync, analysis_store) # Analyses stored by other workers since the last search
+        try:
+            facet_ids = facet_index.influencer_ids(request_data.facet_filters, request_data.facet_terms)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        print(f"API: Facet filters matched {len(facet_ids)} influencers.")
+
+    if influencer_profiles is not None and facet_ids is not None:
+        influencer_profiles = {inf_id: profile for inf_id, profile in influencer_profiles.items() if inf_id in facet_ids}
+    if influencer_profiles is None:
+        candidate_ids: Optional[List[str]] = None # None: search every stored profile
+        if request_data.influencer_ids or request_data.pool_name:
+            candidate_ids = list(request_data.influencer_ids or [])
+            if request_data.pool_name:
+                pool_ids = await asyncio.to_thread(analysis_store.get_pool, request_data.pool_name)
+                if pool_ids is None:
+                    raise HTTPException(status_code=404, detail=f"Influencer pool '{request_data.pool_name}' not found")
+                candidate_ids += pool_ids
+        if facet_ids is not None:
+            candidate_ids = sorted(facet_ids) if candidate_ids is None else [inf_id for inf_id in candidate_ids if inf_id in facet_ids]
+
+        retrieval_top_k = request_data.retrieval_top_k if request_data.retrieval_top_k is not None else VECTOR_RETRIEVAL_TOP_K
+        if retrieval_top_k:
+            # Nearest profiles to the product tags; only these are loaded and sent on to matching
+            nearest = await asyncio.to_thread(profile_index.search, request_data.product_tags, retrieval_top_k, candidate_ids)
+            retrieval_scores = dict(nearest)
+            influencer_ids = list(retrieval_scores)
+            hydration_errors += [f"No stored profile for influencer {inf_id}; run /api/influencers/analyze first."
+                                 for inf_id in dict.fromkeys(candidate_ids or []) if inf_id not in profile_index]
+        elif candidate_ids is not None:
+            influencer_ids = candidate_ids
+        else:
+            raise HTTPException(status_code=422, detail="Provide influencer_profiles_input, influencer_ids or pool_name, or enable retrieval")
+        print(f"API: Recommending from {len(influencer_ids)} stored profiles (retrieval_top_k={retrieval_top_k or 'off'}).")
+
+        influencer_profiles, names, load_errors = await asyncio.to_thread(_hydrate_profiles, influencer_ids)
+        hydration_errors += load_errors
+        # Stored names let the matcher report real influencer names
+        influencer_data = [{"influencerId": inf_id, "influencerName": name} for inf_id, name in names.items()]
+
     initial_state_dict: MarketingWorkFlowState = {
         "product_info": request_data.product_info,
         "product_tags": request_data.product_tags, # Pass the Pydantic model directly
-        "influencer_profiles": request_data.influencer_profiles_input, # Pass the dict of Pydantic models
+        "influencer_profiles": influencer_profiles, # Pass the dict of Pydantic models
         "match_threshold": request_data.match_threshold,
-        "error_messages": [],
-        "influencer_data": [], # If node needs original influencer list for names, pass here
+        "prefilter_top_k": request_data.prefilter_top_k,
+        "prefilter_min_score": request_data.prefilter_min_score,
+        "match_strategy": request_data.match_strategy,
+        "error_messages": hydration_errors,
+        "influencer_data": influencer_data, # Used by the matcher for influencer names
         "platform_analysis": None, "match_results": None, 
         "selected_influencers": None, "generated_emails": None,
         "filtered_influencer_data": None
     }
 
     try:
-        # final_state_dict: MarketingWorkFlowState = await match_influencer_app.ainvoke(initial_state_dict)
-        final_state_dict: MarketingWorkFlowState = recommend_influencer_app.invoke(initial_state_dict)
+        final_state_dict: MarketingWorkFlowState = await recommend_influencer_app.ainvoke(initial_state_dict)
         
         errors = final_state_dict.get("error_messages", [])
         # selected_influencers is List[MatchResult Pydantic models]
@@ -441,7 +623,11 @@ async def recommend_influencers_for_product(request_data: InfluencerRecommendati
 
         response_data = None
         if selected_output is not None: # Could be an empty list if no one meets threshold
-            response_data = InfluencerRecommendationResponseData(selected_influencers=selected_output)
+            response_data = InfluencerRecommendationResponseData(
+                selected_influencers=selected_output,
+                prefilter_scores=final_state_dict.get("prefilter_scores"),
+                retrieval_scores=retrieval_scores,
+            )
 
         if errors and selected_output is None: # Only errors and no selection result
              return ResponseModel(success=False, message="Influencer recommendation failed.", data=response_data, errors=errors)
@@ -457,12 +643,31 @@ async def recommend_influencers_for_product(request_data: InfluencerRecommendati
         print(f"API Error during influencer recommendation: {traceback.format_exc()}")
         return ResponseModel(success=False, message=f"Internal server error: {str(e)}", errors=[str(e)])
 
+def _marketing_workflow_output(final_state_dict: Dict[str, Any], run_id: Optional[str] = None, pending_nodes: Optional[List[str]] = None) -> MarketingWorkflowOutputData:
+    # Prepare output data, converting Pydantic models in state back to dicts if needed
+    return MarketingWorkflowOutputData(
+        product_tags=final_state_dict.get("product_tags"), # Already a dict or Pydantic model
+        product_tags_source=final_state_dict.get("product_tags_source"),
+        influencer_profiles=final_state_dict.get("influencer_profiles"),
+        match_results=final_state_dict.get("match_results"),
+        selected_influencers=final_state_dict.get("selected_influencers"),
+        prefilter_scores=final_state_dict.get("prefilter_scores"),
+        generated_emails=final_state_dict.get("generated_emails"),
+        workflow_errors=final_state_dict.get("error_messages"),
+        run_id=run_id,
+        pending_nodes=pending_nodes,
+    )
+
+
 # --- Full Marketing Workflow Endpoint ---
 @marketing_workflow_router.post("/run", response_model=ResponseModel)
-async def run_marketing_workflow(request_data: MarketingWorkflowRequest):
+async def run_marketing_workflow(request_data: MarketingWorkflowRequest, response: Response):
     """
     Runs the full marketing workflow: product analysis, influencer platform analysis,
     profile generation, matching, filtering, and email generation.
+    With stop_after, only that node and the nodes it depends on run.
+    Full batch runs are checkpointed: their id is returned in the X-Run-Id header (and in data.run_id, or
+    detail.run_id when the run fails), for GET /runs/{run_id} and POST /runs/{run_id}/resume.
     """
     # Convert Pydantic models from request to simple dicts for LangGraph state
     product_info_dict = request_data.product_info.model_dump()
@@ -483,30 +688,80 @@ async def run_marketing_workflow(request_data: MarketingWorkflowRequest):
         "product_info": product_info_dict,
         "influencer_data": influencer_data_list_for_state,
         "match_threshold": request_data.match_threshold,
+        "prefilter_top_k": request_data.prefilter_top_k,
+        "prefilter_min_score": request_data.prefilter_min_score,
+        "match_strategy": request_data.match_strategy,
         "error_messages": [],
     }
 
+    run_id = None
+    if request_data.execution_mode == "pipelined":
+        if request_data.stop_after:
+            raise HTTPException(status_code=422, detail="stop_after is only supported in batch execution mode.")
+        marketing_app = pipelined_workflow_app
+    else:
+        marketing_app = marketing_workflow_until(request_data.stop_after)
+        if marketing_app is workflow_app:
+            run_id = uuid.uuid4().hex
+            response.headers["X-Run-Id"] = run_id
     try:
-        final_state_dict = workflow_app.invoke(initial_state_dict)
-        
-        # Prepare output data, converting Pydantic models in state back to dicts if needed
-        output_data = MarketingWorkflowOutputData(
-            product_tags=final_state_dict.get("product_tags"), # Already a dict or Pydantic model
-            influencer_profiles=final_state_dict.get("influencer_profiles"),
-            match_results=final_state_dict.get("match_results"),
-            selected_influencers=final_state_dict.get("selected_influencers"),
-            generated_emails=final_state_dict.get("generated_emails"),
-            workflow_errors=final_state_dict.get("error_messages")
-        )
-        
+        if run_id:
+            final_state_dict = await arun_workflow(initial_state_dict, run_id)
+        else:
+            final_state_dict = await marketing_app.ainvoke(initial_state_dict)
+
         return ResponseModel(
             success=True,
             message="Marketing workflow executed.",
-            data=output_data
+            data=_marketing_workflow_output(final_state_dict, run_id)
         )
     except Exception as e:
         print(f"API Error during marketing workflow: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Error executing marketing workflow: {str(e)}")
+        message = f"Error executing marketing workflow: {str(e)}"
+        if not run_id:
+            raise HTTPException(status_code=500, detail=message)
+        raise HTTPException(
+            status_code=500,
+            detail={"message": message + " Completed steps are checkpointed; resume the run.", "run_id": run_id,
+                    "resume_url": f"/api/marketing/runs/{run_id}/resume"},
+            headers={"X-Run-Id": run_id},
+        )
+
+
+@marketing_workflow_router.get("/runs/{run_id}", response_model=ResponseModel)
+async def get_marketing_workflow_run(run_id: str):
+    """Latest checkpointed state of a batch marketing run and the nodes still pending (completed runs are not kept)."""
+    run = await aget_workflow_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found; it is unknown, completed, or expired.")
+    return ResponseModel(
+        success=True,
+        message="Run finished." if not run["next"] else f"Run pending at: {', '.join(run['next'])}.",
+        data=_marketing_workflow_output(run["values"], run_id, run["next"])
+    )
+
+
+@marketing_workflow_router.post("/runs/{run_id}/resume", response_model=ResponseModel)
+async def resume_marketing_workflow(run_id: str, request_data: Optional[WorkflowResumeRequest] = None):
+    """
+    Continues a checkpointed batch run from its last completed node. With from_node, re-runs from that node
+    (e.g. generate_emails_node after rate-limit errors); items that already succeeded are reused.
+    """
+    from_node = request_data.from_node if request_data else None
+    try:
+        final_state_dict = await aresume_workflow(run_id, from_node)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"API Error while resuming marketing workflow: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Error resuming marketing workflow {run_id}: {str(e)}")
+    return ResponseModel(
+        success=True,
+        message="Marketing workflow resumed.",
+        data=_marketing_workflow_output(final_state_dict, run_id, []) # Completed; its checkpoints are deleted
+    )
 
 
 # --- Email Intent Analysis Endpoint ---
@@ -521,7 +776,7 @@ async def analyze_email_intent(request_data: EmailIntentRequest):
         "error_message": None,
     }
     try:
-        final_state_dict = intent_app.invoke(initial_state_dict)
+        final_state_dict = await intent_app.ainvoke(initial_state_dict)
 
         if final_state_dict.get("error_message"):
             raise HTTPException(status_code=200, detail=f"Email intent analysis failed: {final_state_dict['error_message']}")
@@ -543,22 +798,33 @@ async def analyze_email_intent(request_data: EmailIntentRequest):
 
 
 
+def _email_generation_state(request_data: EmailCreationRequest) -> EmailGenerationState:
+    selected_influencers = request_data.selected_influencers
+    influencer_profiles = request_data.influencer_profiles
+    hydration_errors: List[str] = []
+    if influencer_profiles is None:
+        influencer_profiles, _, hydration_errors = _hydrate_profiles([inf.influencerId for inf in selected_influencers])
+        # Influencers whose profile could not be loaded are already reported once, by the hydration error
+        selected_influencers = [inf for inf in selected_influencers if inf.influencerId in influencer_profiles]
+    # Create an instance of EmailGenerationState Pydantic model
+    return EmailGenerationState(
+        selected_influencers=selected_influencers,
+        product_info=request_data.product_info,
+        product_tags=request_data.product_tags,
+        influencer_profiles=influencer_profiles,
+        error_messages=hydration_errors
+    )
+
+
 @email_create_router.post("", response_model= ResponseModel) # Using your generic ResponseModel is also fine
 async def create_outreach_emails(request_data: EmailCreationRequest):
     """
     Generates outreach emails for selected influencers based on product and profile data.
     """
-    # Create an instance of EmailGenerationState Pydantic model
-    initial_state_obj = EmailGenerationState(
-        selected_influencers=request_data.selected_influencers,
-        product_info=request_data.product_info,
-        product_tags=request_data.product_tags,
-        influencer_profiles=request_data.influencer_profiles,
-        error_messages=[] # Initialize with empty list
-    )
+    initial_state_obj = await asyncio.to_thread(_email_generation_state, request_data) # Profile hydration reads SQLite
 
     try:
-        final_state_obj: EmailGenerationState= generate_emails_app.invoke(initial_state_obj)
+        final_state_obj: EmailGenerationState= await generate_emails_app.ainvoke(initial_state_obj)
 
         # final_errors = final_state_obj.error_messages
         print("################### ",final_state_obj)
@@ -596,6 +862,181 @@ async def create_outreach_emails(request_data: EmailCreationRequest):
             data=None
         )
 
+@email_create_router.post("/stream")
+async def stream_outreach_emails(request_data: EmailCreationRequest):
+    """
+    Streams outreach emails as NDJSON so clients can queue sends immediately.
+    Each line is one of:
+      {"type": "email", "data": GeneratedEmail}   - as soon as an influencer's email is ready
+      {"type": "error", "message": str}           - for influencers whose profile or email failed
+      {"type": "done", "generated": int, "errors": int} - always the last line
+    """
+    async def ndjson_lines():
+        generated_count, error_count = 0, 0
+        try:
+            initial_state_obj = await asyncio.to_thread(_email_generation_state, request_data) # Profile hydration reads SQLite
+            # Influencers whose stored profile could not be loaded get no email; report them first
+            for err in initial_state_obj.error_messages:
+                error_count += 1
+                yield json.dumps({"type": "error", "message": err}, ensure_ascii=False) + "\n"
+            async for email_obj, item_errors in astream_generated_emails(initial_state_obj):
+                if email_obj:
+                    generated_count += 1
+                    yield json.dumps({"type": "email", "data": email_obj.model_dump(mode="json")}, ensure_ascii=False) + "\n"
+                for err in item_errors:
+                    error_count += 1
+                    yield json.dumps({"type": "error", "message": err}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Headers are already sent, so surface the failure in-band instead of as an HTTP error
+            logger.exception("Streaming email generation failed")
+            error_count += 1
+            yield json.dumps({"type": "error", "message": f"Internal server error during email generation: {str(e)}"}, ensure_ascii=False) + "\n"
+        yield json.dumps({"type": "done", "generated": generated_count, "errors": error_count}) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+# --- Influencer Facet Search Endpoint ---
+@influencer_analysis_router.get("/search", response_model=ResponseModel)
+async def search_influencers_by_facets(
+    q: Optional[str] = Query(None, description='Comma-separated terms matched against any facet, e.g. "English, US, female 18-24, unboxing, tiktok"'),
+    language: Optional[List[str]] = Query(None),
+    regionCountry: Optional[List[str]] = Query(None),
+    audienceGender: Optional[List[str]] = Query(None),
+    audienceAge: Optional[List[str]] = Query(None),
+    categoryDepth: Optional[List[str]] = Query(None),
+    contentFormat: Optional[List[str]] = Query(None),
+    platform: Optional[List[str]] = Query(None),
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """
+    Looks up influencers by the facets of their stored platform analyses.
+    Facets are ANDed, repeated values of one facet are ORed, bare terms in `q` may match any facet.
+    """
+    filters = {
+        "language": language, "regionCountry": regionCountry, "audienceGender": audienceGender, "audienceAge": audienceAge,
+        "categoryDepth": categoryDepth, "contentFormat": contentFormat, "platform": platform,
+    }
+    terms = [term.strip() for term in q.split(",")] if q else None
+    await asyncio.to_thread(facet_index.sync, analysis_store) # Analyses stored by other workers since the last search
+    started = time.perf_counter()
+    matches = facet_index.search(filters, terms)
+    took_us = round((time.perf_counter() - started) * 1e6, 1)
+    influencers = [{"influencerId": inf_id, "platforms": platforms} for inf_id, platforms in matches.items()]
+    return ResponseModel(
+        success=True,
+        message=f"Found {len(influencers)} influencers.",
+        data={"total": len(influencers), "took_us": took_us, "influencers": influencers[:limit]},
+    )
+
+
+# --- Influencer Pool Endpoints ---
+@influencer_pool_router.get("", response_model=ResponseModel)
+async def list_influencer_pools():
+    return ResponseModel(success=True, message="Saved influencer pools.", data=await asyncio.to_thread(analysis_store.list_pools))
+
+
+@influencer_pool_router.put("/{pool_name}", response_model=ResponseModel)
+async def save_influencer_pool(pool_name: str, request_data: InfluencerPoolRequest):
+    await asyncio.to_thread(analysis_store.save_pool, pool_name, request_data.influencer_ids)
+    stored = await asyncio.to_thread(analysis_store.get_profiles, request_data.influencer_ids)
+    missing = [inf_id for inf_id in dict.fromkeys(request_data.influencer_ids) if inf_id not in stored]
+    return ResponseModel(
+        success=True,
+        message=f"Pool '{pool_name}' saved." if not missing else f"Pool '{pool_name}' saved; {len(missing)} influencer(s) have no stored profile yet.",
+        data={"name": pool_name, "size": len(set(request_data.influencer_ids)), "missing_profiles": missing},
+    )
+
+
+@influencer_pool_router.get("/{pool_name}", response_model=ResponseModel)
+async def get_influencer_pool(pool_name: str):
+    influencer_ids = await asyncio.to_thread(analysis_store.get_pool, pool_name)
+    if influencer_ids is None:
+        raise HTTPException(status_code=404, detail=f"Influencer pool '{pool_name}' not found")
+    stored = await asyncio.to_thread(analysis_store.get_profiles, influencer_ids)
+    members = [
+        {
+            "influencerId": inf_id,
+            "influencerName": stored[inf_id]["influencerName"] if inf_id in stored else None,
+            "profile_version": stored[inf_id]["version"] if inf_id in stored else None,
+            "profile_updated_at": stored[inf_id]["updated_at"] if inf_id in stored else None,
+        }
+        for inf_id in influencer_ids
+    ]
+    return ResponseModel(success=True, message=f"Influencer pool '{pool_name}'.", data={"name": pool_name, "members": members})
+
+
+@influencer_pool_router.delete("/{pool_name}", response_model=ResponseModel)
+async def delete_influencer_pool(pool_name: str):
+    if not await asyncio.to_thread(analysis_store.delete_pool, pool_name):
+        raise HTTPException(status_code=404, detail=f"Influencer pool '{pool_name}' not found")
+    return ResponseModel(success=True, message=f"Pool '{pool_name}' deleted.")
+
+
+# --- Tag Vocabulary Endpoints ---
+@tag_vocab_router.get("", response_model=ResponseModel)
+async def get_tag_vocabulary_stats():
+    return ResponseModel(success=True, message="Tag vocabulary statistics.", data=await asyncio.to_thread(tag_vocab.stats))
+
+
+@tag_vocab_router.get("/resolve", response_model=ResponseModel)
+async def resolve_tag(tag: str = Query(..., description="Free-text tag")):
+    tag_id = await asyncio.to_thread(tag_vocab.resolve, tag, False)
+    return ResponseModel(
+        success=tag_id is not None,
+        message="Tag resolved." if tag_id is not None else "Tag is not in the vocabulary.",
+        data={"tag": tag, "id": tag_id, "canonical": tag_vocab.canonical(tag_id) if tag_id is not None else None},
+    )
+
+
+@tag_vocab_router.post("/aliases", response_model=ResponseModel)
+async def add_tag_alias(request_data: TagAliasRequest):
+    try:
+        tag_id = await asyncio.to_thread(tag_vocab.add_alias, request_data.alias, request_data.canonical)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return ResponseModel(success=True, message="Alias saved.", data={"alias": request_data.alias, "id": tag_id, "canonical": tag_vocab.canonical(tag_id)})
+
+
+# --- Artifact Endpoints ---
+@artifact_router.post("/invalidate", response_model=ResponseModel)
+async def invalidate_artifacts(request_data: ArtifactInvalidationRequest):
+    """Marks stored artifacts stale together with everything derived from them; the next run recomputes only those."""
+    roots: List[str] = []
+    if request_data.product_asin:
+        roots.append(artifact_id("product", product_key({"asin": request_data.product_asin})))
+    if request_data.influencer_id:
+        if request_data.platform:
+            roots.append(artifact_id("platform", request_data.influencer_id, request_data.platform))
+        else:
+            roots.extend(artifact_id("platform", request_data.influencer_id, platform)
+                         for platform in await asyncio.to_thread(analysis_store.platforms_of, request_data.influencer_id))
+            roots.append(artifact_id("profile", request_data.influencer_id))
+    elif request_data.platform:
+        raise HTTPException(status_code=422, detail="platform requires influencer_id.")
+    if not roots:
+        raise HTTPException(status_code=422, detail="Provide product_asin and/or influencer_id.")
+    invalidated = await asyncio.to_thread(analysis_store.invalidate, roots)
+    return ResponseModel(success=True, message=f"Invalidated {len(invalidated)} artifacts.", data={"invalidated": invalidated})
+
+
+# --- LLM Response Cache Endpoints ---
+@llm_cache_router.get("", response_model=ResponseModel)
+async def get_llm_cache_stats():
+    return ResponseModel(success=True, message="LLM cache statistics.", data=await asyncio.to_thread(llm_cache.stats))
+
+
+@llm_cache_router.put("/chains/{chain_name}", response_model=ResponseModel)
+async def set_llm_cache_chain_enabled(chain_name: str, enabled: bool = Query(..., description="Enable or disable caching for this chain")):
+    await asyncio.to_thread(llm_cache.set_chain_enabled, chain_name, enabled)
+    # Stored in the cache file, so every worker sharing it picks the switch up on its next lookup
+    return ResponseModel(success=True, message=f"LLM cache {'enabled' if enabled else 'disabled'} for chain '{chain_name}' in all workers.")
+
+
+@llm_cache_router.delete("", response_model=ResponseModel)
+async def clear_llm_cache(chain: Optional[str] = Query(None, description="Only clear entries of this chain")):
+    deleted = await asyncio.to_thread(llm_cache.clear, chain)
+    return ResponseModel(success=True, message=f"Removed {deleted} cached LLM responses.", data={"deleted": deleted})
+
 # --- Include Routers ---
 app.include_router(health_router)
 app.include_router(product_crawl_router)
@@ -605,6 +1046,10 @@ app.include_router(recommend_influencer_router)
 app.include_router(marketing_workflow_router)
 app.include_router(email_intent_router)
 app.include_router(email_create_router)
+app.include_router(llm_cache_router)
+app.include_router(influencer_pool_router)
+app.include_router(tag_vocab_router)
+app.include_router(artifact_router)
 
 
 # --- Root Endpoint ---
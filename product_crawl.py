@@ -18,7 +18,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import (
-    StaleElementReferenceException, NoSuchElementException, TimeoutException
+    StaleElementReferenceException, NoSuchElementException, TimeoutException, WebDriverException
 )
 from selenium.webdriver.chrome.service import Service as ChromeService # Updated import
 from webdriver_manager.chrome import ChromeDriverManager # Add this import
@@ -26,6 +26,10 @@ from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
 import uuid # For generating job IDs
 
+from browser_pool import BrowserPool
+from product_parser import apply_raw_product_fields, extract_raw_fields
+from crawl_queue import CrawlQueue
+
 # Determine the base directory of this Python script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -58,14 +62,158 @@ class LogWeek:
 # Global logger instance for the crawler
 crawler_logger = LogWeek().get_logger()
 
+# Evaluated in the page by a single execute_async_script call. Returns the raw texts behind every field of
+# _extract_product_details (same selector chains, in the same order); apply_raw_product_fields does the clean-up.
+# product_parser.extract_raw_fields computes the same dict offline from the page HTML.
+# Collapsed feature bullets are expanded first, and the fields are only read once every clicked expander reports
+# aria-expanded="true" (or after EXPANDER_WAIT_MS, the 0.5 s the WebDriver extraction sleeps after its click).
+PRODUCT_DETAILS_SCRIPT = r"""
+const done = arguments[arguments.length - 1];
+const EXPANDER_WAIT_MS = 500;
+const FEATURE_SECTIONS = ["#feature-bullets", "#productOverview_feature_div"];
+const text = el => el ? (el.innerText || el.textContent || "").trim() : null;
+const visible = el => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const first = sel => document.querySelector(sel);
+const xpathAll = (expr, ctx) => {
+  const result = document.evaluate(expr, ctx || document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  const nodes = [];
+  for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+  return nodes;
+};
+
+const extract = () => {
+  const raw = {};
+
+  raw.title = text(first("#productTitle"));
+
+  raw.asin_th = null;
+  for (const th of document.querySelectorAll("th.prodDetSectionEntry")) {
+    if (text(th).includes("ASIN")) {
+      const td = xpathAll("./following-sibling::td", th)[0];
+      raw.asin_th = td ? text(td) : null;
+      break;
+    }
+  }
+  raw.asin_source = null;
+  if (!raw.asin_th) {
+    const html = document.documentElement.innerHTML;
+    const match = html.match(/ASIN\s*[:=]\s*"([A-Z0-9]{10})"/) || html.match(/"ASIN"\s*:\s*"([A-Z0-9]{10})"/);
+    raw.asin_source = match ? match[1] : null;
+  }
+
+  raw.price = null;
+  for (const sel of ["span.a-price span[aria-hidden='true']", "span.a-price span.a-offscreen", "#priceblock_ourprice",
+                     "#priceblock_dealprice", ".priceToPay span.a-price-whole", ".apexPriceToPay span[aria-hidden='true']"]) {
+    const prices = Array.from(document.querySelectorAll(sel)).filter(visible).map(text).filter(Boolean);
+    if (prices.length) {
+      raw.price = prices[0];
+      const fraction = sel === ".priceToPay span.a-price-whole" ? first(".priceToPay span.a-price-fraction") : null;
+      if (fraction) raw.price += "." + text(fraction);
+      break;
+    }
+  }
+
+  const ratingEl = first("span.a-icon-alt");
+  raw.rating_html = ratingEl ? ratingEl.innerHTML : null;
+  raw.review_text = text(first("#acrCustomerReviewText"));
+  raw.sales_text = text(first("#social-proofing-faceout-title-tk_bought"));
+  raw.availability = text(first("#availability span"));
+  if (!raw.availability && first("#availability")) raw.availability = text(first("#availability"));
+
+  raw.seller_text = null;
+  raw.seller_href = null;
+  for (const sel of ["#sellerProfileTriggerId", "#merchant-info a",
+                     "#tabular-buybox-container .tabular-buybox-text[tabular-attribute-name='Sold by'] a", "#bylineInfo"]) {
+    const el = first(sel);
+    const sellerText = text(el);
+    if (sellerText && !sellerText.includes("Visit") && !sellerText.includes("Store")) {
+      raw.seller_text = sellerText;
+      raw.seller_href = el.href || el.getAttribute("href");
+      break;
+    }
+  }
+
+  raw.image_url = null;
+  for (const sel of ["#landingImage", "#imgBlkFront", "#main-image-container img"]) {
+    const el = first(sel);
+    const src = el ? (el.src || el.getAttribute("data-src")) : null;
+    if (src && !src.startsWith("data:image")) { raw.image_url = src; break; }
+  }
+
+  raw.features = [];
+  for (const sel of FEATURE_SECTIONS) {
+    const parent = first(sel);
+    if (!parent) continue;
+    for (const bullet of parent.querySelectorAll("li span.a-list-item")) {
+      const bulletText = text(bullet);
+      if (bulletText) raw.features.push(bulletText);
+    }
+  }
+
+  raw.descriptions = [];
+  for (const sel of ["#productDescription", "#aplus_feature_div", "#aplus", "#dpx-product-description_feature_div"]) {
+    for (const el of document.querySelectorAll(sel)) if (visible(el)) raw.descriptions.push(text(el));
+  }
+
+  raw.brand = text(first("tr.po-brand > td.a-span9 > span.po-break-word"));
+  raw.byline = text(first("#bylineInfo"));
+
+  raw.listing_date = null;
+  for (const label of ["date first available", "上架时间"]) {
+    const th = xpathAll("//th[normalize-space(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'))='" + label + "']")[0];
+    const td = th ? xpathAll("./following-sibling::td", th)[0] : null;
+    if (td) { raw.listing_date = text(td); break; }
+  }
+
+  raw.bsr_text = null;
+  for (const expr of ["//*[contains(text(),'Best Sellers Rank')]/following-sibling::td/span",
+                      "//*[contains(text(),'Best Sellers Rank')]/parent::li",
+                      "//div[@id='detailBullets_feature_div']//li[contains(., 'Best Sellers Rank')]",
+                      "//ul[contains(@class, 'detail-bullet-list')]//li[contains(., 'Best Sellers Rank')]"]) {
+    const hit = xpathAll(expr).map(text).find(t => t && (t.includes("Best Sellers Rank") || t.includes("亚马逊热销商品排名")));
+    if (hit) { raw.bsr_text = hit; break; }
+  }
+  return raw;
+};
+
+const expanders = [];
+for (const sel of FEATURE_SECTIONS) {
+  const parent = first(sel);
+  const seeMore = parent ? parent.querySelector("a[data-action='a-expander-toggle']") : null;
+  if (visible(seeMore) && seeMore.getAttribute("aria-expanded") !== "true") {
+    seeMore.click();
+    expanders.push(seeMore);
+  }
+}
+const started = Date.now();
+const extractWhenExpanded = () => {
+  const expanded = expanders.every(el => el.getAttribute("aria-expanded") === "true");
+  if (!expanded && Date.now() - started < EXPANDER_WAIT_MS) {
+    setTimeout(extractWhenExpanded, 50);
+    return;
+  }
+  done(extract());
+};
+extractWhenExpanded();
+"""
+
+
+# "script": fields are extracted in the browser (PRODUCT_DETAILS_SCRIPT).
+# "html": only page_source is fetched from the browser and parsed with lxml (product_parser.py).
+CRAWL_EXTRACTOR = os.getenv("CRAWL_EXTRACTOR", "script")
+# When set, the HTML of every crawled product page is saved here, to re-parse later without re-fetching
+CRAWL_HTML_SNAPSHOT_DIR = os.getenv("CRAWL_HTML_SNAPSHOT_DIR", "")
+
+
 class AmazonCrawler:
     PAGE_LOAD_TIMEOUT = 30
     ELEMENT_WAIT_TIMEOUT = 20
     PRODUCT_DETAIL_TIMEOUT = 25 # Increased slightly
 
-    def __init__(self, logger_instance=None): # Removed ui_callback and target_count
+    def __init__(self, logger_instance=None, browser_pool: Optional[BrowserPool] = None): # Removed ui_callback and target_count
         self.logger = logger_instance if logger_instance else crawler_logger
         self.browser = None # Initialize browser later
+        self.browser_pool = browser_pool # When set, browsers are leased from the pool instead of launched per product
 
     def _init_browser(self):
         if self.browser:
@@ -234,7 +382,116 @@ class AmazonCrawler:
             self.log(f"Failed to save screenshot: {ss_err}", "error")
             return None
 
-        # --- Extraction logic (mostly unchanged, copy from your original, ensure self.log is used) ---
+        # --- Extraction: one injected script evaluates every selector in the browser (a single WebDriver round trip),
+        # or, with CRAWL_EXTRACTOR=html, the fetched page HTML is parsed offline.
+        # The per-element WebDriver lookups remain as a fallback if either fails.
+        raw_fields = None
+        page_html = self._page_html(product_url) if CRAWL_EXTRACTOR == "html" or CRAWL_HTML_SNAPSHOT_DIR else None
+        if CRAWL_EXTRACTOR == "html" and page_html:
+            try:
+                raw_fields = extract_raw_fields(page_html, base_url=product_url)
+            except Exception as e:
+                self.log(f"HTML parsing failed for {product_url}, falling back to WebDriver lookups: {e}", "warning")
+        else:
+            try:
+                script_started = time.time()
+                raw_fields = self.browser.execute_async_script(PRODUCT_DETAILS_SCRIPT)
+                self.log(f"Extraction script finished in {(time.time() - script_started) * 1000:.0f} ms for {product_url}", "debug")
+            except WebDriverException as e:
+                self.log(f"Extraction script failed for {product_url}, falling back to WebDriver lookups: {e}", "warning")
+        if isinstance(raw_fields, dict):
+            apply_raw_product_fields(details, raw_fields, product_url)
+            if details['product_title'] == "N/A": self.log(f"Product title not found for {product_url}", "warning")
+            if details['price'] == "N/A": self.log(f"Price not found for {product_url}", "warning")
+            if details['brand_name'] == "N/A": self.log(f"Brand name not found for {product_url}", "warning")
+        else:
+            self._extract_product_details_webdriver(details, product_url)
+        seller_href_for_address = details['seller_url'] if details.get('seller_url', "N/A") != "N/A" else None
+
+        # Seller Address (if seller_url was found and is an Amazon seller profile link)
+        details['seller_address'] = "N/A"
+        if seller_href_for_address and "amazon.com/sp?" in seller_href_for_address: # Check if it's a seller profile page
+            try:
+                self.log(f"Fetching seller address from: {seller_href_for_address}")
+                # It's good practice to GET a new page in a new tab or be careful with navigation
+                # For simplicity, we'll navigate directly. Consider impact on subsequent extractions if this fails.
+                current_product_page_url = self.browser.current_url
+                self.browser.get(seller_href_for_address)
+                WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(
+                    EC.presence_of_element_located((By.ID, "page-section-detail-seller-info")) # Wait for seller info section
+                )
+                address_lines = []
+                # Common selectors for address parts on seller profile page
+                address_elements = self.browser.find_elements(By.CSS_SELECTOR, 
+                    "#page-section-detail-seller-info .a-row .a-spacing-none, #page-section-detail-seller-info span.a-list-item" 
+                ) # This selector is a guess, inspect actual seller page
+                
+                # More specific: Look for "Business Address" or similar label
+                try:
+                    business_address_header = self.browser.find_element(By.XPATH, "//*[contains(text(), 'Business Address') or contains(text(), '详细卖家信息') or contains(text(),'Geschäftsadresse')]")
+                    parent_container = business_address_header.find_element(By.XPATH, "./ancestor::div[contains(@class, 'a-box-inner') or contains(@class, 'spp-detail-section-wrapper')][1]") # Find parent box
+                    
+                    # Extract all text nodes under this parent, attempt to piece together address
+                    # This is complex due_to varied HTML, a simpler approach:
+                    address_spans = parent_container.find_elements(By.XPATH, ".//span[normalize-space()]") # Get all non-empty spans
+                    relevant_texts = []
+                    # Filter out known non-address parts like "Business Name:", "VAT number:" etc.
+                    ignore_keywords = ["business name", "vat number", "trade register number", "customer service address", "phone", "email", "名称", "增值税", "电话"]
+                    
+                    current_line = []
+                    for span in address_spans:
+                        text = span.text.strip()
+                        if text and not any(keyword in text.lower() for keyword in ignore_keywords):
+                            current_line.append(text)
+                        elif current_line: # If we hit a non-address keyword or empty text, and current_line has something
+                            relevant_texts.append(" ".join(current_line))
+                            current_line = []
+                    if current_line: # Append last line
+                        relevant_texts.append(" ".join(current_line))
+
+                    # Heuristic: the longest string is likely the address, or a few concatenated lines
+                    if relevant_texts:
+                        details['seller_address'] = " | ".join(list(dict.fromkeys(relevant_texts))) # Join unique lines
+
+                except NoSuchElementException:
+                    self.log(f"Could not find 'Business Address' section on seller page {seller_href_for_address}", "warning")
+                
+                self.browser.get(current_product_page_url) # Navigate back
+                WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(EC.presence_of_element_located((By.ID, "productTitle"))) # Wait for product page to reload
+
+            except TimeoutException:
+                self.log(f"Timeout loading seller page: {seller_href_for_address}", "warning")
+            except Exception as e:
+                self.log(f"Error fetching/parsing seller address from {seller_href_for_address}: {e}", "warning")
+                # Attempt to navigate back if error occurs
+                try:
+                    self.browser.get(current_product_page_url)
+                    WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(EC.presence_of_element_located((By.ID, "productTitle")))
+                except Exception as nav_back_e:
+                    self.log(f"Failed to navigate back to product page after seller address error: {nav_back_e}", "error")
+
+        return details
+
+    def _page_html(self, product_url: str) -> Optional[str]:
+        """Fetch stage output: the loaded page's HTML, also saved to CRAWL_HTML_SNAPSHOT_DIR when configured."""
+        try:
+            page_html = self.browser.page_source
+        except WebDriverException as e:
+            self.log(f"Could not read page source of {product_url}: {e}", "warning")
+            return None
+        if CRAWL_HTML_SNAPSHOT_DIR:
+            asin_match = re.search(r'/(dp|gp/product)/([A-Z0-9]{10})', product_url)
+            name = f"{asin_match.group(2) if asin_match else uuid.uuid4().hex}_{time.strftime('%Y%m%d-%H%M%S')}.html"
+            try:
+                os.makedirs(CRAWL_HTML_SNAPSHOT_DIR, exist_ok=True)
+                with open(os.path.join(CRAWL_HTML_SNAPSHOT_DIR, name), "w", encoding="utf-8") as f:
+                    f.write(page_html)
+            except OSError as e:
+                self.log(f"Could not save HTML snapshot of {product_url}: {e}", "warning")
+        return page_html
+
+    def _extract_product_details_webdriver(self, details: Dict[str, Any], product_url: str) -> None:
+        """Per-element WebDriver extraction of the loaded product page; fallback when the extraction script fails."""
         # Product Title
         try:
             product_title_elem = self.browser.find_element(By.ID, "productTitle")
@@ -334,7 +591,6 @@ class AmazonCrawler:
             "#tabular-buybox-container .tabular-buybox-text[tabular-attribute-name='Sold by'] a",
             "#bylineInfo"
         ]
-        seller_href_for_address = None
         for selector in seller_selectors:
             try:
                 seller_elem = self.browser.find_element(By.CSS_SELECTOR, selector)
@@ -343,8 +599,6 @@ class AmazonCrawler:
                 if seller_text and "Visit" not in seller_text and "Store" not in seller_text:
                     details['seller'] = seller_text
                     details['seller_url'] = seller_href if seller_href and seller_href.startswith('http') else "N/A"
-                    if details['seller_url'] != "N/A":
-                        seller_href_for_address = details['seller_url']
                     break
             except (NoSuchElementException, StaleElementReferenceException): continue
         
@@ -452,73 +706,11 @@ class AmazonCrawler:
         except Exception as e:
             self.log(f"BSR extraction error: {e}", "warning")
 
-        # Seller Address (if seller_url was found and is an Amazon seller profile link)
-        details['seller_address'] = "N/A"
-        if seller_href_for_address and "amazon.com/sp?" in seller_href_for_address: # Check if it's a seller profile page
-            try:
-                self.log(f"Fetching seller address from: {seller_href_for_address}")
-                # It's good practice to GET a new page in a new tab or be careful with navigation
-                # For simplicity, we'll navigate directly. Consider impact on subsequent extractions if this fails.
-                current_product_page_url = self.browser.current_url
-                self.browser.get(seller_href_for_address)
-                WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(
-                    EC.presence_of_element_located((By.ID, "page-section-detail-seller-info")) # Wait for seller info section
-                )
-                address_lines = []
-                # Common selectors for address parts on seller profile page
-                address_elements = self.browser.find_elements(By.CSS_SELECTOR, 
-                    "#page-section-detail-seller-info .a-row .a-spacing-none, #page-section-detail-seller-info span.a-list-item" 
-                ) # This selector is a guess, inspect actual seller page
-                
-                # More specific: Look for "Business Address" or similar label
-                try:
-                    business_address_header = self.browser.find_element(By.XPATH, "//*[contains(text(), 'Business Address') or contains(text(), '详细卖家信息') or contains(text(),'Geschäftsadresse')]")
-                    parent_container = business_address_header.find_element(By.XPATH, "./ancestor::div[contains(@class, 'a-box-inner') or contains(@class, 'spp-detail-section-wrapper')][1]") # Find parent box
-                    
-                    # Extract all text nodes under this parent, attempt to piece together address
-                    # This is complex due_to varied HTML, a simpler approach:
-                    address_spans = parent_container.find_elements(By.XPATH, ".//span[normalize-space()]") # Get all non-empty spans
-                    relevant_texts = []
-                    # Filter out known non-address parts like "Business Name:", "VAT number:" etc.
-                    ignore_keywords = ["business name", "vat number", "trade register number", "customer service address", "phone", "email", "名称", "增值税", "电话"]
-                    
-                    current_line = []
-                    for span in address_spans:
-                        text = span.text.strip()
-                        if text and not any(keyword in text.lower() for keyword in ignore_keywords):
-                            current_line.append(text)
-                        elif current_line: # If we hit a non-address keyword or empty text, and current_line has something
-                            relevant_texts.append(" ".join(current_line))
-                            current_line = []
-                    if current_line: # Append last line
-                        relevant_texts.append(" ".join(current_line))
-
-                    # Heuristic: the longest string is likely the address, or a few concatenated lines
-                    if relevant_texts:
-                        details['seller_address'] = " | ".join(list(dict.fromkeys(relevant_texts))) # Join unique lines
-
-                except NoSuchElementException:
-                    self.log(f"Could not find 'Business Address' section on seller page {seller_href_for_address}", "warning")
-                
-                self.browser.get(current_product_page_url) # Navigate back
-                WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(EC.presence_of_element_located((By.ID, "productTitle"))) # Wait for product page to reload
-
-            except TimeoutException:
-                self.log(f"Timeout loading seller page: {seller_href_for_address}", "warning")
-            except Exception as e:
-                self.log(f"Error fetching/parsing seller address from {seller_href_for_address}: {e}", "warning")
-                # Attempt to navigate back if error occurs
-                try:
-                    self.browser.get(current_product_page_url)
-                    WebDriverWait(self.browser, self.PRODUCT_DETAIL_TIMEOUT).until(EC.presence_of_element_located((By.ID, "productTitle")))
-                except Exception as nav_back_e:
-                    self.log(f"Failed to navigate back to product page after seller address error: {nav_back_e}", "error")
-
-        return details
-
     def crawl_one_product(self, product_url: str, platform: str = "Amazon"):
         """Crawls a single product URL and returns its details."""
         self.log(f"Starting crawl for single product: {product_url}")
+        if self.browser_pool:
+            return self._crawl_one_product_pooled(product_url, platform)
         try:
             self._init_browser() # Ensure browser is ready
             if not self.browser:
@@ -539,6 +731,29 @@ class AmazonCrawler:
         finally:
             self.quit_browser() # Ensure browser is closed after each single product crawl
 
+    def _crawl_one_product_pooled(self, product_url: str, platform: str):
+        try:
+            with self.browser_pool.lease() as session:
+                self.browser = session.driver
+                try:
+                    product_details = self._extract_product_details(product_url, platform=platform)
+                except Exception as e:
+                    session.broken = True # Don't hand a browser in an unknown state to the next job
+                    self.log(f"Critical error during crawl_one_product for {product_url}: {e}", "error")
+                    self.log(traceback.format_exc(), "error")
+                    return {"error": str(e)}
+                finally:
+                    self.browser = None # The pool owns the browser; quit_browser() must not close it
+        except Exception as e: # No browser could be leased or launched
+            self.log(f"Could not lease a browser for {product_url}: {e}", "error")
+            return {"error": f"Browser could not be initialized: {e}"}
+
+        if product_details:
+            self.log(f"Successfully extracted details for: {product_url}")
+            return product_details
+        self.log(f"Failed to extract details for: {product_url}", "error")
+        return {"error": f"Failed to extract details for {product_url}"}
+
     def quit_browser(self):
         if self.browser:
             try:
@@ -551,6 +766,19 @@ class AmazonCrawler:
 
 
 
+def _launch_browser():
+    # Browser pool factory: the same Chrome setup and ChromeDriver lookup as a standalone crawler
+    crawler = AmazonCrawler(logger_instance=crawler_logger)
+    crawler._init_browser()
+    return crawler.browser
+
+
+# Warm headless Chrome sessions shared by crawl jobs (see browser_pool.py); CRAWL_BROWSER_POOL_SIZE=0 disables it
+browser_pool: Optional[BrowserPool] = (
+    BrowserPool.from_env(_launch_browser, logger=crawler_logger) if int(os.getenv("CRAWL_BROWSER_POOL_SIZE", "2")) > 0 else None
+)
+
+
 # This `jobs` dictionary should ideally be managed by a more robust system
 # (e.g., Redis, a database, or a proper task queue like Celery) for production.
 # For this example, it's kept in memory.
@@ -563,9 +791,8 @@ def run_crawl_task(job_id: str, product_url: str, platform: str):
     
     crawler_instance = None
     try:
-        # Instantiate crawler for each task, or use a shared one carefully.
-        # For simplicity, creating a new one ensures clean state.
-        crawler_instance = AmazonCrawler(logger_instance=crawler_logger)
+        # A new crawler per task keeps per-job state clean; the browser itself is leased from the warm pool.
+        crawler_instance = AmazonCrawler(logger_instance=crawler_logger, browser_pool=browser_pool)
         product_data = crawler_instance.crawl_one_product(product_url, platform)
         
         if product_data and not product_data.get("error"): # Check for no error key or None/empty error
@@ -591,6 +818,9 @@ def run_crawl_task(job_id: str, product_url: str, platform: str):
         jobs[job_id]["updated_at"] = time.time()
         crawler_logger.info(f"Background task finished for job ID: {job_id}, Status: {jobs[job_id]['status']}")
 
+# Bounded crawl executor (see crawl_queue.py); by default one worker per pooled browser
+crawl_queue = CrawlQueue.from_env(run_crawl_task, default_workers=browser_pool.size if browser_pool else 2, logger=crawler_logger)
+
 if __name__=="__main__":
     crawler=AmazonCrawler()
     print(crawler.crawl_one_product("https://www.amazon.com/-/zh/dp/B000I0DBH6/ref=sr_1_1?dib=eyJ2IjoiMSJ9.p0E_WtU98sBXVepmVF2a_cpsXmF6L27Y_MbcSRn7BL2Dbw1I1lG1MZQeXVV1Ldqbc4X3unFqYSrgFD5XSqoXarZm4G6Ch_f-mZYat-8Lm0Q5cuJ2vb_YcAKmwJrKzlCsxXbUCHndhCME3_wKnw-VXv5YjNJCmBqCsJ4oqoBzc1GFlk-xEz_5rr25NU7zjS83rTtvMPY1Gskh0Iq16Fkiii9Yg05mnSqzTHCgn4Uo0iM.dBTbWNsIUF5ndrqLGNf4whF9-7oVTpJzEPFBYRm6ebM&dib_tag=se&qid=1747445681&s=software-intl-ship&sr=1-1"))
\ No newline at end of file
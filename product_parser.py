@@ -0,0 +1,239 @@
+import re
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+# Offline Amazon product page parser: raw HTML (browser.page_source, an HTTP response body or a saved snapshot)
+# -> the same fields as AmazonCrawler._extract_product_details. No browser involved, so pages can be parsed in a
+# process pool, re-parsed without re-fetching, and tested against saved fixtures.
+# (The seller address needs a second page and stays with the crawler.)
+
+_HIDDEN_CLASSES = {"aok-hidden", "a-hidden", "hidden"}
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden")
+_LISTING_DATE_LABELS = ("date first available", "上架时间")
+_BSR_XPATHS = (
+    "//*[contains(text(),'Best Sellers Rank')]/following-sibling::td/span", # Table format
+    "//*[contains(text(),'Best Sellers Rank')]/parent::li", # List format
+    "//div[@id='detailBullets_feature_div']//li[contains(., 'Best Sellers Rank')]",
+    "//ul[contains(@class, 'detail-bullet-list')]//li[contains(., 'Best Sellers Rank')]",
+)
+
+
+def apply_raw_product_fields(details: Dict[str, Any], raw: Dict[str, Any], product_url: str) -> Dict[str, Any]:
+    """
+    Fills `details` from the raw texts of a product page (PRODUCT_DETAILS_SCRIPT in the browser, or
+    extract_raw_fields offline), with the same clean-up (regexes, defaults, "N/A" placeholders) as the
+    per-element WebDriver extraction.
+    """
+    details['product_title'] = raw.get('title') or "N/A"
+
+    asin_match = re.search(r'/(dp|gp/product)/([A-Z0-9]{10})', product_url)
+    details['asin'] = asin_match.group(2) if asin_match else (raw.get('asin_th') or raw.get('asin_source') or "N/A")
+
+    details['price'] = raw.get('price') or "N/A"
+
+    rating_match = re.search(r'(\d+\.\d+|\d+)', raw.get('rating_html') or "")
+    details['rating'] = rating_match.group(1) if rating_match else "N/A"
+
+    review_match = re.search(r'(\d{1,3}(?:,\d{3})*|\d+)', raw.get('review_text') or "")
+    details['review_count'] = review_match.group(1).replace(',', '') if review_match else "0"
+
+    sales_match = re.search(r'(\d{1,3}(?:,\d{3})*k\+|\d{1,3}(?:,\d{3})*|\d+)', raw.get('sales_text') or "") # Handles 1k+, 100+, etc.
+    details['monthly_sales'] = sales_match.group(1).replace(',', '').replace('k+', '000+') if sales_match else "N/A"
+
+    details['availability'] = raw.get('availability') or "N/A"
+
+    details['seller'] = "Amazon" # Default
+    details['seller_url'] = "N/A"
+    if raw.get('seller_text'):
+        details['seller'] = raw['seller_text']
+        seller_href = raw.get('seller_href')
+        details['seller_url'] = seller_href if seller_href and seller_href.startswith('http') else "N/A"
+
+    details['image_url'] = raw.get('image_url') or "N/A"
+    details['features'] = " | ".join(raw.get('features') or []) or "N/A"
+    descriptions = raw.get('descriptions') or []
+    details['description'] = " ".join(descriptions).strip()[:2000] if descriptions else "N/A" # Limit length
+
+    details['brand_name'] = "N/A"
+    if raw.get('brand') is not None:
+        details['brand_name'] = raw['brand']
+    elif raw.get('byline') and ("Visit the" in raw['byline'] or "Brand:" in raw['byline']):
+        details['brand_name'] = raw['byline'].replace("Visit the", "").replace("Brand:", "").strip().split(" Store")[0] # Heuristic
+
+    details['listing_date'] = raw.get('listing_date') or "N/A"
+
+    details["bsr_rank_full_text"] = raw.get('bsr_text') or "N/A"
+    details["bsr_top_category_rank"] = "N/A"
+    if raw.get('bsr_text'):
+        rank_match = re.search(r'#([\d,]+)\s+in', raw['bsr_text']) or re.search(r'商品里排第(\d+)名', raw['bsr_text'])
+        if rank_match:
+            details["bsr_top_category_rank"] = rank_match.group(1).replace(',', '')
+    return details
+
+
+def _text(el: Optional[etree._Element]) -> Optional[str]:
+    # Whitespace-collapsed text, close to what the browser renders for a single element
+    if el is None:
+        return None
+    return " ".join(el.text_content().split())
+
+
+def _visible(el: Optional[etree._Element]) -> bool:
+    # No layout offline: an element counts as visible unless it or an ancestor is hidden by attribute, class or inline style
+    if el is None:
+        return False
+    node = el
+    while node is not None:
+        if node.get("hidden") is not None or _HIDDEN_CLASSES & set((node.get("class") or "").split()):
+            return False
+        if _HIDDEN_STYLE_RE.search(node.get("style") or ""):
+            return False
+        node = node.getparent()
+    return True
+
+
+def _first(doc: etree._Element, selector: str) -> Optional[etree._Element]:
+    found = doc.cssselect(selector)
+    return found[0] if found else None
+
+
+def extract_raw_fields(html: str, base_url: Optional[str] = None) -> Dict[str, Any]:
+    """Raw field texts of a product page; the same keys and selector chains as PRODUCT_DETAILS_SCRIPT."""
+    raw: Dict[str, Any] = {}
+    doc = lxml.html.fromstring(html)
+    etree.strip_elements(doc, "script", "style", "noscript", with_tail=False) # Scripts are not page text
+
+    raw['title'] = _text(_first(doc, "#productTitle"))
+
+    raw['asin_th'] = None
+    for th in doc.cssselect("th.prodDetSectionEntry"):
+        if "ASIN" in _text(th):
+            td = th.xpath("./following-sibling::td")
+            raw['asin_th'] = _text(td[0]) if td else None
+            break
+    raw['asin_source'] = None
+    if not raw['asin_th']:
+        match = re.search(r'ASIN\s*[:=]\s*"([A-Z0-9]{10})"', html) or re.search(r'"ASIN"\s*:\s*"([A-Z0-9]{10})"', html)
+        raw['asin_source'] = match.group(1) if match else None
+
+    raw['price'] = None
+    for selector in ("span.a-price span[aria-hidden='true']", "span.a-price span.a-offscreen", "#priceblock_ourprice",
+                     "#priceblock_dealprice", ".priceToPay span.a-price-whole", ".apexPriceToPay span[aria-hidden='true']"):
+        prices = [_text(el) for el in doc.cssselect(selector) if _visible(el) and _text(el)]
+        if prices:
+            raw['price'] = prices[0]
+            fraction = _first(doc, ".priceToPay span.a-price-fraction") if selector == ".priceToPay span.a-price-whole" else None
+            if fraction is not None:
+                raw['price'] += f".{_text(fraction)}"
+            break
+
+    rating_el = _first(doc, "span.a-icon-alt")
+    raw['rating_html'] = etree.tostring(rating_el, method="text", encoding="unicode", with_tail=False) if rating_el is not None else None
+    raw['review_text'] = _text(_first(doc, "#acrCustomerReviewText"))
+    raw['sales_text'] = _text(_first(doc, "#social-proofing-faceout-title-tk_bought"))
+    raw['availability'] = _text(_first(doc, "#availability span"))
+    if not raw['availability'] and _first(doc, "#availability") is not None:
+        raw['availability'] = _text(_first(doc, "#availability"))
+
+    raw['seller_text'] = None
+    raw['seller_href'] = None
+    for selector in ("#sellerProfileTriggerId", "#merchant-info a",
+                     "#tabular-buybox-container .tabular-buybox-text[tabular-attribute-name='Sold by'] a", "#bylineInfo"):
+        el = _first(doc, selector)
+        seller_text = _text(el)
+        if seller_text and "Visit" not in seller_text and "Store" not in seller_text:
+            raw['seller_text'] = seller_text
+            href = el.get("href")
+            raw['seller_href'] = urljoin(base_url, href) if href and base_url else href
+            break
+
+    raw['image_url'] = None
+    for selector in ("#landingImage", "#imgBlkFront", "#main-image-container img"):
+        el = _first(doc, selector)
+        src = (el.get("src") or el.get("data-src")) if el is not None else None
+        if src and not src.startswith("data:image"):
+            raw['image_url'] = urljoin(base_url, src) if base_url else src
+            break
+
+    # Collapsed "see more" bullets are already in the HTML, so nothing needs expanding
+    raw['features'] = [
+        _text(bullet)
+        for selector in ("#feature-bullets", "#productOverview_feature_div")
+        for parent in doc.cssselect(selector)[:1]
+        for bullet in parent.cssselect("li span.a-list-item")
+        if _text(bullet)
+    ]
+
+    raw['descriptions'] = [
+        _text(el)
+        for selector in ("#productDescription", "#aplus_feature_div", "#aplus", "#dpx-product-description_feature_div")
+        for el in doc.cssselect(selector)
+        if _visible(el)
+    ]
+
+    raw['brand'] = _text(_first(doc, "tr.po-brand > td.a-span9 > span.po-break-word"))
+    raw['byline'] = _text(_first(doc, "#bylineInfo"))
+
+    raw['listing_date'] = None
+    for label in _LISTING_DATE_LABELS:
+        th = doc.xpath(f"//th[normalize-space(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'))='{label}']")
+        td = th[0].xpath("./following-sibling::td") if th else []
+        if td:
+            raw['listing_date'] = _text(td[0])
+            break
+
+    raw['bsr_text'] = None
+    for expr in _BSR_XPATHS:
+        hit = next((t for t in map(_text, doc.xpath(expr)) if t and ("Best Sellers Rank" in t or "亚马逊热销商品排名" in t)), None)
+        if hit:
+            raw['bsr_text'] = hit
+            break
+    return raw
+
+
+def parse_product_html(html: str, product_url: str, platform: str = "Amazon") -> Dict[str, Any]:
+    """Product details from page HTML, in the shape returned by AmazonCrawler.crawl_one_product."""
+    details = {'platform': platform, 'product_url': product_url}
+    apply_raw_product_fields(details, extract_raw_fields(html, base_url=product_url), product_url)
+    details['seller_address'] = "N/A" # Lives on the seller page; only the crawler fetches it
+    return details
+
+
+def _parse_page(page: Tuple[str, str, str]) -> Dict[str, Any]:
+    html, product_url, platform = page
+    try:
+        return parse_product_html(html, product_url, platform)
+    except Exception as e:
+        return {"error": f"Failed to parse {product_url}: {e}", "product_url": product_url, "platform": platform}
+
+
+def parse_many(pages: Iterable[Tuple[str, str, str]], workers: int = 0) -> List[Dict[str, Any]]:
+    """
+    Parses (html, product_url, platform) pages, in order. workers > 1 spreads the parsing over a process pool
+    (lxml parsing is CPU-bound); otherwise pages are parsed in this process. A page that fails to parse
+    yields {"error": ...} instead of stopping the batch.
+    """
+    pages = list(pages)
+    if workers <= 1 or len(pages) < 2:
+        return [_parse_page(page) for page in pages]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_parse_page, pages, chunksize=max(1, len(pages) // (workers * 4))))
+
+
+if __name__ == "__main__":
+    # Re-parse saved snapshots without re-fetching: python product_parser.py page1.html [page2.html ...]
+    # The product URL is taken from <link rel="canonical"> when present.
+    snapshots = []
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        canonical = re.search(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', html)
+        snapshots.append((html, canonical.group(1) if canonical else path, "Amazon"))
+    for result in parse_many(snapshots, workers=min(len(snapshots), 4)):
+        print(json.dumps(result, ensure_ascii=False))
@@ -309,6 +309,49 @@ influencer_match_Prompt="""
 简洁明了: 理由应逻辑清晰，语言精练。"""
 
 
+
+# Two-stage matching, stage 1: score only, no rationale (keeps output to a few tokens per influencer)
+influencer_score_Prompt="""
+# 任务:
+你是网红营销匹配专家。根据【单一商品信息】{product_info} 和【待匹配达人列表】{influencers_to_match}，为**每一个达人**评估其与该商品的匹配度。
+
+# 评估维度:
+内容相关性（coreContentDirection 与商品分类/FeatureTags）、受众契合度（mainAudience 与 AudienceTags）、人设/风格一致性（overallPersonaAndStyle 与商品调性）、场景融入度（UsageScenarioTags）、带货能力（commercialDegree / goodsCarryRating）。
+
+# 输出要求:
+只输出一个JSON列表，每个达人一个对象，**不要输出任何理由或解释**：
+
+```json
+[
+  {{"influencerId": "[达人ID]", "influencerName": "[达人名称]", "match_score": "[88%]"}}
+]
+```
+match_score 为 0%-100% 的百分比字符串：80% 以上为高匹配，50%-79% 为中匹配，50% 以下为低匹配。"""
+
+
+# Two-stage matching, stage 2: rationale only, for the shortlisted influencers whose score is already known
+influencer_rationale_Prompt="""
+# Role:
+你是一位专业的网红营销匹配专家和品牌策略师。
+
+# 任务:
+根据【单一商品信息】{product_info} 和【已评分的达人列表】{influencers_to_explain}，为列表中的**每一个达人**撰写推荐理由，解释其已给出的匹配度评分 `match_score`。不要修改评分。
+
+# 撰写推荐理由 (match_rationale):
+必须具体: 明确指出是哪些达人特征（如“其核心内容为家居生活”）与哪些商品属性（如“该商品为智能家居清洁机器人”）相匹配或不匹配。
+引用证据: 直接引用输入数据中的关键信息点（如标签、分类、风格描述）来支撑判断。
+解释“为什么”: 说明内容相关性、受众契合度、人设/风格一致性、场景融入度等维度上的匹配或不匹配原因。
+简洁明了: 理由应逻辑清晰，语言精练。
+
+# 输出要求:
+只输出一个JSON列表：
+
+```json
+[
+  {{"influencerId": "[达人ID]", "match_rationale": "[详细的推荐理由]"}}
+]
+```"""
+
 collab_email_Prompt="""
 # Role:
 你是一位经验丰富的网红营销专员，擅长撰写个性化、有吸引力的合作邀请邮件。
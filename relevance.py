@@ -0,0 +1,144 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Deterministic, LLM-free relevance between ProductTags and InfluencerProfiles.
+# Used to shortlist candidates before any LLM matching call, so the LLM cost per product is O(K) instead of O(N).
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile("[぀-ヿ一-鿿가-힯]+") # Kana, CJK ideographs, Hangul
+_STOPWORDS = {"a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "or", "by", "at", "is", "are", "s"}
+
+PRODUCT_TAG_FIELDS = ("FeatureTags", "AudienceTags", "UsageScenarioTags", "coreContentDirection")
+PROFILE_TAG_FIELDS = ("coreContentDirection", "potentialBrandType", "mainAudience")
+# List-valued (tag) fields, compared as canonical tag ID sets (see tag_vocab.py)
+PRODUCT_TAG_LIST_FIELDS = PRODUCT_TAG_FIELDS
+PROFILE_TAG_LIST_FIELDS = ("coreContentDirection", "potentialBrandType")
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if obj is None:
+        return {}
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return dict(obj)
+
+
+def _field_texts(obj: Any, fields: Tuple[str, ...]) -> List[str]:
+    data = _as_dict(obj)
+    texts = []
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, (list, tuple)):
+            texts.extend(str(v) for v in value if v)
+    return texts
+
+
+def tag_list(obj: Any, fields: Tuple[str, ...]) -> List[str]:
+    data = _as_dict(obj)
+    return [str(tag) for field in fields if isinstance(data.get(field), (list, tuple)) for tag in data[field] if tag]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens for alphabetic scripts, character bigrams for CJK runs."""
+    text = text.lower()
+    tokens = [t for t in _WORD_RE.findall(text) if t not in _STOPWORDS]
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def product_tokens(product_tags: Any) -> List[str]:
+    return [tok for text in _field_texts(product_tags, PRODUCT_TAG_FIELDS) for tok in tokenize(text)]
+
+
+def profile_tokens(profile: Any) -> List[str]:
+    return [tok for text in _field_texts(profile, PROFILE_TAG_FIELDS) for tok in tokenize(text)]
+
+
+def prefilter_scores(product_tags: Any, profiles: Dict[str, Any]) -> Dict[str, float]:
+    """
+    TF-IDF cosine similarity between the product's tag fields and each profile's
+    coreContentDirection / potentialBrandType / mainAudience, computed as one matrix-vector product.
+    Returns {influencerId: score in [0, 1]}.
+    """
+    if not profiles:
+        return {}
+    influencer_ids = list(profiles.keys())
+    docs = [profile_tokens(profiles[inf_id]) for inf_id in influencer_ids]
+    query = product_tokens(product_tags)
+
+    vocab: Dict[str, int] = {}
+    for tokens in docs + [query]:
+        for tok in tokens:
+            vocab.setdefault(tok, len(vocab))
+    if not vocab or not query:
+        return {inf_id: 0.0 for inf_id in influencer_ids}
+
+    counts = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, tokens in enumerate(docs):
+        if tokens:
+            np.add.at(counts[row], [vocab[tok] for tok in tokens], 1.0)
+    query_counts = np.zeros(len(vocab), dtype=np.float32)
+    np.add.at(query_counts, [vocab[tok] for tok in query], 1.0)
+
+    # Smoothed IDF over the candidate pool (the product counts as one extra document)
+    df = (counts > 0).sum(axis=0) + (query_counts > 0)
+    idf = np.log((1.0 + len(docs) + 1) / (1.0 + df)) + 1.0
+
+    matrix = np.log1p(counts) * idf
+    query_vec = np.log1p(query_counts) * idf
+    matrix_norms = np.linalg.norm(matrix, axis=1)
+    query_norm = np.linalg.norm(query_vec)
+    denom = np.where(matrix_norms > 0, matrix_norms * query_norm, 1.0)
+    scores = (matrix @ query_vec) / denom
+    return {inf_id: round(float(score), 4) for inf_id, score in zip(influencer_ids, scores)}
+
+
+def shortlist(scores: Dict[str, float], top_k: Optional[int] = None, min_score: Optional[float] = None) -> List[str]:
+    """IDs ordered by score (desc), keeping those >= min_score and at most top_k of them."""
+    ranked = sorted(scores, key=lambda inf_id: scores[inf_id], reverse=True)
+    if min_score is not None:
+        ranked = [inf_id for inf_id in ranked if scores[inf_id] >= min_score]
+    if top_k is not None and top_k > 0:
+        ranked = ranked[:top_k]
+    return ranked
+
+
+# Set bits per byte value, so popcounts of packed bitsets are table lookups
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint16)
+
+
+def tag_bitsets(tag_id_lists: List[List[int]], width: int) -> np.ndarray:
+    """One packed bitset row (uint8, `width` bits) per canonical tag ID list; IDs outside [0, width) are ignored."""
+    bits = np.zeros((len(tag_id_lists), max(width, 1)), dtype=bool)
+    for row, tag_ids in enumerate(tag_id_lists):
+        ids = np.fromiter(tag_ids, dtype=np.int64)
+        bits[row, ids[(ids >= 0) & (ids < width)]] = True
+    return np.packbits(bits, axis=1)
+
+
+def tag_overlap_scores(product_ids: List[int], profile_ids: Dict[str, List[int]]) -> Dict[str, float]:
+    """
+    Overlap coefficient |A & B| / min(|A|, |B|) between canonical tag ID sets, in [0, 1].
+    Only the product's tags can be shared, so bit columns are the product's distinct tags rather than global tag IDs:
+    all profiles are packed into one N x |product tags| bitset matrix (independent of vocabulary size) and the
+    shared counts are a single vectorized popcount.
+    """
+    influencer_ids = list(profile_ids)
+    if not influencer_ids:
+        return {}
+    columns = {tag_id: column for column, tag_id in enumerate(dict.fromkeys(product_ids))}
+    matrix = tag_bitsets([[columns[tag_id] for tag_id in profile_ids[inf_id] if tag_id in columns] for inf_id in influencer_ids],
+                         len(columns))
+    shared = _POPCOUNT[matrix].sum(axis=1)
+    smaller = np.minimum(np.fromiter((len(set(profile_ids[inf_id])) for inf_id in influencer_ids), dtype=np.int64, count=len(influencer_ids)),
+                         len(columns))
+    scores = np.divide(shared, smaller, out=np.zeros(len(influencer_ids)), where=smaller > 0)
+    return {inf_id: round(float(score), 4) for inf_id, score in zip(influencer_ids, scores)}
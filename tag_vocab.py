@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import sqlite3
+import difflib
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+# Determine the base directory of this Python script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_SEPARATORS_RE = re.compile(r"[\s_\-/·・]+")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_tag(tag: str) -> str:
+    """'  Eco-Friendly! ' -> 'eco friendly'; full-width characters are folded by NFKC."""
+    text = unicodedata.normalize("NFKC", str(tag)).lower()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SEPARATORS_RE.sub(" ", text).strip()
+
+
+class TagVocabulary:
+    """
+    Persisted (SQLite) vocabulary mapping free-text tags to canonical integer IDs.
+    Resolution order: exact normalized alias -> fuzzy match (difflib ratio >= fuzzy_cutoff) against canonical
+    tags sharing the first character -> registration of a new canonical tag. Fuzzy hits are saved as aliases,
+    so each spelling is only fuzzy-matched once.
+    Several processes can share one file: SQLite assigns tag IDs, a tag or alias registered concurrently elsewhere
+    wins and is re-read, and a lookup miss first loads rows other processes added since the last load.
+    """
+
+    def __init__(self, path: str, fuzzy_cutoff: float = 0.85):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, canonical TEXT NOT NULL UNIQUE, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tag_aliases (alias TEXT PRIMARY KEY, tag_id INTEGER NOT NULL, source TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        # Canonical ids are small positive integers, so they double as bit positions
+        self._canonical: Dict[int, str] = {}
+        self._aliases: Dict[str, int] = {}
+        self._by_initial: Dict[str, List[str]] = {}
+        self._canonical_ids: Dict[str, int] = {}
+        self._alias_rowid = 0 # Last tag_aliases rowid loaded
+        with self._lock:
+            self._refresh()
+
+    @classmethod
+    def from_env(cls) -> "TagVocabulary":
+        return cls(
+            path=os.getenv("TAG_VOCAB_PATH", os.path.join(BASE_DIR, "cache", "tag_vocab.sqlite3")),
+            fuzzy_cutoff=float(os.getenv("TAG_FUZZY_CUTOFF", "0.85")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def _index_canonical(self, tag_id: int, canonical: str) -> None:
+        if canonical in self._canonical_ids:
+            return
+        self._canonical[tag_id] = canonical
+        self._canonical_ids[canonical] = tag_id
+        self._by_initial.setdefault(canonical[0], []).append(canonical)
+
+    def _refresh(self) -> None:
+        # Loads tags and aliases added (by any process) since the last load; caller holds self._lock
+        last_tag_id = max(self._canonical, default=0)
+        for tag_id, canonical in self._conn.execute("SELECT id, canonical FROM tags WHERE id > ? ORDER BY id", (last_tag_id,)):
+            self._index_canonical(tag_id, canonical)
+        for rowid, alias, tag_id in self._conn.execute(
+            "SELECT rowid, alias, tag_id FROM tag_aliases WHERE rowid > ? ORDER BY rowid", (self._alias_rowid,)
+        ):
+            self._aliases[alias] = tag_id
+            self._alias_rowid = rowid
+
+    def _save_alias(self, alias: str, tag_id: int, source: str, replace: bool = False) -> int:
+        """Saves alias -> tag_id and returns the ID the alias maps to: an alias another process saved first is kept, unless replace."""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self._conn.execute(f"{verb} INTO tag_aliases (alias, tag_id, source) VALUES (?, ?, ?)", (alias, tag_id, source))
+        self._conn.commit()
+        tag_id = self._conn.execute("SELECT tag_id FROM tag_aliases WHERE alias = ?", (alias,)).fetchone()[0]
+        self._aliases[alias] = tag_id
+        return tag_id
+
+    def _register(self, canonical: str) -> int:
+        # SQLite assigns the id; if another process registered the same tag first, its row is reused
+        self._conn.execute("INSERT OR IGNORE INTO tags (canonical, created_at) VALUES (?, ?)", (canonical, time.time()))
+        tag_id = self._conn.execute("SELECT id FROM tags WHERE canonical = ?", (canonical,)).fetchone()[0]
+        self._index_canonical(tag_id, canonical)
+        return self._save_alias(canonical, tag_id, "canonical", replace=True)
+
+    def resolve(self, tag: str, register: bool = True) -> Optional[int]:
+        """
+        Canonical ID of a tag; None if the tag is empty, or unknown and register=False.
+        With register=False nothing is written: fuzzy matches are returned but not saved as aliases.
+        """
+        norm = normalize_tag(tag)
+        if not norm:
+            return None
+        tag_id = self._aliases.get(norm)
+        if tag_id is not None:
+            return tag_id
+        with self._lock:
+            self._refresh() # Another thread or process may have registered it meanwhile
+            tag_id = self._aliases.get(norm)
+            if tag_id is not None:
+                return tag_id
+            close = difflib.get_close_matches(norm, self._by_initial.get(norm[0], []), n=1, cutoff=self.fuzzy_cutoff)
+            if close:
+                tag_id = self._canonical_ids[close[0]]
+                return self._save_alias(norm, tag_id, "fuzzy") if register else tag_id
+            if not register:
+                return None
+            return self._register(norm)
+
+    def ids(self, tags: Iterable[str], register: bool = True) -> List[int]:
+        """Sorted, de-duplicated canonical IDs of a tag list."""
+        resolved = (self.resolve(tag, register) for tag in tags if tag)
+        return sorted({tag_id for tag_id in resolved if tag_id is not None})
+
+    def add_alias(self, alias: str, canonical: str) -> int:
+        """Maps `alias` onto `canonical` (registering the canonical tag if needed). Returns the canonical ID."""
+        norm_alias, norm_canonical = normalize_tag(alias), normalize_tag(canonical)
+        if not norm_alias or not norm_canonical:
+            raise ValueError("Alias and canonical tag must not be empty")
+        with self._lock:
+            self._refresh()
+            tag_id = self._canonical_ids.get(norm_canonical)
+            if tag_id is None:
+                tag_id = self._register(norm_canonical)
+            return self._save_alias(norm_alias, tag_id, "manual", replace=True)
+
+    def canonical(self, tag_id: int) -> Optional[str]:
+        return self._canonical.get(tag_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "canonical_tags": len(self._canonical), "aliases": len(self._aliases), "fuzzy_cutoff": self.fuzzy_cutoff}
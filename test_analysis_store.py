@@ -0,0 +1,88 @@
+# test_analysis_store.py
+# Fingerprints and keys of the analysis store, change detection on put, and dependency-driven invalidation
+# (platform -> profile -> match -> email).
+from analysis_store import AnalysisStore, artifact_id, change_ratio, content_item_key, fingerprint, product_key
+
+POST = {"content_url": "https://tiktok.example/p/1", "content_title": "Trail day", "publish_date": "2024-05-01", "likes": 10}
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+    assert fingerprint({"a": 1, "b": [1, 2]}) != fingerprint({"a": 1, "b": [2, 1]})
+
+
+def test_posts_are_identified_without_engagement_counts():
+    assert content_item_key(POST) == content_item_key({**POST, "likes": 9000})
+    no_url = {**POST, "content_url": None}
+    assert content_item_key(no_url) == content_item_key({**no_url, "likes": 9000})
+    assert content_item_key(no_url) != content_item_key({**no_url, "publish_date": "2024-05-02"})
+
+    assert change_ratio([], []) == 0.0
+    assert change_ratio(["a", "b"], ["b", "a"]) == 0.0
+    assert change_ratio(["a", "b", "c"], ["a", "b", "d"]) == 0.5
+    assert change_ratio(["a"], ["b"]) == 1.0
+
+
+def test_product_key_prefers_the_asin():
+    assert product_key({"asin": " b0test0001 ", "product_title": "Tent"}) == "asin:B0TEST0001"
+    no_asin = {"product_title": "Ultralight  Tent", "features": "2 person", "brand_name": "Acme", "price": "$99"}
+    assert product_key(no_asin).startswith("hash:")
+    # Whitespace, case and non-content fields do not change the key; the title does
+    assert product_key(no_asin) == product_key({**no_asin, "product_title": "ultralight tent", "price": "$79"})
+    assert product_key(no_asin) != product_key({**no_asin, "product_title": "Heavy Tent"})
+
+
+def test_product_tags_are_dropped_when_the_product_content_changes(tmp_path):
+    store = AnalysisStore(str(tmp_path / "store.sqlite3"))
+    product = {"asin": "B0TEST0001", "product_title": "Tent", "price": "$99"}
+    tags = {"FeatureTags": ["camping gear"]}
+
+    assert store.put_product_tags(product, tags) is True
+    assert store.put_product_tags({**product, "price": "$79"}, tags) is False
+    assert store.get_product_tags({**product, "price": "$59"})["tags"] == tags
+    assert store.get_product_tags({**product, "product_title": "Tent v2"}) is None
+
+
+def test_profile_version_is_bumped_only_on_change(tmp_path):
+    store = AnalysisStore(str(tmp_path / "store.sqlite3"))
+
+    assert store.put_profile("inf_1", "Ann", "fp1", {"mainAudience": "hikers"}) is True
+    assert store.put_profile("inf_1", "Ann", "fp2", {"mainAudience": "hikers"}) is False
+    assert store.get_profile("inf_1")["version"] == 1
+    assert store.put_profile("inf_1", "Ann", "fp3", {"mainAudience": "climbers"}) is True
+    assert store.get_profile("inf_1")["version"] == 2 and store.get_profile("inf_1")["source_fingerprint"] == "fp3"
+
+
+def test_match_results_are_reused_only_for_the_same_profile(tmp_path):
+    store = AnalysisStore(str(tmp_path / "store.sqlite3"))
+    store.put_match_results("product_fp", [("inf_1", "profile_a", {"matchScore": "90%"}), ("inf_2", "profile_b", {"matchScore": "40%"})])
+
+    found = store.get_match_results("product_fp", {"inf_1": "profile_a", "inf_2": "profile_b_changed", "inf_3": "profile_c"})
+
+    assert found == {"inf_1": {"matchScore": "90%"}}
+    assert store.get_match_results("other_product_fp", {"inf_1": "profile_a"}) == {}
+
+
+def test_invalidation_follows_platform_profile_match_email(tmp_path):
+    store = AnalysisStore(str(tmp_path / "store.sqlite3"))
+    store.put_platform_analysis("inf_1", "tiktok", [POST], {"analysis": "hiking"})
+    store.put_profile("inf_1", "Ann", "source_fp", {"mainAudience": "hikers"})
+    store.put_match_results("product_fp", [("inf_1", "profile_fp", {"matchScore": "90%"}), ("inf_2", "profile_fp2", {"matchScore": "80%"})])
+    platform, profile = artifact_id("platform", "inf_1", "tiktok"), artifact_id("profile", "inf_1")
+    match, email = artifact_id("match", "product_fp", "inf_1"), artifact_id("email", "product_fp", "inf_1")
+    other_email = artifact_id("email", "product_fp", "inf_2")
+    store.record_dependencies([(profile, platform), (match, profile)])
+    store.put_artifact(email, "email_fp", {"emailSubject": "Hi"}, depends_on=[match])
+    store.put_artifact(other_email, "email_fp2", {"emailSubject": "Hello"}, depends_on=[artifact_id("match", "product_fp", "inf_2")])
+
+    affected = store.invalidate([platform], include_self=False)
+
+    assert affected == [profile, match, email]
+    assert store.get_platform_analysis("inf_1", "tiktok")["fingerprint"] != "" # Not included itself
+    assert store.get_profile("inf_1")["source_fingerprint"] == "" and store.get_profile("inf_1")["profile"] # Kept, but stale
+    assert store.get_match_results("product_fp", {"inf_1": "profile_fp", "inf_2": "profile_fp2"}) == {"inf_2": {"matchScore": "80%"}}
+    assert store.get_artifact(email, "email_fp") is None
+    assert store.get_artifact(other_email, "email_fp2") == {"emailSubject": "Hello"}
+
+    assert store.invalidate([platform]) == [platform, profile, match, email]
+    assert store.get_platform_analysis("inf_1", "tiktok")["fingerprint"] == ""
@@ -0,0 +1,128 @@
+# test_browser_pool.py
+# Warm browser pool with fake drivers: reuse, recycling after max_pages, replacing broken or crashed browsers,
+# the size bound, and close().
+import threading
+import time
+
+import pytest
+
+from browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Minimal WebDriver: current_url is the health check, quit() is recorded."""
+
+    def __init__(self, number):
+        self.number = number
+        self.crashed = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.crashed:
+            raise ConnectionError("browser is gone")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverFactory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver(len(self.drivers))
+        self.drivers.append(driver)
+        return driver
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_leases_reuse_a_warm_browser():
+    factory = DriverFactory()
+    pool = BrowserPool(factory, size=1, max_pages=10, max_rss_mb=0)
+    pool.warm()
+    _wait_for(lambda: pool.stats()["idle"] == 1)
+
+    for _ in range(3):
+        with pool.lease() as session:
+            assert session.driver is factory.drivers[0]
+
+    assert len(factory.drivers) == 1
+    assert pool.stats()["leases"] == 3 and pool.stats()["launched"] == 1
+
+
+def test_browser_is_recycled_after_max_pages():
+    factory = DriverFactory()
+    pool = BrowserPool(factory, size=1, max_pages=2, max_rss_mb=0)
+
+    for _ in range(2):
+        with pool.lease():
+            pass
+    _wait_for(lambda: pool.stats()["idle"] == 1) # The replacement launches in the background
+
+    assert factory.drivers[0].quit_called
+    with pool.lease() as session:
+        assert session.driver is factory.drivers[1] and session.pages == 0
+    assert pool.stats()["recycled"] == 1 and pool.stats()["alive"] == 1
+
+
+def test_failed_lease_and_crashed_idle_browser_are_replaced():
+    factory = DriverFactory()
+    pool = BrowserPool(factory, size=1, max_pages=0, max_rss_mb=0)
+
+    with pytest.raises(ValueError):
+        with pool.lease():
+            raise ValueError("page blew up")
+    _wait_for(lambda: pool.stats()["idle"] == 1)
+    assert factory.drivers[0].quit_called and pool.stats()["replaced"] == 1
+
+    factory.drivers[1].crashed = True # Dies while idle: caught by the health check on the next lease
+    with pool.lease() as session:
+        assert session.driver is factory.drivers[2]
+    assert pool.stats()["replaced"] == 2 and pool.stats()["alive"] == 1
+
+
+def test_lease_waits_for_a_free_browser_and_times_out():
+    pool = BrowserPool(DriverFactory(), size=1, max_pages=0, max_rss_mb=0, lease_timeout=0.2)
+
+    with pool.lease() as first:
+        with pytest.raises(TimeoutError): # The only browser is leased
+            with pool.lease():
+                pass
+
+    pool.lease_timeout = 5
+    result = {}
+
+    def _waiting_lease():
+        with pool.lease() as session:
+            result["session"] = session
+    with pool.lease():
+        waiter = threading.Thread(target=_waiting_lease)
+        waiter.start()
+        time.sleep(0.05)
+        assert "session" not in result # Blocked until the lease above is returned
+    waiter.join(5)
+    assert result["session"] is first
+
+
+def test_close_quits_idle_browsers_and_rejects_leases():
+    factory = DriverFactory()
+    pool = BrowserPool(factory, size=2, max_pages=0, max_rss_mb=0)
+    pool.warm()
+    _wait_for(lambda: pool.stats()["idle"] == 2)
+
+    pool.close()
+
+    assert all(driver.quit_called for driver in factory.drivers)
+    assert pool.stats()["alive"] == 0
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
@@ -0,0 +1,79 @@
+# test_crawl_queue.py
+# Bounded crawl executor: priority then FIFO order, queue positions, QueueFullError, and workers surviving a failing job.
+import threading
+
+import pytest
+
+from crawl_queue import CrawlQueue, QueueFullError
+
+
+class BlockingHandler:
+    """Records job order; every job waits until `release` is set, so jobs can be queued behind a busy worker."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.order = []
+        self.expected = 0
+
+    def __call__(self, job_id, *args):
+        self.started.set()
+        self.release.wait(5)
+        self.order.append((job_id, args))
+        if len(self.order) == self.expected:
+            self.done.set()
+        if job_id == "boom":
+            raise RuntimeError("crawler crashed")
+
+
+def test_jobs_run_by_priority_then_fifo():
+    handler = BlockingHandler()
+    crawl_queue = CrawlQueue(handler, workers=1)
+    handler.expected = 5
+
+    crawl_queue.submit("first", "url-0")
+    assert handler.started.wait(5) # The single worker is now busy with "first"
+    assert crawl_queue.submit("low", "url-1", priority=5) == 1
+    assert crawl_queue.submit("normal_a", "url-2") == 1
+    assert crawl_queue.submit("normal_b", "url-3") == 2
+    assert crawl_queue.submit("urgent", "url-4", priority=-1) == 1
+    assert [crawl_queue.position(job) for job in ("urgent", "normal_a", "normal_b", "low")] == [1, 2, 3, 4]
+    assert crawl_queue.stats() == {"workers": 1, "running": 1, "queued": 4, "max_queued": 1000}
+
+    handler.release.set()
+    assert handler.done.wait(5)
+    assert [job_id for job_id, _ in handler.order] == ["first", "urgent", "normal_a", "normal_b", "low"]
+    assert handler.order[1] == ("urgent", ("url-4",))
+    assert crawl_queue.position("low") is None and crawl_queue.depth() == 0
+
+
+def test_full_queue_rejects_new_jobs():
+    handler = BlockingHandler()
+    crawl_queue = CrawlQueue(handler, workers=1, max_queued=2)
+    handler.expected = 3
+
+    crawl_queue.submit("running", "url-0")
+    assert handler.started.wait(5)
+    crawl_queue.submit("queued_1", "url-1")
+    crawl_queue.submit("queued_2", "url-2")
+    with pytest.raises(QueueFullError):
+        crawl_queue.submit("rejected", "url-3")
+    assert crawl_queue.depth() == 2
+
+    handler.release.set()
+    assert handler.done.wait(5)
+    assert "rejected" not in [job_id for job_id, _ in handler.order]
+
+
+def test_worker_survives_a_failing_job():
+    handler = BlockingHandler()
+    handler.release.set()
+    handler.expected = 2
+    crawl_queue = CrawlQueue(handler, workers=1)
+
+    crawl_queue.submit("boom", "url-0")
+    crawl_queue.submit("after", "url-1")
+
+    assert handler.done.wait(5)
+    assert [job_id for job_id, _ in handler.order] == ["boom", "after"]
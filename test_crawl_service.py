@@ -0,0 +1,108 @@
+# test_crawl_service.py
+# SQLite crawl job store shared by the API and crawler processes: priority order, single claim per job,
+# QueueFullError, and the supervisor failing timed-out jobs and jobs of dead workers.
+import threading
+
+import pytest
+
+import crawl_service
+from crawl_queue import QueueFullError
+from crawl_service import CrawlJobStore, CrawlSupervisor
+
+
+def test_jobs_are_claimed_by_priority_then_submission(tmp_path):
+    store = CrawlJobStore(str(tmp_path / "jobs.sqlite3"))
+    assert store.submit("normal_a", "https://amazon.example/a", "Amazon") == 1
+    assert store.submit("normal_b", "https://amazon.example/b", "Amazon") == 2
+    assert store.submit("urgent", "https://amazon.example/u", "Amazon", priority=-1) == 1
+    assert store.position("normal_b") == 3
+
+    claimed = [store.claim(worker_pid=100)["job_id"] for _ in range(3)]
+
+    assert claimed == ["urgent", "normal_a", "normal_b"]
+    assert store.claim(worker_pid=100) is None
+    assert store.position("urgent") is None and store.get("urgent")["status"] == "running"
+
+
+def test_each_job_is_claimed_once_across_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    api = CrawlJobStore(path)
+    for i in range(40):
+        api.submit(f"job_{i}", f"https://amazon.example/{i}", "Amazon")
+    workers = [CrawlJobStore(path) for _ in range(4)] # One connection per crawler process
+    claimed = [[] for _ in workers]
+
+    def _drain(index):
+        while (job := workers[index].claim(worker_pid=index)) is not None:
+            claimed[index].append(job["job_id"])
+    threads = [threading.Thread(target=_drain, args=(i,)) for i in range(len(workers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    all_claimed = [job_id for worker_jobs in claimed for job_id in worker_jobs]
+    assert sorted(all_claimed) == sorted(f"job_{i}" for i in range(40))
+    assert api.stats()["running"] == 40
+
+
+def test_full_queue_rejects_submissions(tmp_path):
+    store = CrawlJobStore(str(tmp_path / "jobs.sqlite3"), max_queued=2)
+    store.submit("a", "https://amazon.example/a", "Amazon")
+    store.submit("b", "https://amazon.example/b", "Amazon")
+
+    with pytest.raises(QueueFullError):
+        store.submit("c", "https://amazon.example/c", "Amazon")
+    store.claim(worker_pid=1) # Running jobs no longer count against the limit
+    assert store.submit("c", "https://amazon.example/c", "Amazon") == 2
+
+
+def test_supervisor_fails_timed_out_jobs(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite3")
+    supervisor = CrawlSupervisor(path, workers=1, job_timeout=60)
+    store = CrawlJobStore(path)
+    now = [1000.0]
+    monkeypatch.setattr(crawl_service.time, "time", lambda: now[0])
+    store.submit("slow", "https://amazon.example/slow", "Amazon")
+    store.claim(worker_pid=4242)
+
+    now[0] += 30
+    supervisor._check_timeouts()
+    assert store.get("slow")["status"] == "running"
+
+    now[0] += 31
+    supervisor._check_timeouts()
+    job = store.get("slow")
+    assert job["status"] == "failed" and "timed out after 60s" in job["message"]
+
+    # The worker finishing late cannot overwrite the timeout
+    store.finish("slow", "completed", {"product_title": "late"})
+    assert store.get("slow")["status"] == "failed"
+
+
+class DeadProcess:
+    pid = 4242
+    exitcode = -9
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+def test_supervisor_fails_jobs_of_a_dead_worker(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    supervisor = CrawlSupervisor(path, workers=1)
+    store = CrawlJobStore(path)
+    store.submit("crashed", "https://amazon.example/x", "Amazon")
+    store.submit("other_worker", "https://amazon.example/y", "Amazon")
+    store.claim(worker_pid=4242)
+    store.claim(worker_pid=7)
+
+    supervisor._processes = [DeadProcess()]
+    supervisor._stopping = True # Do not spawn a replacement worker
+    supervisor._check_workers()
+
+    assert store.get("crashed")["status"] == "failed" and "exited (code -9)" in store.get("crashed")["message"]
+    assert store.get("other_worker")["status"] == "running"
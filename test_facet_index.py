@@ -0,0 +1,66 @@
+# test_facet_index.py
+# Faceted inverted index: filter semantics, re-indexing, and syncing with an analysis store written by other processes.
+import pytest
+
+from analysis_store import AnalysisStore
+from facet_index import FacetIndex
+
+US_TIKTOK = {"language": "English", "regionCountry": "US", "audienceGender": "female", "audienceAge": "18-24", "contentFormat": ["unboxing", "short video"]}
+UK_YOUTUBE = {"language": "English", "regionCountry": "UK", "audienceGender": "male", "audienceAge": "25-34", "contentFormat": ["review"]}
+CN_DOUYIN = {"language": "中文", "regionCountry": "中国", "audienceGender": "女性", "audienceAge": "18-24岁", "contentFormat": ["开箱"]}
+
+
+@pytest.fixture
+def index():
+    facets = FacetIndex()
+    facets.add_many([("inf_1", "tiktok", US_TIKTOK), ("inf_2", "youtube", UK_YOUTUBE), ("inf_3", "douyin", CN_DOUYIN)])
+    return facets
+
+
+def test_facets_are_anded_and_values_ored(index):
+    assert index.influencer_ids({"language": ["English"]}) == {"inf_1", "inf_2"}
+    assert index.influencer_ids({"language": ["English"], "regionCountry": ["US"]}) == {"inf_1"}
+    assert index.influencer_ids({"regionCountry": ["US", "UK"]}) == {"inf_1", "inf_2"}
+    assert index.influencer_ids({"audienceGender": ["女性"]}) == {"inf_3"}
+    assert index.search({"platform": ["youtube"]}) == {"inf_2": ["youtube"]}
+
+
+def test_bare_terms_match_any_facet(index):
+    assert index.influencer_ids(terms=["female 18-24"]) == {"inf_1"}
+    assert index.influencer_ids(terms=["18-24"]) == {"inf_1", "inf_3"}
+    assert index.influencer_ids(terms=["English", "unboxing"]) == {"inf_1"}
+    assert index.influencer_ids(terms=["esports"]) == set()
+
+
+def test_unknown_facet_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.search({"followers": ["1M"]})
+
+
+def test_reindexing_replaces_old_facets(index):
+    index.add("inf_1", "tiktok", {**US_TIKTOK, "regionCountry": "CA"})
+
+    assert index.influencer_ids({"regionCountry": ["US"]}) == set()
+    assert index.influencer_ids({"regionCountry": ["CA"]}) == {"inf_1"}
+    assert len(index) == 3
+
+
+def test_sync_picks_up_analyses_stored_by_other_processes(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    worker_a, worker_b = AnalysisStore(path), AnalysisStore(path)
+    facets = FacetIndex()
+    worker_a.put_platform_analysis("inf_1", "tiktok", [], US_TIKTOK)
+
+    assert facets.sync(worker_a) == 1
+    assert facets.influencer_ids({"regionCountry": ["US"]}) == {"inf_1"}
+
+    # Written through another connection (another worker): visible after the next sync only
+    worker_b.put_platform_analysis("inf_2", "youtube", [], UK_YOUTUBE)
+    worker_b.put_platform_analysis("inf_1", "tiktok", [], {**US_TIKTOK, "regionCountry": "CA"})
+    assert facets.influencer_ids({"regionCountry": ["UK"]}) == set()
+
+    facets.sync(worker_a)
+    assert facets.influencer_ids({"regionCountry": ["UK"]}) == {"inf_2"}
+    assert facets.influencer_ids({"regionCountry": ["US"]}) == set()
+    assert facets.influencer_ids({"regionCountry": ["CA"]}) == {"inf_1"}
+    assert len(facets) == 2
@@ -0,0 +1,91 @@
+# test_fan_out.py
+# Concurrent fan-out nodes: every LLM call shares the LLM_MAX_CONCURRENCY cap, and one influencer's failure or timeout is
+# recorded in error_messages without holding up or failing the others.
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+import graph_nodes
+from graph_state import MarketingWorkFlowState
+from conftest import PRODUCT_INFO, influencer_data
+
+
+class InFlight:
+    """Wraps a fake chain answer in a short await and records the most calls in flight at once."""
+
+    def __init__(self, fake_llm, chain_name, delay=0.05):
+        self.fake_llm, self.chain_name, self.delay = fake_llm, chain_name, delay
+        self.current = self.peak = 0
+
+    async def __call__(self, inputs):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.fake_llm.answer(self.chain_name, inputs)
+        finally:
+            self.current -= 1
+
+
+def test_platform_analyses_never_exceed_the_llm_cap(fake_llm, monkeypatch):
+    monkeypatch.setattr(graph_nodes, "LLM_MAX_CONCURRENCY", 2)
+    in_flight = InFlight(fake_llm, "social_media_analyst")
+    monkeypatch.setattr(graph_nodes.platform_analysis_chain, "runnable", RunnableLambda(in_flight))
+    state = MarketingWorkFlowState(product_info=PRODUCT_INFO, influencer_data=influencer_data(*(f"inf_{i}" for i in range(6))))
+
+    update = asyncio.run(graph_nodes.analyze_influencers_platforms_node(state))
+
+    assert in_flight.peak == 2
+    assert len(fake_llm.calls["social_media_analyst"]) == 6
+    assert all(analyses["tiktok"] for analyses in update["platform_analysis"].values())
+
+
+def test_a_failed_platform_analysis_is_isolated(fake_llm):
+    fake_llm.failures["social_media_analyst"] = lambda inputs: RuntimeError("bad gateway") if inputs["influencerName"] == "Name inf_2" else None
+    state = MarketingWorkFlowState(product_info=PRODUCT_INFO, influencer_data=influencer_data("inf_1", "inf_2", "inf_3"))
+
+    update = asyncio.run(graph_nodes.analyze_influencers_platforms_node(state))
+
+    assert update["error_messages"] == ["Platform analysis error for Name inf_2 - tiktok: bad gateway"]
+    assert update["platform_analysis"]["inf_2"] == {}
+    assert update["platform_analysis"]["inf_1"]["tiktok"] and update["platform_analysis"]["inf_3"]["tiktok"]
+
+
+def _analyzed_state(*influencer_ids):
+    state = MarketingWorkFlowState(product_info=PRODUCT_INFO, influencer_data=influencer_data(*influencer_ids))
+    update = asyncio.run(graph_nodes.analyze_influencers_platforms_node(state))
+    return MarketingWorkFlowState(**{**state.model_dump(), "platform_analysis": update["platform_analysis"]}) # Validated, as the graph does
+
+
+def test_profiles_share_the_llm_cap(fake_llm, monkeypatch):
+    state = _analyzed_state(*(f"inf_{i}" for i in range(5)))
+    monkeypatch.setattr(graph_nodes, "LLM_MAX_CONCURRENCY", 2)
+    in_flight = InFlight(fake_llm, "influencer_analysis")
+    monkeypatch.setattr(graph_nodes.influencer_profile_chain, "runnable", RunnableLambda(in_flight))
+
+    update = asyncio.run(graph_nodes.generate_influencer_profiles_node(state))
+
+    assert in_flight.peak == 2
+    assert sorted(update["influencer_profiles"]) == [f"inf_{i}" for i in range(5)]
+
+
+def test_slow_and_failing_profiles_are_isolated(fake_llm, monkeypatch):
+    state = _analyzed_state("inf_1", "inf_slow", "inf_bad", "inf_2")
+    monkeypatch.setattr(graph_nodes, "PROFILE_TIMEOUT_SECONDS", 0.2)
+    fake_llm.failures["influencer_analysis"] = lambda inputs: RuntimeError("bad gateway") if inputs["influencerId"] == "inf_bad" else None
+
+    async def _answer(inputs):
+        if inputs["influencerId"] == "inf_slow":
+            await asyncio.sleep(5)
+        return fake_llm.answer("influencer_analysis", inputs)
+    monkeypatch.setattr(graph_nodes.influencer_profile_chain, "runnable", RunnableLambda(_answer))
+
+    started = time.perf_counter()
+    update = asyncio.run(graph_nodes.generate_influencer_profiles_node(state))
+
+    assert time.perf_counter() - started < 2 # The slow influencer is cut off at its timeout, not awaited
+    assert sorted(update["influencer_profiles"]) == ["inf_1", "inf_2"]
+    bad_error, slow_error = sorted(update["error_messages"])
+    assert bad_error == "Profile generation error for Name inf_bad: bad gateway"
+    assert slow_error.startswith("Profile generation error for Name inf_slow: timed out after")
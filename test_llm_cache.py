@@ -0,0 +1,132 @@
+# test_llm_cache.py
+# LLM response cache: TTL expiry, size-bounded LRU eviction (also across processes sharing one file) and per-chain switches.
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+import llm_cache
+from llm_cache import LLMResponseCache, CachedChain
+
+
+class FakeLLM:
+    """Stands in for AzureChatOpenAI: answers with the rendered prompt and counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt_value):
+        self.calls += 1
+        return {"answer": prompt_value.to_string()}
+
+
+def _chain(cache, fake_llm, name="product_metadata", template="Q: {question}", deployment="gpt-4o"):
+    return CachedChain(name, template, RunnableLambda(fake_llm), RunnableLambda(lambda parsed: parsed), cache, deployment)
+
+
+def _ask(chain, question, **kwargs):
+    return asyncio.run(chain.ainvoke({"question": question}, **kwargs))
+
+
+def test_repeated_call_is_served_from_cache(tmp_path):
+    cache, fake_llm = LLMResponseCache(str(tmp_path / "llm.sqlite3")), FakeLLM()
+    chain = _chain(cache, fake_llm)
+
+    first = _ask(chain, "bottle")
+    second = _ask(chain, "bottle")
+
+    assert first == second == {"answer": "Human: Q: bottle"}
+    assert fake_llm.calls == 1
+    assert cache.stats()["chains"]["product_metadata"]["hits"] == 1
+
+
+def test_key_covers_template_and_deployment(tmp_path):
+    cache, fake_llm = LLMResponseCache(str(tmp_path / "llm.sqlite3")), FakeLLM()
+
+    _ask(_chain(cache, fake_llm), "bottle")
+    _ask(_chain(cache, fake_llm, template="Question: {question}"), "bottle")
+    _ask(_chain(cache, fake_llm, deployment="gpt-4o-mini"), "bottle")
+
+    assert fake_llm.calls == 3
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+
+    cache.put("collab_email", "k", {"email_subject": "Hi"})
+    now[0] += 30
+    assert cache.get("collab_email", "k") == (True, {"email_subject": "Hi"})
+    now[0] += 61
+    assert cache.get("collab_email", "k") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_evicts_least_recently_accessed(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.put("chain", key, key)
+    now[0] += 1
+    cache.get("chain", "a") # "b" is now the least recently used
+    now[0] += 1
+    cache.put("chain", "c", "c")
+
+    assert cache.get("chain", "a")[0] and cache.get("chain", "c")[0]
+    assert cache.get("chain", "b") == (False, None)
+
+
+def test_eviction_counts_entries_written_by_other_processes(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    worker_a, worker_b = LLMResponseCache(path, max_entries=3), LLMResponseCache(path, max_entries=3)
+
+    for i in range(3):
+        worker_a.put("chain", f"a{i}", i)
+    for i in range(3):
+        worker_b.put("chain", f"b{i}", i)
+
+    assert worker_a.stats()["entries"] == worker_b.stats()["entries"] == 3
+    assert [worker_a.get("chain", f"b{i}")[0] for i in range(3)] == [True, True, True]
+
+
+def test_disabled_chain_bypasses_cache(tmp_path):
+    cache, fake_llm = LLMResponseCache(str(tmp_path / "llm.sqlite3"), disabled_chains=["collab_email"]), FakeLLM()
+    email_chain, tags_chain = _chain(cache, fake_llm, name="collab_email"), _chain(cache, fake_llm)
+
+    for _ in range(2):
+        _ask(email_chain, "write")
+        _ask(tags_chain, "tag")
+    assert fake_llm.calls == 3 # Only the enabled chain was served from cache the second time
+
+    # The switch is stored in the cache file, so it reaches other processes (workers) sharing it
+    LLMResponseCache(str(tmp_path / "llm.sqlite3")).set_chain_enabled("collab_email", True)
+    _ask(email_chain, "write")
+    _ask(email_chain, "write")
+    assert fake_llm.calls == 4
+
+    cache.set_chain_enabled("product_metadata", False)
+    _ask(tags_chain, "tag")
+    assert fake_llm.calls == 5
+    assert not LLMResponseCache(str(tmp_path / "llm.sqlite3")).stats()["chains"]["product_metadata"]["enabled"]
+
+
+def test_only_misses_take_a_limiter_slot(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    chain = _chain(cache, FakeLLM())
+    _ask(chain, "bottle")
+
+    async def _without_free_slots():
+        limiter = asyncio.Semaphore(0)
+        hit = await asyncio.wait_for(chain.ainvoke({"question": "bottle"}, limiter=limiter), 1)
+        miss = asyncio.create_task(chain.ainvoke({"question": "stove"}, limiter=limiter))
+        await asyncio.sleep(0.05)
+        waiting = not miss.done()
+        limiter.release()
+        return hit, waiting, await asyncio.wait_for(miss, 1)
+
+    hit, waiting, miss = asyncio.run(_without_free_slots())
+    assert hit == {"answer": "Human: Q: bottle"} # Served although no slot is free
+    assert waiting and miss == {"answer": "Human: Q: stove"} # The miss waited for one
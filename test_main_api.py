@@ -0,0 +1,159 @@
+# test_main_api.py
+# The FastAPI app in-process (TestClient, lifespan included) on top of fake_llm: response shapes and error
+# reporting of the endpoints. test_api.py, by contrast, exercises a running server.
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import graph_nodes
+import main
+from conftest import PRODUCT_INFO, PRODUCT_TAGS, influencer_data
+from test_workflow_checkpoint import _rate_limited_for
+
+
+@pytest.fixture
+def client(fake_llm, monkeypatch):
+    """TestClient whose endpoints use fake_llm's per-test stores, which main imported by name."""
+    for name in ("analysis_store", "profile_index", "facet_index", "tag_vocab"):
+        monkeypatch.setattr(main, name, getattr(graph_nodes, name))
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+PRODUCT_INPUT = {**PRODUCT_INFO, "price": "$19.99"} # ProductInputForAnalysis requires a price
+
+
+def _workflow_request(*influencer_ids, **overrides):
+    return {"product_info": PRODUCT_INPUT, "influencer_data": influencer_data(*influencer_ids), **overrides}
+
+
+def test_failed_run_returns_its_run_id_as_a_field_and_header(client, fake_llm):
+    fake_llm.failures["collab_email"] = _rate_limited_for("inf_1")
+
+    response = client.post("/api/marketing/run", json=_workflow_request("inf_1"))
+
+    assert response.status_code == 500
+    detail = response.json()["detail"]
+    assert response.headers["X-Run-Id"] == detail["run_id"]
+    assert detail["resume_url"] == f"/api/marketing/runs/{detail['run_id']}/resume"
+    assert client.get(f"/api/marketing/runs/{detail['run_id']}").json()["data"]["pending_nodes"] == ["generate_emails_node"]
+
+    del fake_llm.failures["collab_email"]
+    resumed = client.post(detail["resume_url"])
+
+    assert resumed.status_code == 200
+    assert [email["influencerId"] for email in resumed.json()["data"]["generated_emails"]] == ["inf_1"]
+    assert client.get(f"/api/marketing/runs/{detail['run_id']}").status_code == 404 # Completed runs are not kept
+
+
+PROFILE = {"coreContentDirection": ["hiking"], "overallPersonaAndStyle": "outdoorsy", "mainAudience": "hikers", "commercialDegree": "medium",
+           "crossPlatformConsist": "high", "potentialBrandType": ["outdoor equipment"], "influencerEval": "good", "goodsCarryRating": "B"}
+
+
+def _selected(*influencer_ids):
+    return [{"influencerId": inf_id, "influencerName": f"Name {inf_id}", "match_score": "90%", "match_rationale": "fits"} for inf_id in influencer_ids]
+
+
+def _ndjson(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()] # Every line is one complete JSON object
+
+
+def test_email_stream_has_one_line_per_email_or_failure(client, fake_llm):
+    fake_llm.failures["collab_email"] = lambda inputs: RuntimeError("bad gateway") if "inf_2" in inputs["influencer_profile"] else None
+
+    lines = _ndjson(client.post("/api/outreachs/create/stream", json={
+        "selected_influencers": _selected("inf_1", "inf_2", "inf_3"), "product_info": PRODUCT_INFO,
+        "influencer_profiles": {inf_id: PROFILE for inf_id in ("inf_1", "inf_2", "inf_3")},
+    }))
+
+    assert sorted(line["data"]["influencerId"] for line in lines if line["type"] == "email") == ["inf_1", "inf_3"]
+    errors = [line["message"] for line in lines if line["type"] == "error"]
+    assert len(errors) == 1 and "Name inf_2" in errors[0]
+    assert lines[-1] == {"type": "done", "generated": 2, "errors": 1}
+
+
+def _analyze(client, *influencer_ids):
+    response = client.post("/api/influencers/analyze", json={"influencer_data": influencer_data(*influencer_ids)})
+    assert response.json()["success"] # Profiles and platform analyses are now in the server-side store
+
+
+def test_email_stream_reports_unknown_ids_once(client, fake_llm):
+    _analyze(client, "inf_1")
+
+    lines = _ndjson(client.post("/api/outreachs/create/stream", json={
+        "selected_influencers": _selected("inf_1", "inf_unknown"), "product_info": PRODUCT_INFO, # Profiles hydrated by id
+    }))
+
+    assert [line["type"] for line in lines] == ["error", "email", "done"]
+    assert "inf_unknown" in lines[0]["message"]
+    assert lines[1]["data"]["influencerId"] == "inf_1"
+    assert lines[-1] == {"type": "done", "generated": 1, "errors": 1}
+
+
+def test_search_influencers_by_facets(client, fake_llm):
+    _analyze(client, "inf_1", "inf_2")
+
+    found = client.get("/api/influencers/search", params={"language": "English", "platform": "tiktok"}).json()["data"]
+    assert found["total"] == 2
+    assert sorted(inf["influencerId"] for inf in found["influencers"]) == ["inf_1", "inf_2"]
+    assert client.get("/api/influencers/search", params={"language": "French"}).json()["data"]["total"] == 0
+    assert len(client.get("/api/influencers/search", params={"q": "English", "limit": 1}).json()["data"]["influencers"]) == 1
+
+
+def test_influencer_pool_crud(client, fake_llm):
+    _analyze(client, "inf_1", "inf_2")
+
+    saved = client.put("/api/influencers/pools/campers", json={"influencer_ids": ["inf_1", "inf_2", "inf_unknown"]}).json()["data"]
+    assert saved == {"name": "campers", "size": 3, "missing_profiles": ["inf_unknown"]}
+    assert client.get("/api/influencers/pools").json()["data"]["campers"]["size"] == 3
+    members = client.get("/api/influencers/pools/campers").json()["data"]["members"]
+    assert [(member["influencerId"], member["influencerName"]) for member in members] == [
+        ("inf_1", "Name inf_1"), ("inf_2", "Name inf_2"), ("inf_unknown", None)]
+
+    recommended = client.post("/api/influencers/recommend", json={"product_info": PRODUCT_INFO, "product_tags": PRODUCT_TAGS,
+                                                                  "pool_name": "campers", "retrieval_top_k": 0}).json()
+    assert sorted(match["influencerId"] for match in recommended["data"]["selected_influencers"]) == ["inf_1", "inf_2"]
+
+    assert client.delete("/api/influencers/pools/campers").status_code == 200
+    assert client.get("/api/influencers/pools/campers").status_code == 404
+    assert client.delete("/api/influencers/pools/campers").status_code == 404
+
+
+def test_stop_after_returns_only_the_upstream_state(client, fake_llm):
+    response = client.post("/api/marketing/run", json=_workflow_request("inf_1", stop_after="generate_influencer_profiles_node"))
+
+    assert response.status_code == 200 and "X-Run-Id" not in response.headers # Partial runs are not checkpointed
+    data = response.json()["data"]
+    assert sorted(data["influencer_profiles"]) == ["inf_1"]
+    assert data["product_tags"] is None and data["match_results"] is None and data["generated_emails"] is None
+    assert not fake_llm.calls["product_metadata"] and not fake_llm.calls["collab_email"]
+
+    data = client.post("/api/marketing/run", json=_workflow_request("inf_1", stop_after="match_influencers_node")).json()["data"]
+    assert [match["influencerId"] for match in data["match_results"]] == ["inf_1"]
+    assert data["selected_influencers"] is None and data["generated_emails"] is None
+    assert not fake_llm.calls["collab_email"]
+
+
+def test_stop_after_rejects_unknown_nodes(client, fake_llm):
+    assert client.post("/api/marketing/run", json=_workflow_request("inf_1", stop_after="send_emails_node")).status_code == 422
+    pipelined = _workflow_request("inf_1", stop_after="match_influencers_node", execution_mode="pipelined")
+    assert client.post("/api/marketing/run", json=pipelined).status_code == 422
+    with pytest.raises(ValueError, match="Unknown workflow node"):
+        graph_nodes.marketing_workflow_until("send_emails_node")
+    assert not fake_llm.calls # Nothing ran
+
+
+def test_product_analysis_runs_only_the_product_node(client, fake_llm):
+    first = client.post("/api/products/analyze", json=PRODUCT_INPUT).json()["data"]
+    second = client.post("/api/products/analyze", json=PRODUCT_INPUT).json()["data"]
+
+    assert {key: first[key] for key in PRODUCT_TAGS} == PRODUCT_TAGS
+    assert (first["product_tags_source"], second["product_tags_source"]) == ("llm", "cache")
+    assert list(fake_llm.calls) == ["product_metadata"] and len(fake_llm.calls["product_metadata"]) == 1
+
+    fake_llm.failures["product_metadata"] = lambda inputs: RuntimeError("bad gateway")
+    failed = client.post("/api/products/analyze", json={**PRODUCT_INPUT, "asin": "B0TEST0002"})
+    assert failed.status_code == 500 and "bad gateway" in failed.json()["detail"]
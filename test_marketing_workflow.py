@@ -0,0 +1,165 @@
+# test_marketing_workflow.py
+# Marketing workflow graphs end to end, with the LLM replaced by conftest.FakeLLM.
+import asyncio
+import json
+import sqlite3
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+import graph_nodes
+from analysis_store import artifact_id, fingerprint, product_key
+from graph_state import ProductTags
+from conftest import PRODUCT_INFO, PRODUCT_TAGS, influencer_data
+
+
+def _initial_state(*influencer_ids, **overrides):
+    return {"product_info": PRODUCT_INFO, "influencer_data": influencer_data(*influencer_ids), "match_threshold": 75.0,
+            "error_messages": [], **overrides}
+
+
+def test_product_and_influencer_branches_run_in_parallel(fake_llm, monkeypatch):
+    # Each branch's first LLM call waits until the other branch has made one, so a sequential graph times out
+    started = {}
+
+    def _meeting(chain_name, other):
+        async def _answer(inputs):
+            started.setdefault(chain_name, asyncio.Event()).set()
+            await asyncio.wait_for(started.setdefault(other, asyncio.Event()).wait(), 2)
+            return fake_llm.answer(chain_name, inputs)
+        return RunnableLambda(_answer)
+    monkeypatch.setattr(graph_nodes.product_metadata_chain, "runnable", _meeting("product_metadata", "social_media_analyst"))
+    monkeypatch.setattr(graph_nodes.platform_analysis_chain, "runnable", _meeting("social_media_analyst", "product_metadata"))
+
+    final = asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1", "inf_2")))
+
+    assert final["error_messages"] == []
+    assert final["product_tags"]["FeatureTags"] == ["camping gear", "ultralight"]
+    assert sorted(final["influencer_profiles"]) == ["inf_1", "inf_2"]
+    assert sorted(email.influencerId for email in final["generated_emails"]) == ["inf_1", "inf_2"]
+    assert len(fake_llm.calls["product_metadata"]) == 1 # Joined once before matching, not once per branch
+
+
+def _explained_ids(fake_llm):
+    return [inf["influencerId"] for call in fake_llm.calls["influencer_rationale"] for inf in json.loads(call["influencers_to_explain"])]
+
+
+def test_pipelined_run_writes_rationales_only_above_threshold(fake_llm):
+    fake_llm.scores = {"inf_low": "40%", "inf_high": "90%"}
+
+    final = asyncio.run(graph_nodes.pipelined_workflow_app.ainvoke(_initial_state("inf_low", "inf_high", match_strategy="two_stage")))
+
+    assert _explained_ids(fake_llm) == ["inf_high"] # inf_low alone in its pipeline is still not worth a rationale call
+    assert [match.influencerId for match in final["selected_influencers"]] == ["inf_high"]
+    assert sorted(match.influencerId for match in final["match_results"]) == ["inf_high", "inf_low"]
+    assert [email.influencerId for email in final["generated_emails"]] == ["inf_high"]
+
+
+def test_batch_run_also_explains_the_top_k_below_threshold(fake_llm, monkeypatch):
+    monkeypatch.setattr(graph_nodes, "MATCH_RATIONALE_TOP_K", 2)
+    fake_llm.scores = {"inf_1": "90%", "inf_2": "60%", "inf_3": "30%"}
+
+    asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1", "inf_2", "inf_3", match_strategy="two_stage")))
+
+    assert sorted(_explained_ids(fake_llm)) == ["inf_1", "inf_2"]
+
+
+def test_store_io_runs_off_the_event_loop(fake_llm, monkeypatch):
+    # A slow store (slow disk, locked WAL) must not stall other coroutines on the loop
+    put_profile = graph_nodes.analysis_store.put_profile
+
+    def _slow_put_profile(*args):
+        time.sleep(0.3)
+        return put_profile(*args)
+    monkeypatch.setattr(graph_nodes.analysis_store, "put_profile", _slow_put_profile)
+
+    async def _run_with_ticker():
+        ticks = []
+
+        async def _ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        ticker = asyncio.create_task(_ticker())
+        await graph_nodes.influencer_app.ainvoke(_initial_state("inf_1"))
+        ticker.cancel()
+        return ticks
+
+    ticks = asyncio.run(_run_with_ticker())
+
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.2
+
+
+def test_pipelined_run_shortlists_over_the_whole_candidate_set(fake_llm):
+    final = asyncio.run(graph_nodes.pipelined_workflow_app.ainvoke(
+        _initial_state("inf_1", "inf_2", "inf_3", match_strategy="two_stage", prefilter_top_k=1)))
+
+    assert sorted(final["influencer_profiles"]) == ["inf_1", "inf_2", "inf_3"]
+    assert sorted(final["prefilter_scores"]) == ["inf_1", "inf_2", "inf_3"]
+    scored_ids = [inf["influencerId"] for call in fake_llm.calls["influencer_score"] for inf in json.loads(call["influencers_to_match"])]
+    assert len(scored_ids) == 1 # Only the shortlisted influencer gets a scoring pipeline
+    assert [match.influencerId for match in final["match_results"]] == scored_ids
+
+
+def test_pipelined_run_reports_a_product_failure_once(fake_llm, monkeypatch):
+    def _locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(graph_nodes.analysis_store, "get_product_tags", _locked) # Raised outside the node's LLM error handling
+
+    final = graph_nodes.pipelined_workflow_app.invoke(_initial_state("inf_1", "inf_2"))
+
+    assert final["error_messages"] == ["Product analysis error: database is locked"]
+    assert sorted(final["influencer_profiles"]) == ["inf_1", "inf_2"] # Profiles are still returned
+    assert not final["match_results"] and not fake_llm.calls["influencer_score"]
+
+
+def _scored_ids(fake_llm):
+    return sorted(inf["influencerId"] for call in fake_llm.calls["influencer_score"] for inf in json.loads(call["influencers_to_match"]))
+
+
+def test_rerun_scores_only_influencers_whose_profile_changed(fake_llm):
+    asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1", "inf_2", "inf_3")))
+    assert _scored_ids(fake_llm) == ["inf_1", "inf_2", "inf_3"]
+
+    # Same product and profile fingerprints: every match result comes from the store
+    fake_llm.calls.clear()
+    final = asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1", "inf_2", "inf_3")))
+    assert not fake_llm.calls["influencer_score"] and not fake_llm.calls["influencer_match"]
+    assert sorted(match.influencerId for match in final["selected_influencers"]) == ["inf_1", "inf_2", "inf_3"]
+
+    # New posts and name for inf_2 change its platform analysis, hence its profile fingerprint
+    fake_llm.calls.clear()
+    state = _initial_state("inf_1", "inf_2", "inf_3")
+    state["influencer_data"][1] = {"influencerId": "inf_2", "influencerName": "Renamed inf_2",
+                                   "platforms": {"tiktok": [{"content_title": "new trail", "content_url": "https://tiktok.example/inf_2/2"}]}}
+    final = asyncio.run(graph_nodes.workflow_app.ainvoke(state))
+    assert [call["influencerName"] for call in fake_llm.calls["influencer_analysis"]] == ["Renamed inf_2"]
+    assert _scored_ids(fake_llm) == ["inf_2"]
+    assert sorted(match.influencerId for match in final["match_results"]) == ["inf_1", "inf_2", "inf_3"]
+
+
+def test_product_tags_are_reused_until_the_product_changes(fake_llm, monkeypatch):
+    first = asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1")))
+    assert first["product_tags_source"] == "llm" and len(fake_llm.calls["product_metadata"]) == 1
+    product_fp, profile_fps = graph_nodes._match_fingerprints(graph_nodes.MarketingWorkFlowState(**first), ["inf_1"])
+    email_id = artifact_id("email", product_key(PRODUCT_INFO), "inf_1")
+    email_fp = fingerprint(fake_llm.calls["collab_email"][0])
+
+    second = asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1")))
+    assert second["product_tags_source"] == "cache" and len(fake_llm.calls["product_metadata"]) == 1
+    assert second["product_tags"] == ProductTags(**first["product_tags"])
+    assert graph_nodes.analysis_store.get_match_results(product_fp, profile_fps)
+    assert graph_nodes.analysis_store.get_artifact(email_id, email_fp) is not None
+
+    # Same ASIN, new content: the tags are regenerated, and differ, so results built on the old ones are dropped
+    async def _retagged(inputs):
+        fake_llm.calls["product_metadata"].append(inputs)
+        return {**PRODUCT_TAGS, "FeatureTags": ["camping gear", "titanium"]}
+    monkeypatch.setattr(graph_nodes.product_metadata_chain, "runnable", RunnableLambda(_retagged))
+    changed = _initial_state("inf_1", product_info={**PRODUCT_INFO, "product_title": "Titanium camping stove"})
+    third = asyncio.run(graph_nodes.workflow_app.ainvoke(changed))
+
+    assert third["product_tags_source"] == "llm" and len(fake_llm.calls["product_metadata"]) == 2
+    assert third["product_tags"]["FeatureTags"] == ["camping gear", "titanium"]
+    assert graph_nodes.analysis_store.get_match_results(product_fp, profile_fps) == {}
+    assert graph_nodes.analysis_store.get_artifact(email_id, email_fp) is None
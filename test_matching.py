@@ -0,0 +1,77 @@
+# test_matching.py
+# Local parts of matching: the pre-filter blend of TF-IDF and canonical tag overlap, and token-budgeted chunking
+# of the LLM matcher (split, merged back, and isolated per chunk).
+import asyncio
+import json
+
+import pytest
+
+import graph_nodes
+from graph_state import MarketingWorkFlowState
+from relevance import prefilter_scores, tag_overlap_scores
+from conftest import PRODUCT_INFO, PRODUCT_TAGS
+
+HIKER = {"coreContentDirection": ["hiking", "camping gear"], "overallPersonaAndStyle": "outdoorsy", "mainAudience": "hikers",
+         "commercialDegree": "medium", "crossPlatformConsist": "high", "potentialBrandType": ["outdoor equipment"],
+         "influencerEval": "good", "goodsCarryRating": "B"}
+GAMER = {**HIKER, "coreContentDirection": ["game streams", "esports"], "mainAudience": "gamers", "potentialBrandType": ["gaming peripherals"]}
+
+
+def _state(profiles, **overrides):
+    return MarketingWorkFlowState(product_info=PRODUCT_INFO, influencer_data=[], product_tags=PRODUCT_TAGS,
+                                  influencer_profiles=profiles, **overrides)
+
+
+@pytest.mark.parametrize("tag_weight", [0.0, 0.5, 1.0])
+def test_prefilter_blends_lexical_and_tag_overlap_scores(fake_llm, monkeypatch, tag_weight):
+    monkeypatch.setattr(graph_nodes, "PREFILTER_TAG_WEIGHT", tag_weight)
+    product_ids = graph_nodes._product_tag_ids(PRODUCT_TAGS)
+    profile_ids = {"inf_hiker": graph_nodes._profile_tag_ids(HIKER), "inf_gamer": graph_nodes._profile_tag_ids(GAMER)}
+    state = _state({"inf_hiker": HIKER, "inf_gamer": GAMER}, product_tag_ids=product_ids, influencer_tag_ids=profile_ids,
+                   prefilter_top_k=1)
+
+    kept, scores = graph_nodes._prefilter_profiles(state)
+
+    lexical = prefilter_scores(PRODUCT_TAGS, {"inf_hiker": HIKER, "inf_gamer": GAMER})
+    overlap = tag_overlap_scores(product_ids, profile_ids)
+    assert overlap["inf_hiker"] > 0 and overlap["inf_gamer"] == 0
+    for inf_id in scores:
+        assert scores[inf_id] == pytest.approx((1 - tag_weight) * lexical[inf_id] + tag_weight * overlap[inf_id], abs=1e-4)
+    assert list(kept) == ["inf_hiker"]
+
+
+def test_prefilter_resolves_inline_profiles_without_growing_the_vocabulary(fake_llm):
+    graph_nodes._product_tag_ids(PRODUCT_TAGS)
+    vocabulary_size = len(graph_nodes.tag_vocab)
+
+    _, scores = graph_nodes._prefilter_profiles(_state({"inf_hiker": HIKER, "inf_gamer": GAMER}))
+
+    assert scores["inf_hiker"] > scores["inf_gamer"]
+    assert len(graph_nodes.tag_vocab) == vocabulary_size
+
+
+def test_pack_chunks_respects_the_token_budget():
+    items = [json.dumps({"id": i, "text": "x" * 400}) for i in range(10)] # ~100 tokens each
+    cost = graph_nodes._estimate_tokens(items[0]) + 50
+
+    chunks = graph_nodes._pack_chunks(items, available=cost * 3, output_tokens_per_item=50)
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert [item for chunk in chunks for item in chunk] == items # Order preserved, nothing dropped
+    assert graph_nodes._pack_chunks(items[:2], available=1, output_tokens_per_item=50) == [[items[0]], [items[1]]]
+
+
+def test_matching_splits_large_pools_into_chunks_and_merges_results(fake_llm, monkeypatch):
+    monkeypatch.setattr(graph_nodes, "MATCH_CHUNK_TOKEN_BUDGET", 1500) # A few profiles per chunk
+    profiles = {f"inf_{i}": HIKER for i in range(12)}
+    fake_llm.failures["influencer_match"] = lambda inputs: RuntimeError("bad gateway") if '"inf_0"' in inputs["influencers_to_match"] else None
+
+    update = asyncio.run(graph_nodes.match_influencers_node(_state(profiles, match_strategy="single", prefilter_top_k=0)))
+
+    chunk_ids = [[inf["influencerId"] for inf in json.loads(call["influencers_to_match"])] for call in fake_llm.calls["influencer_match"]]
+    assert len(chunk_ids) > 1
+    assert sorted(inf_id for chunk in chunk_ids for inf_id in chunk) == sorted(profiles) # Each profile in exactly one chunk
+    failed_chunk = next(chunk for chunk in chunk_ids if "inf_0" in chunk)
+    # One failed chunk costs only its own profiles
+    assert sorted(result.influencerId for result in update["match_results"]) == sorted(set(profiles) - set(failed_chunk))
+    assert any("Matcher error (chunk" in err for err in update["error_messages"])
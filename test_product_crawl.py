@@ -0,0 +1,51 @@
+# test_product_crawl.py
+# Browser-side extraction path of AmazonCrawler with a fake WebDriver: the raw dict returned by PRODUCT_DETAILS_SCRIPT
+# has the shape product_parser produces offline, and is mapped to the same product details.
+import re
+
+from product_crawl import AmazonCrawler, PRODUCT_DETAILS_SCRIPT
+from product_parser import extract_raw_fields, parse_product_html
+from test_product_parser import FIXTURE_HTML, PRODUCT_URL
+
+
+class FakeBrowser:
+    """Page already loaded; execute_async_script answers with the raw fields the script would return."""
+
+    def __init__(self, raw_fields):
+        self.raw_fields = raw_fields
+        self.scripts = []
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object() # Satisfies the page-load wait
+
+    def save_screenshot(self, path):
+        return True
+
+    def execute_async_script(self, script, *args):
+        self.scripts.append(script)
+        return self.raw_fields
+
+
+def test_extraction_script_returns_every_raw_field():
+    script_fields = set(re.findall(r"\braw\.(\w+)\s*=", PRODUCT_DETAILS_SCRIPT))
+
+    assert script_fields == set(extract_raw_fields(FIXTURE_HTML, base_url=PRODUCT_URL))
+    assert "arguments[arguments.length - 1]" in PRODUCT_DETAILS_SCRIPT # Async: answers through the WebDriver callback
+
+
+def test_script_result_is_mapped_like_the_offline_parser():
+    raw_fields = extract_raw_fields(FIXTURE_HTML, base_url=PRODUCT_URL)
+    raw_fields["seller_href"] = "https://www.amazon.com/shops/A1" # Not a seller profile page, so no address lookup
+    crawler = AmazonCrawler()
+    crawler.browser = FakeBrowser(raw_fields)
+
+    details = crawler._extract_product_details(PRODUCT_URL)
+
+    assert crawler.browser.scripts == [PRODUCT_DETAILS_SCRIPT]
+    expected = parse_product_html(FIXTURE_HTML, PRODUCT_URL)
+    expected["seller_url"] = "https://www.amazon.com/shops/A1"
+    assert details == {**expected, "product_url": PRODUCT_URL}
+    assert details["features"] == "Keeps drinks cold for 24 hours | Leak-proof lid"
@@ -0,0 +1,75 @@
+# test_product_parser.py
+# Offline extraction tests: parse a saved product page snapshot, no browser or network needed.
+from product_parser import parse_product_html, parse_many
+
+PRODUCT_URL = "https://www.amazon.com/dp/B000I0DBH6"
+
+FIXTURE_HTML = """
+<html><head><title>Test product</title><script>var data = {"ASIN" : "B000I0DBH6"};</script></head>
+<body>
+  <span id="productTitle">  Stainless Steel Water Bottle, 32 oz  </span>
+  <a id="bylineInfo" href="/stores/HydroBrand">Visit the HydroBrand Store</a>
+  <span class="a-price aok-hidden"><span aria-hidden="true">$99.99</span></span>
+  <div class="priceToPay"><span class="a-price"><span aria-hidden="true">$24.99</span></span></div>
+  <span class="a-icon-alt">4.6 out of 5 stars</span>
+  <span id="acrCustomerReviewText">12,345 ratings</span>
+  <span id="social-proofing-faceout-title-tk_bought">2k+ bought in past month</span>
+  <div id="availability"><span> In Stock </span></div>
+  <div id="merchant-info">Ships from and sold by <a href="https://www.amazon.com/sp?seller=A1">HydroSeller</a></div>
+  <img id="landingImage" src="https://m.media-amazon.com/images/I/bottle.jpg">
+  <div id="feature-bullets"><ul>
+    <li><span class="a-list-item"> Keeps drinks cold for 24 hours </span></li>
+    <li><span class="a-list-item">Leak-proof lid</span></li>
+  </ul></div>
+  <div id="productDescription"><p>Double-wall insulated bottle.</p></div>
+  <table>
+    <tr class="po-brand"><td class="a-span3">Brand</td><td class="a-span9"><span class="po-break-word">HydroBrand</span></td></tr>
+  </table>
+  <table id="productDetails_detailBullets_sections1">
+    <tr><th class="prodDetSectionEntry">Date First Available</th><td> March 3, 2021 </td></tr>
+  </table>
+  <div id="detailBullets_feature_div"><ul>
+    <li><span class="a-list-item"><span>Best Sellers Rank:</span> #1,234 in Sports &amp; Outdoors</span></li>
+  </ul></div>
+</body></html>
+"""
+
+
+def test_parse_product_html_fields():
+    details = parse_product_html(FIXTURE_HTML, PRODUCT_URL)
+
+    assert details["platform"] == "Amazon"
+    assert details["product_title"] == "Stainless Steel Water Bottle, 32 oz"
+    assert details["asin"] == "B000I0DBH6"
+    assert details["price"] == "$24.99" # The hidden price block is skipped
+    assert details["rating"] == "4.6"
+    assert details["review_count"] == "12345"
+    assert details["monthly_sales"] == "2000+"
+    assert details["availability"] == "In Stock"
+    assert details["seller"] == "HydroSeller"
+    assert details["seller_url"] == "https://www.amazon.com/sp?seller=A1"
+    assert details["image_url"] == "https://m.media-amazon.com/images/I/bottle.jpg"
+    assert details["features"] == "Keeps drinks cold for 24 hours | Leak-proof lid"
+    assert details["description"] == "Double-wall insulated bottle."
+    assert details["brand_name"] == "HydroBrand"
+    assert details["listing_date"] == "March 3, 2021"
+    assert details["bsr_top_category_rank"] == "1234"
+    assert details["seller_address"] == "N/A"
+
+
+def test_parse_product_html_missing_fields_and_asin_fallback():
+    details = parse_product_html('<html><body><script>"ASIN":"B0TESTASIN"</script></body></html>', "https://www.amazon.com/some-product")
+
+    assert details["asin"] == "B0TESTASIN"
+    assert details["product_title"] == "N/A"
+    assert details["price"] == "N/A"
+    assert details["review_count"] == "0"
+    assert details["seller"] == "Amazon"
+    assert details["features"] == "N/A"
+
+
+def test_parse_many_keeps_order_and_isolates_failures():
+    results = parse_many([(FIXTURE_HTML, PRODUCT_URL, "Amazon"), ("", "https://www.amazon.com/dp/B0BROKEN00", "Amazon")])
+
+    assert results[0]["asin"] == "B000I0DBH6"
+    assert "error" in results[1]
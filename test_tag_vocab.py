@@ -0,0 +1,63 @@
+# test_tag_vocab.py
+# Canonical tag vocabulary: alias/fuzzy resolution, two processes (simulated by two instances) sharing one file,
+# read-only resolution, and the bitset overlap used by the pre-filter.
+import relevance
+from relevance import tag_overlap_scores
+from tag_vocab import TagVocabulary, normalize_tag
+
+
+def test_spelling_variants_resolve_to_one_id(tmp_path):
+    vocab = TagVocabulary(str(tmp_path / "tags.sqlite3"))
+
+    tag_id = vocab.resolve("Eco-Friendly")
+    assert normalize_tag("  Eco-Friendly! ") == "eco friendly"
+    assert vocab.resolve("eco friendly") == vocab.resolve("ECO_FRIENDLY") == tag_id
+    assert vocab.resolve("eco friendlly") == tag_id # Fuzzy match, saved as an alias
+    assert vocab.resolve("camping") != tag_id
+    assert vocab.ids(["camping", "Eco-Friendly", "", "eco friendly"]) == sorted({tag_id, vocab.resolve("camping")})
+    assert vocab.add_alias("green", "eco friendly") == tag_id and vocab.resolve("Green") == tag_id
+
+
+def test_two_processes_register_tags_without_id_conflicts(tmp_path):
+    path = str(tmp_path / "tags.sqlite3")
+    worker_a, worker_b = TagVocabulary(path), TagVocabulary(path)
+
+    hiking_a = worker_a.resolve("hiking")
+    skincare_b = worker_b.resolve("skincare") # Would reuse hiking's id if ids were counted per process
+    hiking_b = worker_b.resolve("hiking")
+    skincare_a = worker_a.resolve("skincare")
+
+    assert hiking_a == hiking_b and skincare_a == skincare_b and hiking_a != skincare_a
+    assert worker_a.canonical(skincare_a) == "skincare"
+    assert len(TagVocabulary(path)) == 2
+
+
+def test_resolution_without_register_writes_nothing(tmp_path):
+    path = str(tmp_path / "tags.sqlite3")
+    vocab = TagVocabulary(path)
+    camping_id = vocab.resolve("camping gear")
+
+    assert vocab.resolve("esports", register=False) is None
+    assert vocab.resolve("camping gears", register=False) == camping_id
+    assert vocab.ids(["esports", "camping gear"], register=False) == [camping_id]
+    assert vocab.stats()["canonical_tags"] == 1 and vocab.stats()["aliases"] == 1
+    assert TagVocabulary(path).stats()["aliases"] == 1
+
+
+def test_tag_overlap_scores_use_overlap_coefficient():
+    scores = tag_overlap_scores([1, 2, 3], {"inf_all": [1, 2, 3, 4, 5], "inf_one": [3, 40], "inf_none": [7], "inf_empty": []})
+
+    assert scores == {"inf_all": 1.0, "inf_one": 0.5, "inf_none": 0.0, "inf_empty": 0.0}
+    assert tag_overlap_scores([], {"inf_all": [1]}) == {"inf_all": 0.0}
+    assert tag_overlap_scores([1], {}) == {}
+
+
+def test_tag_overlap_bitsets_are_as_wide_as_the_product_tags(monkeypatch):
+    widths = []
+    real_tag_bitsets = relevance.tag_bitsets
+    monkeypatch.setattr(relevance, "tag_bitsets", lambda lists, width: widths.append(width) or real_tag_bitsets(lists, width))
+
+    scores = tag_overlap_scores([200_000, 5, 5], {"inf_big": [200_000, 199_999, 7], "inf_small": [5]})
+
+    assert widths == [2] # Not max tag ID + 1
+    assert scores == {"inf_big": 0.5, "inf_small": 1.0}
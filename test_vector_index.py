@@ -0,0 +1,58 @@
+# test_vector_index.py
+# Memory-mapped profile vector index: nearest-profile retrieval, reopening without a rebuild, and two processes
+# (simulated by two instances) writing to and searching the same directory.
+from vector_index import ProfileVectorIndex
+
+OUTDOOR = {"coreContentDirection": ["hiking", "camping gear"], "potentialBrandType": ["outdoor equipment"], "mainAudience": "hikers"}
+BEAUTY = {"coreContentDirection": ["makeup tutorials", "skincare"], "potentialBrandType": ["cosmetics"], "mainAudience": "young women"}
+GAMING = {"coreContentDirection": ["game streams", "esports"], "potentialBrandType": ["gaming peripherals"], "mainAudience": "gamers"}
+PRODUCT_TAGS = {"FeatureTags": ["camping gear"], "AudienceTags": ["hikers"], "UsageScenarioTags": ["hiking"]}
+
+
+def test_search_ranks_nearest_profile_first_and_respects_candidates(tmp_path):
+    index = ProfileVectorIndex(str(tmp_path), dim=256)
+    index.upsert_many([("inf_outdoor", OUTDOOR), ("inf_beauty", BEAUTY), ("inf_gaming", GAMING)])
+
+    assert [inf_id for inf_id, _ in index.search(PRODUCT_TAGS, top_k=3)][0] == "inf_outdoor"
+    assert [inf_id for inf_id, _ in index.search(PRODUCT_TAGS, top_k=2, candidate_ids=["inf_beauty", "inf_gaming", "unknown"])] \
+        in (["inf_beauty", "inf_gaming"], ["inf_gaming", "inf_beauty"])
+    assert index.search(PRODUCT_TAGS, top_k=0) == []
+
+
+def test_reopen_loads_rows_without_rebuild(tmp_path):
+    ProfileVectorIndex(str(tmp_path), dim=256).upsert_many([("inf_outdoor", OUTDOOR), ("inf_beauty", BEAUTY)])
+
+    reopened = ProfileVectorIndex(str(tmp_path), dim=256)
+    assert len(reopened) == 2 and "inf_outdoor" in reopened
+    assert reopened.search(PRODUCT_TAGS, top_k=1)[0][0] == "inf_outdoor"
+
+    # Another dimension cannot reuse the stored vectors
+    assert len(ProfileVectorIndex(str(tmp_path), dim=128)) == 0
+
+
+def test_writers_in_two_processes_share_one_index(tmp_path):
+    worker_a, worker_b = ProfileVectorIndex(str(tmp_path), dim=256), ProfileVectorIndex(str(tmp_path), dim=256)
+
+    worker_a.upsert("inf_beauty", BEAUTY)
+    worker_b.upsert("inf_gaming", GAMING) # Must not reuse the row worker_a appended
+    worker_a.upsert("inf_outdoor", OUTDOOR)
+
+    for index in (worker_a, worker_b):
+        assert len(index) == 3
+        assert index.search(PRODUCT_TAGS, top_k=1)[0][0] == "inf_outdoor"
+        assert index.search({"FeatureTags": ["esports"]}, top_k=1, candidate_ids=["inf_gaming", "inf_beauty"])[0][0] == "inf_gaming"
+
+    # An update in one process is visible to the other's next search
+    worker_b.upsert("inf_beauty", OUTDOOR)
+    scores = dict(worker_a.search(PRODUCT_TAGS, top_k=3))
+    assert scores["inf_beauty"] == scores["inf_outdoor"]
+
+
+def test_growth_beyond_initial_capacity_is_picked_up_by_other_process(tmp_path):
+    worker_a, worker_b = ProfileVectorIndex(str(tmp_path), dim=64), ProfileVectorIndex(str(tmp_path), dim=64)
+
+    worker_a.upsert_many((f"inf_{i}", BEAUTY) for i in range(1100)) # Initial capacity is 1024 rows
+    worker_a.upsert("inf_last", OUTDOOR)
+
+    assert len(worker_b) == 1101
+    assert worker_b.search(PRODUCT_TAGS, top_k=1)[0][0] == "inf_last"
@@ -0,0 +1,103 @@
+# test_workflow_checkpoint.py
+# Durable batch runs: a run interrupted by a rate limit stops at the failed node, survives closing the checkpointer
+# (a restart), and resumes without re-running completed nodes or regenerating the items that already succeeded.
+# Checkpoints of completed runs are deleted, and those of runs left unresumed past the TTL are pruned on open.
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+import graph_nodes
+from conftest import PRODUCT_INFO, influencer_data
+
+
+def _rate_limited_for(influencer_id):
+    def _failure(inputs):
+        if influencer_id not in inputs["influencer_profile"]:
+            return None
+        response = httpx.Response(429, request=httpx.Request("POST", "https://example.openai.azure.com/chat/completions"))
+        return openai.RateLimitError("Rate limit reached", response=response, body=None)
+    return _failure
+
+
+def _initial_state(*influencer_ids):
+    return {"product_info": PRODUCT_INFO, "influencer_data": influencer_data(*influencer_ids), "match_threshold": 75.0, "error_messages": []}
+
+
+def test_interrupted_run_resumes_at_the_failed_node(fake_llm, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite3")
+    fake_llm.failures["collab_email"] = _rate_limited_for("inf_2")
+
+    async def interrupted_run():
+        async with graph_nodes.open_workflow_checkpointer(checkpoint_path):
+            with pytest.raises(graph_nodes.RetryableNodeError):
+                await graph_nodes.arun_workflow(_initial_state("inf_1", "inf_2"), "run-1")
+            return await graph_nodes.aget_workflow_run("run-1")
+
+    run = asyncio.run(interrupted_run())
+    assert run["next"] == ["generate_emails_node"]
+    assert sorted(m.influencerId for m in run["values"]["selected_influencers"]) == ["inf_1", "inf_2"]
+    upstream_calls = {name: len(calls) for name, calls in fake_llm.calls.items() if name != "collab_email"}
+    assert len(fake_llm.calls["collab_email"]) == 2
+
+    # The rate limit has passed; resume after the checkpointer was closed and reopened
+    del fake_llm.failures["collab_email"]
+
+    async def resumed_run():
+        async with graph_nodes.open_workflow_checkpointer(checkpoint_path):
+            final = await graph_nodes.aresume_workflow("run-1")
+            return final, await graph_nodes.aget_workflow_run("run-1")
+
+    final, run = asyncio.run(resumed_run())
+    assert run is None # Completed, so its checkpoints were deleted
+    assert sorted(email.influencerId for email in final["generated_emails"]) == ["inf_1", "inf_2"]
+    assert {name: len(calls) for name, calls in fake_llm.calls.items() if name != "collab_email"} == upstream_calls
+    # inf_1's email was stored before the interruption; only inf_2's is generated again
+    assert len(fake_llm.calls["collab_email"]) == 3 and "inf_2" in fake_llm.calls["collab_email"][-1]["influencer_profile"]
+
+
+def test_completed_runs_leave_no_checkpoints(fake_llm, tmp_path):
+    async def completed_run():
+        async with graph_nodes.open_workflow_checkpointer(str(tmp_path / "checkpoints.sqlite3")) as app:
+            final = await graph_nodes.arun_workflow(_initial_state("inf_1"), "run-3")
+            return final, [checkpoint async for checkpoint in app.checkpointer.alist(None)]
+
+    final, checkpoints = asyncio.run(completed_run())
+
+    assert [email.influencerId for email in final["generated_emails"]] == ["inf_1"]
+    assert checkpoints == []
+
+
+def test_unresumed_runs_are_pruned_after_the_ttl(fake_llm, tmp_path, monkeypatch):
+    checkpoint_path = str(tmp_path / "checkpoints.sqlite3")
+    fake_llm.failures["collab_email"] = _rate_limited_for("inf_1")
+
+    async def interrupted_run():
+        async with graph_nodes.open_workflow_checkpointer(checkpoint_path):
+            with pytest.raises(graph_nodes.RetryableNodeError):
+                await graph_nodes.arun_workflow(_initial_state("inf_1"), "run-4")
+
+    async def reopened_run():
+        async with graph_nodes.open_workflow_checkpointer(checkpoint_path):
+            return await graph_nodes.aget_workflow_run("run-4")
+
+    asyncio.run(interrupted_run())
+    assert asyncio.run(reopened_run())["next"] == ["generate_emails_node"] # Within the default TTL
+
+    monkeypatch.setattr(graph_nodes, "WORKFLOW_CHECKPOINT_TTL_SECONDS", 1e-6)
+    assert asyncio.run(reopened_run()) is None
+
+
+def test_uncheckpointed_run_records_retryable_errors(fake_llm):
+    fake_llm.failures["collab_email"] = _rate_limited_for("inf_2")
+
+    final = asyncio.run(graph_nodes.workflow_app.ainvoke(_initial_state("inf_1", "inf_2")))
+
+    assert [email.influencerId for email in final["generated_emails"]] == ["inf_1"]
+    assert any("Name inf_2" in err for err in final["error_messages"])
+
+
+def test_checkpointed_run_requires_an_open_checkpointer(fake_llm):
+    with pytest.raises(RuntimeError, match="checkpointer is not open"):
+        asyncio.run(graph_nodes.arun_workflow(_initial_state("inf_1"), "run-2"))
@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl # POSIX only: serializes writers across processes
+except ImportError:
+    fcntl = None
+
+from relevance import product_tokens, profile_tokens
+
+# Determine the base directory of this Python script
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def hash_embed(tokens: List[str], dim: int) -> np.ndarray:
+    """
+    Signed feature hashing of a token list into a unit-length float32 vector (no model, no network).
+    blake2b instead of hash() so vectors are identical across processes and restarts.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    for tok in tokens:
+        digest = hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+    vec = np.sign(vec) * np.log1p(np.abs(vec)) # Dampen repeated tokens
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class ProfileVectorIndex:
+    """
+    In-process nearest-neighbour index over InfluencerProfiles.
+      - vectors.f32: float32 matrix (capacity x dim), memory-mapped, one row per influencer.
+      - ids.jsonl: influencerId of each row, append-only (row number = line number).
+      - meta.json: vector dimension.
+    Opening an existing index only maps the files, so startup cost does not grow with the pool size.
+    Upserts overwrite an existing row or append a new one.
+    Several processes (e.g. uvicorn workers) can share one directory: writers hold an exclusive lock on
+    index.lock, and every search first picks up rows other processes appended (the matrix is a shared mapping,
+    so overwritten rows are visible immediately). Without fcntl (Windows) only one process may write.
+    """
+
+    def __init__(self, directory: str, dim: int = 512):
+        self.directory = directory
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._ids_path = os.path.join(directory, "ids.jsonl")
+        self._lock_path = os.path.join(directory, "index.lock")
+        meta_path = os.path.join(directory, "meta.json")
+        os.makedirs(directory, exist_ok=True)
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._ids_offset = 0 # Bytes of ids.jsonl already read
+        self._matrix: Optional[np.memmap] = None
+        with self._lock, self._file_lock():
+            stored_dim = None
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    stored_dim = json.load(f).get("dim")
+            if stored_dim != dim:
+                # New index, or vectors built with another dimension: start over
+                for path in (self._vectors_path, self._ids_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": dim}, f)
+            self._refresh()
+            self._map(max(len(self._ids), 1024))
+
+    @classmethod
+    def from_env(cls) -> "ProfileVectorIndex":
+        return cls(
+            directory=os.getenv("VECTOR_INDEX_DIR", os.path.join(BASE_DIR, "cache", "vector_index")),
+            dim=int(os.getenv("VECTOR_INDEX_DIM", "512")),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def __contains__(self, influencer_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return influencer_id in self._rows
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        # Picks up ids appended by other processes and remaps if they grew the matrix; caller holds self._lock
+        size = os.path.getsize(self._ids_path) if os.path.exists(self._ids_path) else 0
+        if size > self._ids_offset:
+            with open(self._ids_path, "rb") as f:
+                f.seek(self._ids_offset)
+                data = f.read(size - self._ids_offset)
+            complete = data[:data.rfind(b"\n") + 1] # A line still being written is read next time
+            for inf_id in (json.loads(line) for line in complete.decode("utf-8").splitlines() if line.strip()):
+                self._rows[inf_id] = len(self._ids)
+                self._ids.append(inf_id)
+            self._ids_offset += len(complete)
+        if self._matrix is not None and (
+            len(self._ids) > self._matrix.shape[0] or os.path.getsize(self._vectors_path) != self._matrix.shape[0] * self.dim * 4
+        ):
+            self._map(len(self._ids))
+
+    def _map(self, capacity: int) -> None:
+        needed = capacity * self.dim * 4
+        if not os.path.exists(self._vectors_path) or os.path.getsize(self._vectors_path) < needed:
+            with open(self._vectors_path, "ab"):
+                pass
+            os.truncate(self._vectors_path, needed)
+        if self._matrix is not None:
+            self._matrix.flush()
+        capacity = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def upsert(self, influencer_id: str, profile: Any) -> None:
+        self.upsert_many([(influencer_id, profile)])
+
+    def upsert_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        with self._lock, self._file_lock():
+            self._refresh() # Rows appended by other writers must not be reused
+            new_ids: List[str] = []
+            for influencer_id, profile in items:
+                row = self._rows.get(influencer_id)
+                if row is None:
+                    row = len(self._ids)
+                    if row >= self._matrix.shape[0]:
+                        self._map(self._matrix.shape[0] * 2)
+                    self._ids.append(influencer_id)
+                    self._rows[influencer_id] = row
+                    new_ids.append(influencer_id)
+                self._matrix[row] = hash_embed(profile_tokens(profile), self.dim)
+            # Vectors reach disk before their ids, so a crash never leaves an id pointing at an empty row
+            self._matrix.flush()
+            if new_ids:
+                payload = "".join(json.dumps(inf_id) + "\n" for inf_id in new_ids).encode("utf-8")
+                with open(self._ids_path, "ab") as f:
+                    f.write(payload)
+                self._ids_offset += len(payload)
+
+    def search(self, product_tags: Any, top_k: int, candidate_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top-K (influencerId, cosine score) for the product's tags, optionally restricted to candidate_ids."""
+        query = hash_embed(product_tokens(product_tags), self.dim)
+        with self._lock:
+            self._refresh()
+            if candidate_ids is None:
+                ids = list(self._ids)
+                matrix = self._matrix[:len(ids)]
+            else:
+                ids = [inf_id for inf_id in dict.fromkeys(candidate_ids) if inf_id in self._rows]
+                matrix = self._matrix[[self._rows[inf_id] for inf_id in ids]]
+            if not ids or top_k <= 0:
+                return []
+            scores = matrix @ query
+        if top_k < len(ids):
+            top_rows = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top_rows = np.arange(len(ids))
+        top_rows = top_rows[np.argsort(-scores[top_rows])]
+        return [(ids[row], round(float(scores[row]), 4)) for row in top_rows]